@@ -0,0 +1,62 @@
+"""Per-route admission control.
+
+Each route gets a fixed number of concurrent slots and a bounded queue of
+waiters. A request that finds the queue full, or waits longer than the queue
+timeout, is rejected straight away so the caller can retry later; accepted
+requests never wait on more than ``max_queue`` others. Under a burst this
+keeps memory and latency bounded instead of piling up coroutines.
+"""
+import asyncio
+import math
+from typing import Dict, Optional, Tuple
+
+
+class RouteLimiter:
+    def __init__(self, limit: int, max_queue: int, queue_timeout: float):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.semaphore = asyncio.Semaphore(limit)
+        self.waiting = 0
+
+    async def acquire(self) -> bool:
+        if not self.semaphore.locked():
+            await self.semaphore.acquire()
+            return True
+        if self.waiting >= self.max_queue:
+            return False
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), self.queue_timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.waiting -= 1
+
+    def release(self) -> None:
+        self.semaphore.release()
+
+    @property
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.queue_timeout))
+
+
+class AdmissionControl:
+    """Creates a limiter per route on first use, with optional overrides."""
+
+    def __init__(self, limit: int, max_queue: int, queue_timeout: float, overrides: Dict[str, Tuple[int, int]]):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.overrides = overrides
+        self.limiters: Dict[str, RouteLimiter] = {}
+
+    def limiter(self, route: str) -> Optional[RouteLimiter]:
+        limiter = self.limiters.get(route)
+        if limiter is None:
+            limit, max_queue = self.overrides.get(route, (self.limit, self.max_queue))
+            if limit <= 0:
+                return None
+            limiter = self.limiters[route] = RouteLimiter(limit, max_queue, self.queue_timeout)
+        return limiter
@@ -0,0 +1,167 @@
+"""In-memory prefix index for typeahead suggestions.
+
+Every entity contributes a handful of normalized terms: its whole label, each
+word of the label and its tags. Terms live in one sorted list next to a
+parallel array of entity slots, so a prefix is a ``bisect`` range and a write
+is an insert or delete at a known position. Per-entity type and recency live
+in flat numpy arrays indexed by slot; a lookup gathers the slots in its range
+and ranks them in one vectorized pass.
+
+Memory is bounded by ``max_terms``: once the index grows past it, the least
+recently updated entities are evicted until it is back under the cap.
+"""
+import re
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from similarity import GrowableArray
+
+WORD_RE = re.compile(r"\w+")
+SPACE_RE = re.compile(r"\s+")
+MAX_TERM_LENGTH = 64
+MAX_TERMS_PER_ENTITY = 16
+PREFIX_END = "\uffff"
+
+Key = Tuple[str, str]
+
+
+def normalize(text: str) -> str:
+    return SPACE_RE.sub(" ", text.lower()).strip()[:MAX_TERM_LENGTH]
+
+
+def entity_terms(label: str, tags: Sequence[str] = ()) -> List[str]:
+    terms = [normalize(label)]
+    terms.extend(word for word in WORD_RE.findall(label.lower()))
+    terms.extend(normalize(tag) for tag in tags if isinstance(tag, str))
+    unique = list(dict.fromkeys(term for term in terms if term))
+    return unique[:MAX_TERMS_PER_ENTITY]
+
+
+class PrefixIndex:
+    def __init__(self, kinds: Sequence[str], max_terms: int):
+        # Earlier kinds rank first
+        self.kind_rank = {kind: rank for rank, kind in enumerate(kinds)}
+        self.max_terms = max_terms
+        self.terms: List[str] = []
+        self.term_slots = array("q")
+        self.keys: List[Optional[Key]] = []
+        self.labels: List[str] = []
+        self.entity_terms: List[List[str]] = []
+        self.kinds = GrowableArray(np.int16)
+        self.recency = GrowableArray(np.float64)
+        self.slot_of: Dict[Key, int] = {}
+        self.free: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.slot_of)
+
+    def add(self, kind: str, entity_id: str, label: str, updated: float, tags: Sequence[str] = ()) -> None:
+        key = (kind, entity_id)
+        self.remove(key)
+        slot = self._allocate(key, label, kind, updated)
+        terms = entity_terms(label, tags)
+        self.entity_terms[slot] = terms
+        for term in terms:
+            position = bisect_left(self.terms, term)
+            self.terms.insert(position, term)
+            self.term_slots.insert(position, slot)
+        if len(self.terms) > self.max_terms:
+            self.evict()
+
+    def load(self, entries: Iterable[Tuple[str, str, str, float, Sequence[str]]]) -> None:
+        """Add many entities at once, sorting the term list a single time."""
+        entries = list(entries)
+        for kind, entity_id, *_ in entries:
+            self.remove((kind, entity_id))
+        pairs = list(zip(self.terms, self.term_slots))
+        for kind, entity_id, label, updated, tags in entries:
+            slot = self._allocate((kind, entity_id), label, kind, updated)
+            terms = self.entity_terms[slot] = entity_terms(label, tags)
+            pairs.extend((term, slot) for term in terms)
+        pairs.sort()
+        self.terms = [term for term, _ in pairs]
+        self.term_slots = array("q", [slot for _, slot in pairs])
+        if len(self.terms) > self.max_terms:
+            self.evict()
+
+    def remove(self, key: Key) -> None:
+        slot = self.slot_of.pop(key, None)
+        if slot is None:
+            return
+        for term in self.entity_terms[slot]:
+            position = self.term_slots.index(slot, bisect_left(self.terms, term))
+            del self.terms[position]
+            del self.term_slots[position]
+        self._release(slot)
+
+    def evict(self) -> None:
+        """Drop the least recently updated entities down to 90% of the cap."""
+        target = int(self.max_terms * 0.9)
+        live = np.array(sorted(self.slot_of.values()), dtype=np.int64)
+        order = live[np.argsort(self.recency.view[live], kind="stable")]
+        evicted = set()
+        remaining = len(self.terms)
+        for slot in order.tolist():
+            if remaining <= target:
+                break
+            remaining -= len(self.entity_terms[slot])
+            evicted.add(slot)
+            del self.slot_of[self.keys[slot]]
+            self._release(slot)
+        kept = [(term, slot) for term, slot in zip(self.terms, self.term_slots) if slot not in evicted]
+        self.terms = [term for term, _ in kept]
+        self.term_slots = array("q", [slot for _, slot in kept])
+
+    def suggest(self, prefix: str, limit: int = 10, kinds: Optional[Iterable[str]] = None) -> List[Dict]:
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        start = bisect_left(self.terms, prefix)
+        end = bisect_left(self.terms, prefix + PREFIX_END, start)
+        if start == end:
+            return []
+        slots = np.frombuffer(self.term_slots[start:end], dtype=np.int64)
+        if kinds is not None:
+            codes = [self.kind_rank[kind] for kind in kinds if kind in self.kind_rank]
+            slots = slots[np.isin(self.kinds.view[slots], codes)]
+        # Best by type rank, then newest first. An entity can match through
+        # several terms, so enough candidates are kept to fill the limit
+        # after duplicates are dropped.
+        score = self.kinds.view[slots] * -1e12 + self.recency.view[slots]
+        candidates = min(len(slots), limit * MAX_TERMS_PER_ENTITY)
+        if candidates < len(slots):
+            top = np.argpartition(-score, candidates - 1)[:candidates]
+            slots, score = slots[top], score[top]
+        results = []
+        for slot in dict.fromkeys(slots[np.argsort(-score, kind="stable")].tolist()):
+            kind, entity_id = self.keys[slot]
+            results.append({"type": kind, "id": entity_id, "label": self.labels[slot]})
+            if len(results) == limit:
+                break
+        return results
+
+    def _allocate(self, key: Key, label: str, kind: str, updated: float) -> int:
+        if self.free:
+            slot = self.free.pop()
+            self.keys[slot] = key
+            self.labels[slot] = label
+            self.kinds.view[slot] = self.kind_rank[kind]
+            self.recency.view[slot] = updated
+        else:
+            slot = len(self.keys)
+            self.keys.append(key)
+            self.labels.append(label)
+            self.entity_terms.append([])
+            self.kinds.extend([self.kind_rank[kind]])
+            self.recency.extend([updated])
+        self.slot_of[key] = slot
+        return slot
+
+    def _release(self, slot: int) -> None:
+        self.keys[slot] = None
+        self.labels[slot] = ""
+        self.entity_terms[slot] = []
+        self.free.append(slot)
@@ -0,0 +1,221 @@
+"""Weapon balance simulation.
+
+Every weapon is expanded into one row per upgrade tier (``base`` plus each
+entry of ``upgrade_tree``, applied cumulatively in key order) and all rows are
+evaluated together with NumPy:
+
+* ``dps``: sustained damage per second looping ``combo_path``, with expected
+  crits, also broken down per damage type;
+* ``burst``: expected damage landed in the first ``BURST_SECONDS`` of a combo.
+
+Upgrade tiers understand ``damage_multiplier``, ``damage_bonus`` (a number
+for every type, or a per-type mapping), ``attack_speed``, ``crit_chance``
+and ``crit_multiplier``; other keys are ignored. The Monte-Carlo mode rolls
+crits and per-hit variance over many fights; it is CPU bound and meant to run
+in a process pool, one chunk of rows per task. Results are keyed by a hash of
+the weapon's balance-relevant content, so unchanged weapons are never
+simulated twice with the same parameters.
+"""
+import hashlib
+import json
+import re
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# move -> (damage multiplier, duration in seconds at speed 1.0)
+MOVES = {"light": (1.0, 0.45), "heavy": (1.8, 0.9), "ability": (2.6, 1.4)}
+DEFAULT_MOVE = (1.0, 0.7)
+WEAPON_SPEED = {"sword": 1.0, "spear": 0.95, "bow": 0.9, "chakram": 1.2, "staff": 0.85, "greatsword": 0.7}
+BASE_CRIT_CHANCE = 0.05
+BASE_CRIT_MULTIPLIER = 1.5
+BURST_SECONDS = 3.0
+MAX_SPEED = 20.0
+# Upper bound on the fights x hits rolled at once by monte_carlo
+SAMPLE_BLOCK = 1 << 21
+
+BALANCE_FIELDS = ("weapon_type", "damage_profile", "combo_path", "upgrade_tree")
+NUMBER_RE = re.compile(r"(\d+)")
+
+
+def content_hash(weapon: Dict[str, Any]) -> str:
+    content = {field: weapon.get(field) for field in BALANCE_FIELDS}
+    return hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def natural_key(name: str) -> List[Any]:
+    return [int(part) if part.isdigit() else part.lower() for part in NUMBER_RE.split(name)]
+
+
+def number(value: Any, default: float) -> float:
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else default
+
+
+def weapon_tiers(weapon: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Cumulative stats for the base weapon and each upgrade tier."""
+    profile = {name: number(value, 0.0) for name, value in (weapon.get("damage_profile") or {}).items()}
+    moves = [MOVES.get(str(move).lower(), DEFAULT_MOVE) for move in weapon.get("combo_path") or []] or [MOVES["light"]]
+    state = {
+        "tier": "base",
+        "damage": profile,
+        "speed": WEAPON_SPEED.get(str(weapon.get("weapon_type")), 1.0),
+        "crit_chance": BASE_CRIT_CHANCE,
+        "crit_multiplier": BASE_CRIT_MULTIPLIER,
+        "moves": moves,
+    }
+    tiers = [state]
+    tree = weapon.get("upgrade_tree") or {}
+    for name in sorted((name for name, upgrade in tree.items() if isinstance(upgrade, dict)), key=natural_key):
+        upgrade = tree[name]
+        damage = dict(state["damage"])
+        bonus = upgrade.get("damage_bonus")
+        if isinstance(bonus, dict):
+            for damage_type, value in bonus.items():
+                damage[damage_type] = damage.get(damage_type, 0.0) + number(value, 0.0)
+        else:
+            damage = {damage_type: value + number(bonus, 0.0) for damage_type, value in damage.items()}
+        multiplier = number(upgrade.get("damage_multiplier"), 1.0)
+        state = {
+            "tier": name,
+            "damage": {damage_type: value * multiplier for damage_type, value in damage.items()},
+            "speed": state["speed"] * number(upgrade.get("attack_speed"), 1.0),
+            "crit_chance": state["crit_chance"] + number(upgrade.get("crit_chance"), 0.0),
+            "crit_multiplier": state["crit_multiplier"] + number(upgrade.get("crit_multiplier"), 0.0),
+            "moves": moves,
+        }
+        tiers.append(state)
+    return tiers
+
+
+class TierArrays:
+    """Rows of weapon tiers laid out as dense arrays (rows x damage types / moves)."""
+
+    def __init__(self, tiers: Sequence[Dict[str, Any]]):
+        self.types = sorted({damage_type for tier in tiers for damage_type in tier["damage"]})
+        column = {damage_type: index for index, damage_type in enumerate(self.types)}
+        rows, length = len(tiers), max((len(tier["moves"]) for tier in tiers), default=1)
+        self.damage = np.zeros((rows, len(self.types)))
+        self.move_multiplier = np.zeros((rows, length))
+        self.move_time = np.zeros((rows, length))
+        for row, tier in enumerate(tiers):
+            for damage_type, value in tier["damage"].items():
+                self.damage[row, column[damage_type]] = value
+            multipliers, durations = zip(*tier["moves"])
+            self.move_multiplier[row, :len(multipliers)] = multipliers
+            self.move_time[row, :len(durations)] = durations
+        self.speed = np.clip(np.array([tier["speed"] for tier in tiers], dtype=np.float64), 1e-3, MAX_SPEED)
+        self.crit_chance = np.clip(np.array([tier["crit_chance"] for tier in tiers], dtype=np.float64), 0.0, 1.0)
+        self.crit_multiplier = np.maximum(np.array([tier["crit_multiplier"] for tier in tiers], dtype=np.float64), 1.0)
+        self.move_time = self.move_time / self.speed[:, None]
+
+
+def combo_loops(arrays: TierArrays, seconds: float) -> np.ndarray:
+    """Whole combo loops each row needs to cover ``seconds``."""
+    return np.maximum(np.ceil(seconds / arrays.move_time.sum(axis=1)), 1).astype(np.int64)
+
+
+def hit_windows(arrays: TierArrays, seconds: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-row hit multipliers of the combo looped until every row covers
+    ``seconds`` and a mask of the hits that start inside the window."""
+    loops = int(combo_loops(arrays, seconds).max())
+    multipliers = np.tile(arrays.move_multiplier, loops)
+    durations = np.tile(arrays.move_time, loops)
+    ends = np.cumsum(durations, axis=1)
+    return multipliers, (ends - durations < seconds) & (multipliers > 0)
+
+
+def expected(tiers: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Expected DPS, burst and per-type DPS for each tier row."""
+    if not tiers:
+        return []
+    arrays = TierArrays(tiers)
+    crit_factor = 1.0 + arrays.crit_chance * (arrays.crit_multiplier - 1.0)
+    combo_time = arrays.move_time.sum(axis=1)
+    hits_per_second = arrays.move_multiplier.sum(axis=1) / combo_time
+    dps_by_type = arrays.damage * (hits_per_second * crit_factor)[:, None]
+
+    multipliers, in_burst = hit_windows(arrays, BURST_SECONDS)
+    burst = (multipliers * in_burst).sum(axis=1) * arrays.damage.sum(axis=1) * crit_factor
+
+    return [
+        {
+            "tier": tier["tier"],
+            "dps": round(float(dps_by_type[row].sum()), 2),
+            "burst": round(float(burst[row]), 2),
+            "combo_seconds": round(float(combo_time[row]), 3),
+            "crit_chance": round(float(arrays.crit_chance[row]), 3),
+            "damage_types": {
+                damage_type: round(float(dps_by_type[row, column]), 2)
+                for column, damage_type in enumerate(arrays.types)
+                if arrays.damage[row, column]
+            },
+        }
+        for row, tier in enumerate(tiers)
+    ]
+
+
+def monte_carlo(tiers: Sequence[Dict[str, Any]], seeds: Sequence[int], iterations: int,
+                fight_seconds: float, variance: float) -> List[Dict[str, Any]]:
+    """Roll ``iterations`` fights per tier row; runs in a worker process.
+
+    A fight lasts the whole combo loops that cover ``fight_seconds``, so with
+    no variance the mean DPS converges on the expected mode (and matches it
+    exactly without crits). Each row has its own seed, so a row's result does
+    not depend on which chunk it was simulated in.
+    """
+    if not tiers:
+        return []
+    arrays = TierArrays(tiers)
+    _, in_burst = hit_windows(arrays, BURST_SECONDS)
+    fight_loops = combo_loops(arrays, fight_seconds)
+    loops = np.maximum(fight_loops, combo_loops(arrays, BURST_SECONDS))
+    combo_time = arrays.move_time.sum(axis=1)
+    total_damage = arrays.damage.sum(axis=1)
+    results = []
+    for row, seed in enumerate(seeds):
+        rng = np.random.default_rng(seed)
+        combo = arrays.move_multiplier[row][arrays.move_multiplier[row] > 0]
+        hits = np.tile(combo, int(loops[row]))
+        fight_hits = len(combo) * int(fight_loops[row])
+        burst_hits = int(in_burst[row].sum())
+        dps, burst, crit_count = [], [], 0
+        block = max(1, SAMPLE_BLOCK // max(len(hits), 1))
+        for start in range(0, iterations, block):
+            size = min(block, iterations - start)
+            crits = rng.random((size, len(hits))) < arrays.crit_chance[row]
+            rolls = np.clip(rng.normal(1.0, variance, (size, len(hits))), 0.0, None) if variance else 1.0
+            damage = hits * np.where(crits, arrays.crit_multiplier[row], 1.0) * rolls * total_damage[row]
+            dps.append(damage[:, :fight_hits].sum(axis=1) / (fight_loops[row] * combo_time[row]))
+            burst.append(damage[:, :burst_hits].sum(axis=1))
+            crit_count += int(crits[:, :fight_hits].sum())
+        dps, burst = np.concatenate(dps), np.concatenate(burst)
+        results.append({
+            "dps_mean": round(float(dps.mean()), 2),
+            "dps_p5": round(float(np.percentile(dps, 5)), 2),
+            "dps_p95": round(float(np.percentile(dps, 95)), 2),
+            "burst_mean": round(float(burst.mean()), 2),
+            "burst_p95": round(float(np.percentile(burst, 95)), 2),
+            "crit_rate": round(crit_count / (iterations * fight_hits), 3) if fight_hits else 0.0,
+        })
+    return results
+
+
+class ResultCache:
+    """Bounded LRU of per-weapon tier results keyed by (content hash, parameters)."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[Tuple[str, Tuple], List[Dict[str, Any]]]" = OrderedDict()
+
+    def get(self, key: Tuple[str, Tuple]) -> Optional[List[Dict[str, Any]]]:
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key: Tuple[str, Tuple], value: List[Dict[str, Any]]) -> None:
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
@@ -0,0 +1,65 @@
+"""Structural diffs between stored document revisions.
+
+A delta records the leaf paths that changed between two nested dicts:
+``{"set": [[path, value], ...], "unset": [path, ...]}`` where each path is a
+list of keys. Dicts are diffed recursively; any other value (lists included)
+is replaced whole. Paths are lists rather than dotted strings so keys that
+contain dots survive the round trip.
+"""
+import copy
+from typing import Any, Dict, List
+
+Delta = Dict[str, List[Any]]
+
+
+def compute_delta(old: Dict[str, Any], new: Dict[str, Any]) -> Delta:
+    delta: Delta = {"set": [], "unset": []}
+    _diff(old, new, [], delta)
+    return delta
+
+
+def _diff(old: Dict[str, Any], new: Dict[str, Any], path: List[str], delta: Delta) -> None:
+    for key, value in new.items():
+        if key not in old:
+            delta["set"].append([path + [key], value])
+        elif isinstance(value, dict) and isinstance(old[key], dict):
+            _diff(old[key], value, path + [key], delta)
+        elif not _same(old[key], value):
+            delta["set"].append([path + [key], value])
+    for key in old:
+        if key not in new:
+            delta["unset"].append(path + [key])
+
+
+def apply_delta(doc: Dict[str, Any], delta: Delta) -> Dict[str, Any]:
+    result = copy.deepcopy(doc)
+    for path in delta.get("unset", []):
+        parent = _walk(result, path[:-1])
+        parent.pop(path[-1], None)
+    for path, value in delta.get("set", []):
+        parent = _walk(result, path[:-1])
+        parent[path[-1]] = copy.deepcopy(value)
+    return result
+
+
+def changed_fields(delta: Delta) -> List[str]:
+    """Top-level fields touched by a delta, for history listings."""
+    fields = {path[0] for path, _ in delta.get("set", [])} | {path[0] for path in delta.get("unset", [])}
+    return sorted(fields)
+
+
+def _same(old: Any, new: Any) -> bool:
+    """Equality that also tells 1, 1.0 and True apart inside lists and dicts."""
+    if type(old) is not type(new):
+        return False
+    if isinstance(old, dict):
+        return old.keys() == new.keys() and all(_same(old[key], new[key]) for key in old)
+    if isinstance(old, list):
+        return len(old) == len(new) and all(_same(a, b) for a, b in zip(old, new))
+    return old == new
+
+
+def _walk(doc: Dict[str, Any], path: List[str]) -> Dict[str, Any]:
+    for key in path:
+        doc = doc.setdefault(key, {})
+    return doc
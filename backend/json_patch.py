@@ -0,0 +1,244 @@
+"""Translate partial document edits into targeted MongoDB update operators.
+
+Two input forms are accepted:
+
+* RFC 6902 operations: ``[{"op": "replace", "path": "/content/overview", "value": ...}]``.
+  ``add``/``replace`` become ``$set``; ``add`` to ``/array/-`` or ``/array/<n>``
+  becomes ``$push`` (with ``$position`` for an index, guarded by a condition
+  that the array is long enough); ``remove`` becomes ``$unset`` and ``test``
+  becomes a filter condition. ``move``/``copy`` and index-based removal are
+  rejected, because they cannot be expressed as a single targeted update.
+  ``test`` values may not contain objects: MongoDB compares embedded
+  documents field by field in stored order, unlike RFC 6902.
+* Dotted field paths: ``{"set": {"content.overview": ...}, "unset": ["content.old"]}``.
+
+A numeric last token is an array index only if the stored document holds an
+array at its parent; under an object it is an ordinary key. Callers pass the
+stored values of the roots named by ``indexed_roots`` and the choice is pinned
+with a ``$type`` condition, so an update racing a change of the parent's type
+fails instead of being applied the other way.
+
+Both are reduced to a list of ``(operator, path, value)`` steps that can be
+turned into an update document or replayed onto an in-memory copy.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+Step = Tuple[str, List[str], Any]
+
+
+class PatchError(ValueError):
+    pass
+
+
+def parse_pointer(pointer: str) -> List[str]:
+    if not pointer.startswith("/"):
+        raise PatchError(f"Invalid JSON pointer: {pointer!r}")
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+
+def indexed_roots(patch: Any) -> Set[str]:
+    """Roots of the paths ending in a numeric token, whose stored values
+    ``parse_patch`` needs to tell array indexes from object keys."""
+    if isinstance(patch, list):
+        pointers = [operation.get("path") for operation in patch if isinstance(operation, dict)]
+        paths = [parse_pointer(pointer) for pointer in pointers if isinstance(pointer, str) and pointer.startswith("/")]
+    elif isinstance(patch, dict):
+        fields = [*(patch.get("set") or {}), *(patch.get("unset") or [])]
+        paths = [field.split(".") for field in fields if isinstance(field, str)]
+    else:
+        return set()
+    return {path[0] for path in paths if len(path) > 1 and path[-1].isdigit()}
+
+
+def parse_patch(
+    patch: Union[List[Dict[str, Any]], Dict[str, Any]],
+    editable_roots: Iterable[str],
+    stored: Optional[Dict[str, Any]] = None,
+) -> Tuple[List[Step], Dict[str, Any]]:
+    """Return (steps, conditions) for either supported patch form.
+
+    ``stored`` holds at least the roots named by ``indexed_roots(patch)``;
+    without it every numeric token is read as an object key.
+    """
+    steps: List[Step] = []
+    conditions: Dict[str, Any] = {}
+    stored = stored or {}
+    if isinstance(patch, list):
+        for operation in patch:
+            if not isinstance(operation, dict) or "op" not in operation or "path" not in operation:
+                raise PatchError("Each operation needs 'op' and 'path'")
+            op, path = operation["op"], parse_pointer(operation["path"])
+            if op in ("add", "replace") and "value" not in operation:
+                raise PatchError(f"'{op}' at {operation['path']} needs a value")
+            if op == "add" and (path[-1] == "-" or path[-1].isdigit() and is_array(stored, path[:-1])):
+                steps.append(("$push", path, operation["value"]))
+                for field, condition in insert_conditions(path).items():
+                    add_condition(conditions, field, condition)
+            elif op in ("add", "replace"):
+                steps.append(("$set", path, operation["value"]))
+            elif op == "remove":
+                steps.append(("$unset", path, None))
+            elif op == "test":
+                validate_path(path, editable_roots)
+                add_condition(conditions, dotted(path), test_condition(operation.get("value")))
+            else:
+                raise PatchError(f"Unsupported operation: {op}")
+    elif isinstance(patch, dict):
+        for field, value in (patch.get("set") or {}).items():
+            steps.append(("$set", field.split("."), value))
+        for field in patch.get("unset") or []:
+            steps.append(("$unset", field.split("."), None))
+    else:
+        raise PatchError("Patch must be a list of operations or a set/unset object")
+
+    if not steps:
+        raise PatchError("Patch contains no changes")
+    for op, path, _ in steps:
+        validate_path(path, editable_roots)
+        if op == "$unset" and (len(path) == 1 or path[-1].isdigit() and is_array(stored, path[:-1])):
+            raise PatchError(f"Cannot remove /{'/'.join(path)}; replace its parent instead")
+        if op != "$push" and path[-1].isdigit() and len(path) > 1:
+            parent_type = {"$type": "array"} if is_array(stored, path[:-1]) else {"$not": {"$type": "array"}}
+            add_condition(conditions, dotted(path[:-1]), parent_type)
+    check_conflicts([dotted(path[:-1] if op == "$push" else path) for op, path, _ in steps])
+    return steps, conditions
+
+
+def insert_conditions(path: List[str]) -> Dict[str, Any]:
+    """Inserting at index n needs an array with at least n elements."""
+    if path[-1] == "-":
+        return {}
+    conditions = {dotted(path[:-1]): {"$type": "array"}}
+    index = int(path[-1])
+    if index:
+        conditions[dotted(path[:-1] + [str(index - 1)])] = {"$exists": True}
+    return conditions
+
+
+def add_condition(conditions: Dict[str, Any], field: str, condition: Any) -> None:
+    """Add a filter condition, keeping any other one already set on the field."""
+    if field not in conditions:
+        conditions[field] = condition
+    elif conditions[field] != condition:
+        conditions.setdefault("$and", []).append({field: condition})
+
+
+def is_array(doc: Dict[str, Any], path: List[str]) -> bool:
+    value: Any = doc
+    for token in path:
+        if isinstance(value, dict):
+            value = value.get(token)
+        elif isinstance(value, list) and token.isdigit() and int(token) < len(value):
+            value = value[int(token)]
+        else:
+            return False
+    return isinstance(value, list)
+
+
+def test_condition(value: Any) -> Any:
+    if contains_object(value):
+        raise PatchError("'test' does not support object values; test their fields instead")
+    if value is None:
+        return {"$type": "null"}
+    if isinstance(value, list):
+        return value
+    # A plain equality would also match an array that contains the value
+    return {"$eq": value, "$not": {"$type": "array"}}
+
+
+def contains_object(value: Any) -> bool:
+    if isinstance(value, dict):
+        return True
+    return isinstance(value, list) and any(contains_object(item) for item in value)
+
+
+def validate_path(path: List[str], editable_roots: Iterable[str]) -> None:
+    if path[0] not in editable_roots:
+        raise PatchError(f"Field is not editable: {path[0]}")
+    if any(not token or "." in token or token.startswith("$") for token in path):
+        raise PatchError(f"Invalid path: /{'/'.join(path)}")
+
+
+def dotted(path: List[str]) -> str:
+    return ".".join(path)
+
+
+def check_conflicts(paths: List[str]) -> None:
+    ordered = sorted(paths)
+    for current, following in zip(ordered, ordered[1:]):
+        if following == current or following.startswith(current + "."):
+            raise PatchError(f"Conflicting paths: {current} and {following}")
+
+
+def to_update(steps: List[Step]) -> Dict[str, Dict[str, Any]]:
+    update: Dict[str, Dict[str, Any]] = {}
+    for op, path, value in steps:
+        if op == "$push":
+            # Always $each, so a pushed value is never read as a modifier
+            push = {"$each": [value]}
+            if path[-1] != "-":
+                push["$position"] = int(path[-1])
+            update.setdefault(op, {})[dotted(path[:-1])] = push
+        else:
+            update.setdefault(op, {})[dotted(path)] = "" if op == "$unset" else value
+    return update
+
+
+def apply_steps(doc: Dict[str, Any], steps: List[Step]) -> Dict[str, Any]:
+    """Mirror the MongoDB semantics of the steps on a local document."""
+    for op, path, value in steps:
+        position = path[-1] if op == "$push" else None
+        if op == "$push":
+            path = path[:-1]
+        parent: Any = doc
+        for token in path[:-1]:
+            parent = _child(parent, token, create=op != "$unset")
+            if parent is None:
+                break
+        if parent is None:
+            continue
+        key = path[-1]
+        if op == "$unset":
+            if isinstance(parent, dict):
+                parent.pop(key, None)
+        elif op == "$push":
+            target = _child(parent, key, create=True, default=list)
+            if not isinstance(target, list):
+                raise PatchError(f"Cannot append to non-array /{'/'.join(path)}")
+            target.insert(len(target) if position == "-" else int(position), value)
+        else:
+            _assign(parent, key, value)
+    return doc
+
+
+def _child(parent: Any, token: str, create: bool, default=dict) -> Optional[Any]:
+    if isinstance(parent, list):
+        if not token.isdigit():
+            raise PatchError(f"Invalid array index: {token}")
+        index = int(token)
+        if index >= len(parent):
+            if not create:
+                return None
+            parent.extend([None] * (index + 1 - len(parent)))
+        if parent[index] is None and create:
+            parent[index] = default()
+        return parent[index]
+    if isinstance(parent, dict):
+        if token not in parent or parent[token] is None:
+            if not create:
+                return None
+            parent[token] = default()
+        return parent[token]
+    raise PatchError(f"Cannot traverse into a scalar at {token}")
+
+
+def _assign(parent: Any, key: str, value: Any) -> None:
+    if isinstance(parent, list):
+        if not key.isdigit():
+            raise PatchError(f"Invalid array index: {key}")
+        index = int(key)
+        if index >= len(parent):
+            parent.extend([None] * (index + 1 - len(parent)))
+        parent[index] = value
+    else:
+        parent[key] = value
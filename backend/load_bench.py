@@ -0,0 +1,610 @@
+"""Seeded load and latency benchmark for the MythRealms API.
+
+Three commands:
+
+* ``seed`` writes a synthetic project of a given scale (``1k``, ``100k``,
+  ``1m`` or any entity count) straight into MongoDB. Generation is driven by
+  ``--seed``, so the same scale and seed always produce the same data.
+* ``run`` drives concurrent, weighted load against every route, either
+  in-process through the ASGI app (the default) or against a running server
+  with ``--base-url``. It writes a JSON report with per-route throughput,
+  p50/p95/p99 latency, status codes and cache hit ratio.
+* ``compare`` diffs two reports and can fail when a route regresses.
+
+Seeding and in-process runs use a separate database (``--db-name``, default
+``mythrealms_bench``) so the development data is never touched.
+``POST /api/snapshot/restore`` is never exercised because it overwrites the
+database; ``GET /api/snapshot`` streams the whole project and has weight 0
+unless enabled with ``--weight snapshot.export=0.2``.
+
+    python load_bench.py seed --scale 100k --drop
+    python load_bench.py run --concurrency 32 --duration 60 --output base.json
+    python load_bench.py compare base.json new.json --fail-over 10
+"""
+import asyncio
+import functools
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+import wave
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+import numpy as np
+import typer
+from dotenv import load_dotenv
+from PIL import Image
+
+REPORT_VERSION = 1
+SEED_BATCH_SIZE = 5000
+SAMPLE_IDS = 500
+MAX_TRACKED_IDS = 5000
+SCALE_SUFFIXES = {"k": 1_000, "m": 1_000_000}
+
+# Share of the seeded entities per collection
+SEED_MIX = {
+    "documents": 0.15,
+    "characters": 0.30,
+    "weapons": 0.20,
+    "quests": 0.20,
+    "music_tracks": 0.10,
+    "assets": 0.05,
+}
+
+DOCUMENT_TYPES = ["gdd", "concept_art", "character_design", "weapon_sheet", "music_system", "dialogue"]
+EMOTIONS = ["joy", "calm", "fear", "rage", "sorrow"]
+CHARACTER_TYPES = ["hero", "npc", "enemy", "boss"]
+QUEST_TYPES = ["main", "side", "puzzle", "combat"]
+MOODS = ["exploration", "combat", "meditation"]
+KEYS = ["C major", "A minor", "D minor", "G major", "E minor", "F major"]
+INSTRUMENTS = ["strings", "flute", "taiko", "harp", "choir", "synth", "bansuri", "sitar"]
+SYLLABLES = ["ka", "ra", "mi", "to", "shi", "va", "lu", "na", "dre", "or", "eth", "gal", "sun", "mor", "ith", "zen"]
+
+cli = typer.Typer(help="Seed synthetic realms and benchmark the MythRealms API.")
+
+
+def parse_scale(scale: str) -> int:
+    value = scale.strip().lower()
+    if value[-1:] in SCALE_SUFFIXES:
+        return int(float(value[:-1]) * SCALE_SUFFIXES[value[-1]])
+    return int(value)
+
+
+def vocabulary(rng: random.Random, size: int = 400) -> List[str]:
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def phrase(rng: random.Random, words: List[str], length: int) -> str:
+    return " ".join(rng.choice(words) for _ in range(length))
+
+
+# Synthetic payloads, shaped like the *Create models
+def synthetic_document(rng: random.Random, words: List[str]) -> Dict[str, Any]:
+    return {
+        "title": phrase(rng, words, 3).title(),
+        "document_type": rng.choice(DOCUMENT_TYPES),
+        "content": {
+            "overview": phrase(rng, words, 60),
+            "sections": [{"heading": phrase(rng, words, 2), "body": phrase(rng, words, 40)} for _ in range(rng.randint(1, 5))],
+        },
+        "tags": rng.sample(words, 3),
+    }
+
+
+def synthetic_character(rng: random.Random, words: List[str]) -> Dict[str, Any]:
+    return {
+        "name": phrase(rng, words, 2).title(),
+        "description": phrase(rng, words, 30),
+        "realm": rng.choice(realms()),
+        "character_type": rng.choice(CHARACTER_TYPES),
+        "emotions": {emotion: phrase(rng, words, 4) for emotion in rng.sample(EMOTIONS, 3)},
+        "stats": {"health": rng.randint(50, 500), "attack": rng.randint(1, 60), "defense": rng.randint(1, 60)},
+    }
+
+
+def synthetic_weapon(rng: random.Random, words: List[str]) -> Dict[str, Any]:
+    return {
+        "name": phrase(rng, words, 2).title(),
+        "weapon_type": rng.choice(weapon_types()),
+        "lore": phrase(rng, words, 40),
+        "damage_profile": {"physical": rng.randint(0, 100), "spirit": rng.randint(0, 100), "fire": rng.randint(0, 50)},
+        "combo_path": [rng.choice(["light", "heavy", "ability"]) for _ in range(rng.randint(2, 5))],
+    }
+
+
+def synthetic_quest(rng: random.Random, words: List[str]) -> Dict[str, Any]:
+    return {
+        "title": phrase(rng, words, 3).title(),
+        "description": phrase(rng, words, 35),
+        "realm": rng.choice(realms()),
+        "quest_type": rng.choice(QUEST_TYPES),
+        "objectives": [phrase(rng, words, 5) for _ in range(rng.randint(1, 6))],
+    }
+
+
+def synthetic_music(rng: random.Random, words: List[str]) -> Dict[str, Any]:
+    return {
+        "name": phrase(rng, words, 2).title(),
+        "realm": rng.choice(realms()),
+        "mood": rng.choice(MOODS),
+        "tempo": rng.randint(60, 180),
+        "key": rng.choice(KEYS),
+        "instrumentation": rng.sample(INSTRUMENTS, 3),
+    }
+
+
+def synthetic_asset(rng: random.Random, words: List[str]) -> Dict[str, Any]:
+    category = rng.choice(["image", "audio"])
+    extension, file_type = (".png", "image/png") if category == "image" else (".wav", "audio/wav")
+    return {
+        "name": phrase(rng, words, 2).replace(" ", "_") + extension,
+        "file_path": f"uploads/bench/{rng.getrandbits(64):016x}{extension}",
+        "file_type": file_type,
+        "category": category,
+        "tags": rng.sample(words, 2),
+        "size": rng.randint(10_000, 5_000_000),
+    }
+
+
+def upload_image(rng: random.Random) -> bytes:
+    image = Image.frombytes("RGB", (64, 64), rng.randbytes(64 * 64 * 3))
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def upload_wav(rng: random.Random, seconds: float = 0.5, rate: int = 22050) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(rng.randbytes(int(seconds * rate) * 2))
+    return buffer.getvalue()
+
+
+def load_app(db_name: str):
+    """Import the app against the benchmark database."""
+    load_dotenv(Path(__file__).parent / ".env")
+    os.environ["DB_NAME"] = db_name
+    import server
+    return server
+
+
+# Realm and weapon type values come from the API models. ``server`` binds its
+# database on import, so it is imported only after ``load_app`` has pointed it
+# at the benchmark database (runs against --base-url import it as configured).
+@functools.lru_cache(maxsize=None)
+def realms() -> List[str]:
+    import server
+    return [realm.value for realm in server.RealmType]
+
+
+@functools.lru_cache(maxsize=None)
+def weapon_types() -> List[str]:
+    import server
+    return [weapon_type.value for weapon_type in server.WeaponType]
+
+
+# Seeding
+@cli.command()
+def seed(
+    scale: str = typer.Option("1k", help="Total entities: 1k, 100k, 1m or a plain number."),
+    seed_value: int = typer.Option(1, "--seed", help="Random seed; the same seed reproduces the same data."),
+    db_name: str = typer.Option("mythrealms_bench", help="Database to seed."),
+    drop: bool = typer.Option(False, "--drop", help="Drop the database first."),
+):
+    server = load_app(db_name)
+    total = parse_scale(scale)
+    models = {
+        "documents": (server.BaseDocument, synthetic_document),
+        "characters": (server.Character, synthetic_character),
+        "weapons": (server.Weapon, synthetic_weapon),
+        "quests": (server.Quest, synthetic_quest),
+        "music_tracks": (server.MusicTrack, synthetic_music),
+        "assets": (server.Asset, synthetic_asset),
+    }
+
+    async def run():
+        if drop:
+            await server.client.drop_database(db_name)
+        await server.ensure_indexes()
+        rng = random.Random(seed_value)
+        words = vocabulary(rng)
+        now = datetime.utcnow()
+        counts = {}
+        started = time.perf_counter()
+        for name, share in SEED_MIX.items():
+            model, factory = models[name]
+            count = int(total * share)
+            batch = []
+            for i in range(count):
+                doc = model(**factory(rng, words)).dict()
+                doc["created_at"] = now - timedelta(seconds=rng.randint(0, 365 * 86400))
+                if "updated_at" in doc:
+                    doc["updated_at"] = doc["created_at"]
+                batch.append(doc)
+                if len(batch) >= SEED_BATCH_SIZE:
+                    await server.db[name].insert_many(batch, ordered=False)
+                    batch = []
+            if batch:
+                await server.db[name].insert_many(batch, ordered=False)
+            counts[name] = count
+        await server.reconcile_stats()
+        return {"db_name": db_name, "scale": total, "seed": seed_value, "counts": counts,
+                "seconds": round(time.perf_counter() - started, 2)}
+
+    typer.echo(json.dumps(asyncio.run(run()), indent=2))
+
+
+# Load generation
+@dataclass
+class Operation:
+    name: str
+    weight: float
+    call: Callable[["LoadContext", random.Random], Awaitable[httpx.Response]]
+
+
+class LoadContext:
+    """Shared state for one run: HTTP client, known ids and page cursors."""
+
+    def __init__(self, client: httpx.AsyncClient, words: List[str]):
+        self.client = client
+        self.words = words
+        self.ids: Dict[str, List[str]] = {}
+        self.uploaded: List[str] = []
+        self.cursors: Dict[str, str] = {}
+
+    def pick(self, kind: str, rng: random.Random) -> Optional[str]:
+        ids = self.ids.get(kind)
+        return rng.choice(ids) if ids else None
+
+    def remember(self, kind: str, response: httpx.Response) -> httpx.Response:
+        if response.status_code == 200:
+            ids = self.ids.setdefault(kind, [])
+            ids.append(response.json()["id"])
+            if len(ids) > MAX_TRACKED_IDS:
+                del ids[: len(ids) - MAX_TRACKED_IDS]
+        return response
+
+    async def load_ids(self) -> None:
+        for kind in ("documents", "characters", "weapons", "quests", "music", "assets"):
+            response = await self.client.get(f"/api/{kind}", params={"limit": SAMPLE_IDS, "fields": "id"})
+            response.raise_for_status()
+            self.ids[kind] = [row["id"] for row in response.json()]
+
+    async def list_page(self, kind: str, rng: random.Random, params: Dict[str, Any]) -> httpx.Response:
+        if kind in self.cursors and rng.random() < 0.5:
+            params = {**params, "cursor": self.cursors.pop(kind)}
+        response = await self.client.get(f"/api/{kind}", params={"limit": 50, **params})
+        if response.headers.get("x-next-cursor"):
+            self.cursors[kind] = response.headers["x-next-cursor"]
+        return response
+
+
+def get_by_id(path: str, kind: str):
+    async def call(ctx: LoadContext, rng: random.Random) -> httpx.Response:
+        return await ctx.client.get(path.format(id=ctx.pick(kind, rng) or "missing"))
+    return call
+
+
+def create(kind: str, factory):
+    async def call(ctx: LoadContext, rng: random.Random) -> httpx.Response:
+        return ctx.remember(kind, await ctx.client.post(f"/api/{kind}", json=factory(rng, ctx.words)))
+    return call
+
+
+def list_route(kind: str, filters: Callable[[random.Random], Dict[str, Any]] = lambda rng: {}):
+    async def call(ctx: LoadContext, rng: random.Random) -> httpx.Response:
+        return await ctx.list_page(kind, rng, filters(rng))
+    return call
+
+
+async def update_document(ctx: LoadContext, rng: random.Random) -> httpx.Response:
+    document_id = ctx.pick("documents", rng) or "missing"
+    return await ctx.client.put(f"/api/documents/{document_id}", json={"tags": rng.sample(ctx.words, 3)})
+
+
+async def patch_document(ctx: LoadContext, rng: random.Random) -> httpx.Response:
+    document_id = ctx.pick("documents", rng) or "missing"
+    patch = [{"op": "replace", "path": "/content/overview", "value": phrase(rng, ctx.words, 40)}]
+    return await ctx.client.patch(f"/api/documents/{document_id}", json=patch)
+
+
+async def document_version(ctx: LoadContext, rng: random.Random) -> httpx.Response:
+    return await ctx.client.get(f"/api/documents/{ctx.pick('documents', rng) or 'missing'}/versions/1")
+
+
+async def upload_asset(ctx: LoadContext, rng: random.Random) -> httpx.Response:
+    if rng.random() < 0.5:
+        upload = ("bench.png", upload_image(rng), "image/png")
+        category = "image"
+    else:
+        upload = ("bench.wav", upload_wav(rng), "audio/wav")
+        category = "audio"
+    response = await ctx.client.post("/api/assets", files={"file": upload}, data={
+        "name": upload[0], "category": category, "tags": json.dumps(rng.sample(ctx.words, 2)),
+    })
+    if response.status_code == 200:
+        ctx.uploaded.append(response.json()["id"])
+    return ctx.remember("assets", response)
+
+
+async def delete_asset(ctx: LoadContext, rng: random.Random) -> httpx.Response:
+    asset_id = ctx.uploaded.pop(rng.randrange(len(ctx.uploaded))) if ctx.uploaded else "missing"
+    return await ctx.client.delete(f"/api/assets/{asset_id}")
+
+
+async def bulk_characters(ctx: LoadContext, rng: random.Random) -> httpx.Response:
+    body = b"".join(json.dumps(synthetic_character(rng, ctx.words)).encode() + b"\n" for _ in range(50))
+    return await ctx.client.post("/api/characters/bulk", content=body, headers={"content-type": "application/x-ndjson"})
+
+
+async def search(ctx: LoadContext, rng: random.Random) -> httpx.Response:
+    query = phrase(rng, ctx.words, rng.randint(1, 2))
+    return await ctx.client.get("/api/search", params={"query": query, "limit": 20})
+
+
+async def autocomplete(ctx: LoadContext, rng: random.Random) -> httpx.Response:
+    word = rng.choice(ctx.words)
+    return await ctx.client.get("/api/autocomplete", params={"q": word[:rng.randint(1, len(word))]})
+
+
+async def transition_matrix(ctx: LoadContext, rng: random.Random) -> httpx.Response:
+    return await ctx.client.get(f"/api/music/transitions/{rng.choice(realms())}")
+
+
+async def related(ctx: LoadContext, rng: random.Random) -> httpx.Response:
+    kind, related_type = rng.choice([("documents", "document"), ("characters", "character"), ("weapons", "weapon"), ("quests", "quest")])
+    return await ctx.client.get(f"/api/related/{related_type}/{ctx.pick(kind, rng) or 'missing'}", params={"k": 10})
+
+
+async def export_snapshot(ctx: LoadContext, rng: random.Random) -> httpx.Response:
+    return await ctx.client.get("/api/snapshot", params={"gzip": "true"})
+
+
+def simple_get(path: str, params: Optional[Dict[str, Any]] = None):
+    async def call(ctx: LoadContext, rng: random.Random) -> httpx.Response:
+        return await ctx.client.get(path, params=params)
+    return call
+
+
+def simple_post(path: str):
+    async def call(ctx: LoadContext, rng: random.Random) -> httpx.Response:
+        return await ctx.client.post(path)
+    return call
+
+
+OPERATIONS = [
+    Operation("documents.list", 6, list_route("documents", lambda rng: {"document_type": rng.choice(DOCUMENT_TYPES)} if rng.random() < 0.5 else {})),
+    Operation("documents.list_fields", 4, list_route("documents", lambda rng: {"fields": "title,document_type,tags,version,updated_at"})),
+    Operation("documents.get", 6, get_by_id("/api/documents/{id}", "documents")),
+    Operation("documents.create", 2, create("documents", synthetic_document)),
+    Operation("documents.update", 2, update_document),
+    Operation("documents.patch", 2, patch_document),
+    Operation("documents.versions", 1, get_by_id("/api/documents/{id}/versions", "documents")),
+    Operation("documents.version", 1, document_version),
+    Operation("characters.list", 6, list_route("characters", lambda rng: {"realm": rng.choice(realms())} if rng.random() < 0.5 else {})),
+    Operation("characters.get", 5, get_by_id("/api/characters/{id}", "characters")),
+    Operation("characters.create", 2, create("characters", synthetic_character)),
+    Operation("characters.bulk", 0.5, bulk_characters),
+    Operation("weapons.list", 4, list_route("weapons", lambda rng: {"weapon_type": rng.choice(weapon_types())} if rng.random() < 0.5 else {})),
+    Operation("weapons.create", 1, create("weapons", synthetic_weapon)),
+    Operation("weapons.balance", 0.5, simple_get("/api/weapons/balance", {"weapon_type": "sword"})),
+    Operation("quests.list", 4, list_route("quests", lambda rng: {"realm": rng.choice(realms())} if rng.random() < 0.5 else {})),
+    Operation("quests.create", 1, create("quests", synthetic_quest)),
+    Operation("quests.list_expand", 2, list_route("quests", lambda rng: {"expand": "npcs_involved,assets"})),
+    Operation("music.list", 3, list_route("music", lambda rng: {"realm": rng.choice(realms())} if rng.random() < 0.5 else {})),
+    Operation("music.create", 1, create("music", synthetic_music)),
+    Operation("music.transitions", 2, get_by_id("/api/music/{id}/transitions", "music")),
+    Operation("music.transition_matrix", 0.5, transition_matrix),
+    Operation("assets.list", 3, list_route("assets", lambda rng: {"category": rng.choice(["image", "audio"])} if rng.random() < 0.5 else {})),
+    Operation("assets.upload", 1, upload_asset),
+    Operation("assets.derivatives", 1, get_by_id("/api/assets/{id}/derivatives", "assets")),
+    Operation("assets.delete", 0.5, delete_asset),
+    Operation("assets.gc", 0.05, simple_post("/api/assets/gc")),
+    Operation("search", 6, search),
+    Operation("autocomplete", 6, autocomplete),
+    Operation("related", 3, related),
+    Operation("dashboard.stats", 3, simple_get("/api/dashboard/stats")),
+    Operation("home", 3, simple_get("/api/home", {"limit": 5, "activity": 10})),
+    Operation("snapshot.export", 0, export_snapshot),
+]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.statuses: Dict[str, Dict[str, int]] = {}
+        self.cache_hits: Dict[str, int] = {}
+
+    def add(self, name: str, seconds: float, status: int, cache: Optional[str]) -> None:
+        self.latencies.setdefault(name, []).append(seconds)
+        statuses = self.statuses.setdefault(name, {})
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+        if cache == "HIT":
+            self.cache_hits[name] = self.cache_hits.get(name, 0) + 1
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        routes = {name: route_summary(samples, self.statuses[name], self.cache_hits.get(name, 0), elapsed)
+                  for name, samples in sorted(self.latencies.items())}
+        all_samples = [sample for samples in self.latencies.values() for sample in samples]
+        all_statuses: Dict[str, int] = {}
+        for statuses in self.statuses.values():
+            for status, count in statuses.items():
+                all_statuses[status] = all_statuses.get(status, 0) + count
+        return {"totals": route_summary(all_samples, all_statuses, sum(self.cache_hits.values()), elapsed), "routes": routes}
+
+
+def route_summary(samples: List[float], statuses: Dict[str, int], cache_hits: int, elapsed: float) -> Dict[str, Any]:
+    latencies = np.array(samples) * 1000
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if len(latencies) else (0.0, 0.0, 0.0)
+    return {
+        "requests": len(samples),
+        "errors": sum(count for status, count in statuses.items() if status == "0" or int(status) >= 400),
+        "statuses": statuses,
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "cache_hit_ratio": round(cache_hits / len(samples), 3) if samples else 0.0,
+        "latency_ms": {
+            "p50": round(float(p50), 3),
+            "p95": round(float(p95), 3),
+            "p99": round(float(p99), 3),
+            "mean": round(float(latencies.mean()), 3) if len(latencies) else 0.0,
+            "max": round(float(latencies.max()), 3) if len(latencies) else 0.0,
+        },
+    }
+
+
+def parse_weights(overrides: List[str]) -> Dict[str, float]:
+    weights = {operation.name: operation.weight for operation in OPERATIONS}
+    for override in overrides:
+        name, _, value = override.partition("=")
+        if name not in weights:
+            raise typer.BadParameter(f"Unknown operation: {name}")
+        weights[name] = float(value)
+    return weights
+
+
+async def drive(ctx: LoadContext, weights: Dict[str, float], concurrency: int, duration: float,
+                warmup: float, seed_value: int) -> Dict[str, Any]:
+    operations = [operation for operation in OPERATIONS if weights[operation.name] > 0]
+    cumulative = np.cumsum([weights[operation.name] for operation in operations]).tolist()
+    recorder = Recorder()
+    start = time.perf_counter()
+    measure_from = start + warmup
+    deadline = measure_from + duration
+
+    async def worker(index: int):
+        rng = random.Random(seed_value * 1000 + index)
+        while (now := time.perf_counter()) < deadline:
+            operation = rng.choices(operations, cum_weights=cumulative)[0]
+            try:
+                response = await operation.call(ctx, rng)
+                status, cache = response.status_code, response.headers.get("x-cache")
+            except httpx.HTTPError:
+                status, cache = 0, None
+            if now >= measure_from:
+                recorder.add(operation.name, time.perf_counter() - now, status, cache)
+
+    await asyncio.gather(*[worker(index) for index in range(concurrency)])
+    return recorder.summary(time.perf_counter() - measure_from)
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@cli.command()
+def run(
+    concurrency: int = typer.Option(16, help="Concurrent virtual clients."),
+    duration: float = typer.Option(30.0, help="Measured seconds."),
+    warmup: float = typer.Option(5.0, help="Unmeasured seconds before measuring."),
+    seed_value: int = typer.Option(1, "--seed", help="Random seed for the request mix."),
+    base_url: Optional[str] = typer.Option(None, help="Benchmark a running server instead of the in-process app."),
+    db_name: str = typer.Option("mythrealms_bench", help="Database for the in-process app."),
+    weight: List[str] = typer.Option([], help="Override an operation weight, e.g. search=10 or snapshot.export=0.2."),
+    output: Optional[Path] = typer.Option(None, help="Write the JSON report here instead of stdout."),
+):
+    weights = parse_weights(weight)
+
+    async def execute():
+        server = None
+        startup_seconds = None
+        if base_url:
+            client = httpx.AsyncClient(base_url=base_url, timeout=60)
+        else:
+            server = load_app(db_name)
+            started = time.perf_counter()
+            await server.app.router.startup()
+            startup_seconds = round(time.perf_counter() - started, 3)
+            client = httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://bench", timeout=60)
+        try:
+            ctx = LoadContext(client, vocabulary(random.Random(seed_value)))
+            await ctx.load_ids()
+            seeded = {kind: len(ids) for kind, ids in ctx.ids.items()}
+            summary = await drive(ctx, weights, concurrency, duration, warmup, seed_value)
+            stats = (await client.get("/api/dashboard/stats")).json()
+        finally:
+            await client.aclose()
+            if server is not None:
+                await server.app.router.shutdown()
+        return {
+            "version": REPORT_VERSION,
+            "meta": {
+                "created_at": datetime.utcnow().isoformat(),
+                "git_revision": git_revision(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "target": base_url or "in-process",
+                "db_name": None if base_url else db_name,
+                "concurrency": concurrency,
+                "duration_s": duration,
+                "warmup_s": warmup,
+                "seed": seed_value,
+                "weights": weights,
+                "startup_s": startup_seconds,
+                "sampled_ids": seeded,
+                "entity_counts": {key: value for key, value in stats.items() if isinstance(value, int)},
+            },
+            **summary,
+        }
+
+    report = json.dumps(asyncio.run(execute()), indent=2)
+    if output:
+        output.write_text(report + "\n")
+    else:
+        typer.echo(report)
+
+
+# Comparing reports
+def percent_change(before: float, after: float) -> Optional[float]:
+    return round((after - before) / before * 100, 1) if before else None
+
+
+@cli.command()
+def compare(
+    baseline: Path,
+    candidate: Path,
+    fail_over: Optional[float] = typer.Option(None, help="Exit 1 if any route's p95 grows by more than this percent."),
+    as_json: bool = typer.Option(False, "--json", help="Print machine-readable results."),
+):
+    before, after = json.loads(baseline.read_text()), json.loads(candidate.read_text())
+    rows = {}
+    for name in sorted(set(before["routes"]) & set(after["routes"])):
+        old, new = before["routes"][name], after["routes"][name]
+        rows[name] = {
+            "throughput_pct": percent_change(old["throughput_rps"], new["throughput_rps"]),
+            **{f"{key}_pct": percent_change(old["latency_ms"][key], new["latency_ms"][key]) for key in ("p50", "p95", "p99")},
+            "errors": [old["errors"], new["errors"]],
+        }
+    regressions = [name for name, row in rows.items()
+                   if fail_over is not None and row["p95_pct"] is not None and row["p95_pct"] > fail_over]
+
+    if as_json:
+        typer.echo(json.dumps({"routes": rows, "regressions": regressions}, indent=2))
+    else:
+        typer.echo(f"{'route':<26}{'rps %':>9}{'p50 %':>9}{'p95 %':>9}{'p99 %':>9}  errors")
+        for name, row in rows.items():
+            cells = [row[key] for key in ("throughput_pct", "p50_pct", "p95_pct", "p99_pct")]
+            typer.echo(f"{name:<26}" + "".join(f"{'-' if cell is None else cell:>9}" for cell in cells)
+                       + f"  {row['errors'][0]} -> {row['errors'][1]}")
+    if regressions:
+        raise typer.Exit(1)
+
+
+if __name__ == "__main__":
+    cli()
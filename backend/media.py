@@ -0,0 +1,311 @@
+"""CPU-bound media processing for uploaded assets.
+
+Everything here runs inside a process pool, so functions take and return
+plain picklable values (paths, numbers, lists) and never touch the database.
+"""
+import json
+import math
+import wave
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image, ImageOps
+
+WAV_CHUNK_FRAMES = 65536
+WAVEFORM_BUCKETS = 1024
+ONSET_FRAME = 1024
+ONSET_HOP = 512
+TEMPO_RANGE = (50.0, 220.0)
+PREFERRED_TEMPO_RANGE = (80.0, 160.0)
+TEMPO_PRIOR_BPM = 120.0
+ONSET_MEDIAN_SECONDS = 1.0
+ONSET_BLOCK_FRAMES = 2048
+ONSET_SPREAD_FLOOR = 0.01  # of the spectral level
+MIN_ONSET_STRENGTH = 8.0  # z-score; steady tones and noise stay well below this
+MIN_TEMPO_CONFIDENCE = 0.3
+OCTAVE_SUPPORT = 0.5
+LOUDNESS_SEGMENT_SECONDS = 0.1  # gating blocks are 4 segments (400 ms, 75% overlap)
+ABSOLUTE_GATE_LUFS = -70.0
+RELATIVE_GATE_LU = -10.0
+
+
+def iter_wav_chunks(source: str, chunk_frames: int = WAV_CHUNK_FRAMES) -> Iterator[np.ndarray]:
+    """Yield float32 arrays of shape (frames, channels) scaled to [-1, 1]."""
+    with wave.open(source, "rb") as wav:
+        channels = wav.getnchannels()
+        width = wav.getsampwidth()
+        while True:
+            raw = wav.readframes(chunk_frames)
+            if not raw:
+                break
+            yield decode_pcm(raw, width).reshape(-1, channels)
+
+
+def decode_pcm(raw: bytes, width: int) -> np.ndarray:
+    if width == 1:
+        return (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    if width == 2:
+        return np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768.0
+    if width == 3:
+        triplets = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        samples = triplets[:, 0] | (triplets[:, 1] << 8) | (triplets[:, 2] << 16)
+        samples = np.where(samples & 0x800000, samples - 0x1000000, samples)
+        return samples.astype(np.float32) / 8388608.0
+    if width == 4:
+        return np.frombuffer(raw, dtype="<i4").astype(np.float32) / 2147483648.0
+    raise ValueError(f"Unsupported WAV sample width: {width}")
+
+
+def wav_info(source: str) -> Dict[str, float]:
+    with wave.open(source, "rb") as wav:
+        return {
+            "channels": wav.getnchannels(),
+            "sample_rate": wav.getframerate(),
+            "frames": wav.getnframes(),
+            "duration": wav.getnframes() / float(wav.getframerate()),
+        }
+
+
+def waveform_peaks(source: str, buckets: int = WAVEFORM_BUCKETS) -> Dict[str, object]:
+    """Downsample a WAV file to per-bucket (min, max) pairs across all channels."""
+    info = wav_info(source)
+    frames_per_bucket = max(1, -(-int(info["frames"]) // buckets))
+    chunk_frames = frames_per_bucket * max(1, WAV_CHUNK_FRAMES // frames_per_bucket)
+    mins, maxs = [], []
+    for chunk in iter_wav_chunks(source, chunk_frames):
+        samples = chunk.reshape(-1)
+        per_bucket = frames_per_bucket * chunk.shape[1]
+        padded = -(-len(samples) // per_bucket) * per_bucket
+        if padded != len(samples):
+            samples = np.pad(samples, (0, padded - len(samples)), mode="edge")
+        grid = samples.reshape(-1, per_bucket)
+        mins.append(grid.min(axis=1))
+        maxs.append(grid.max(axis=1))
+    peaks = np.stack([np.concatenate(mins), np.concatenate(maxs)], axis=1) if mins else np.zeros((0, 2))
+    return {
+        "sample_rate": info["sample_rate"],
+        "duration": info["duration"],
+        "frames_per_bucket": frames_per_bucket,
+        "peaks": np.round(peaks, 4).tolist(),
+    }
+
+
+# Audio analysis
+# Tempo comes from a spectral-flux onset envelope and its autocorrelation;
+# loudness follows ITU-R BS.1770 (K-weighting applied per 100 ms segment in
+# the frequency domain, gated 400 ms blocks). Both are accumulated chunk by
+# chunk, so memory depends on the chunk size and duration-proportional
+# envelopes of a few floats per 10 ms, never on the whole decoded file.
+def biquad_response(b: Sequence[float], a: Sequence[float], frequencies: np.ndarray, rate: int) -> np.ndarray:
+    z = np.exp(-2j * np.pi * frequencies / rate)
+    return np.abs((b[0] + b[1] * z + b[2] * z * z) / (a[0] + a[1] * z + a[2] * z * z)) ** 2
+
+
+def k_weighting(frequencies: np.ndarray, rate: int) -> np.ndarray:
+    """Power response of the BS.1770 pre-filter (high shelf, then high pass),
+    with biquad coefficients derived for ``rate``."""
+    gain, q, fc = 3.999843853973347, 0.7071752369554196, 1681.974450955533
+    k = math.tan(math.pi * fc / rate)
+    vh = 10 ** (gain / 20)
+    vb = vh ** 0.4996667741545416
+    norm = 1 + k / q + k * k
+    shelf = biquad_response(
+        ((vh + vb * k / q + k * k) / norm, 2 * (k * k - vh) / norm, (vh - vb * k / q + k * k) / norm),
+        (1.0, 2 * (k * k - 1) / norm, (1 - k / q + k * k) / norm),
+        frequencies, rate,
+    )
+    q, fc = 0.5003270373238773, 38.13547087602444
+    k = math.tan(math.pi * fc / rate)
+    norm = 1 + k / q + k * k
+    high_pass = biquad_response(
+        (1.0, -2.0, 1.0),
+        (1.0, 2 * (k * k - 1) / norm, (1 - k / q + k * k) / norm),
+        frequencies, rate,
+    )
+    return shelf * high_pass
+
+
+def frames_of(buffer: np.ndarray, frame: int, hop: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Split into overlapping frames; returns (frames, leftover for the next chunk)."""
+    if len(buffer) < frame:
+        return np.zeros((0, frame), dtype=buffer.dtype), buffer
+    count = (len(buffer) - frame) // hop + 1
+    frames = np.lib.stride_tricks.sliding_window_view(buffer, frame)[::hop][:count]
+    return frames, buffer[count * hop:]
+
+
+def onset_envelope(flux: np.ndarray, level: np.ndarray, frame_rate: float) -> np.ndarray:
+    """Spectral flux above its local median, in units of its local spread
+    (a robust z-score over ONSET_MEDIAN_SECONDS).
+
+    Steady tones and noise have a flat or randomly wandering flux and stay
+    within a few units; onsets stand out however loud the mix around them is.
+    ``level`` floors the spread so a perfectly steady signal does not divide
+    by zero.
+    """
+    width = int(frame_rate * ONSET_MEDIAN_SECONDS) | 1
+    if len(flux) < width:
+        return np.zeros(0)
+    windows = np.lib.stride_tricks.sliding_window_view(np.pad(flux, width // 2, mode="edge"), width)
+    baseline, spread = np.empty(len(flux)), np.empty(len(flux))
+    # In blocks, so the copies np.median makes stay small for long files
+    for start in range(0, len(flux), ONSET_BLOCK_FRAMES):
+        block = windows[start:start + ONSET_BLOCK_FRAMES]
+        median = baseline[start:start + len(block)] = np.median(block, axis=1)
+        spread[start:start + len(block)] = 1.4826 * np.median(np.abs(block - median[:, None]), axis=1)
+    return np.maximum(flux - baseline, 0.0) / np.maximum(spread, ONSET_SPREAD_FLOOR * np.maximum(level, 1.0))
+
+
+def estimate_tempo(envelope: np.ndarray, frame_rate: float) -> Tuple[Optional[float], float]:
+    """Pick the autocorrelation peak of the onset envelope within TEMPO_RANGE,
+    weighted towards TEMPO_PRIOR_BPM, and fold it into PREFERRED_TEMPO_RANGE
+    when the doubled or halved tempo is also well supported; returns
+    (bpm, confidence).
+
+    Audio without prominent onsets, or without a periodic pattern in them,
+    returns no tempo.
+    """
+    min_lag = int(frame_rate * 60 / TEMPO_RANGE[1])
+    max_lag = int(math.ceil(frame_rate * 60 / TEMPO_RANGE[0]))
+    if len(envelope) < 4 * max_lag:
+        return None, 0.0
+    # Mean strength of the strongest 1% of frames; at the slowest tempo that
+    # is still about one frame per beat
+    top = len(envelope) // 100 + 1
+    if np.partition(envelope, -top)[-top:].mean() < MIN_ONSET_STRENGTH:
+        return None, 0.0
+    # Smoothing spreads peaks at fractional lags over their neighbours, so a
+    # beat that falls between two frames scores like one that does not
+    kernel = np.exp(-0.5 * (np.arange(-3, 4) / 1.5) ** 2)
+    envelope = np.convolve(envelope, kernel / kernel.sum(), mode="same")
+    envelope = envelope - envelope.mean()
+    size = 1 << int(math.ceil(math.log2(2 * len(envelope))))
+    spectrum = np.fft.rfft(envelope, size)
+    correlation = np.fft.irfft(spectrum * np.conj(spectrum), size)[:2 * max_lag + 2]
+    if correlation[0] <= 0:
+        return None, 0.0
+    # Unbiased estimate: later lags overlap fewer frames
+    correlation = correlation / (len(envelope) - np.arange(len(correlation)))
+    correlation /= correlation[0]
+    lags = np.arange(min_lag, max_lag + 1)
+    prior = np.exp(-0.5 * (np.log2(frame_rate * 60 / lags / TEMPO_PRIOR_BPM) / 0.9) ** 2)
+    best = int(lags[np.argmax(correlation[lags] * prior)])
+    confidence = float(max(0.0, correlation[best]))
+    if confidence < MIN_TEMPO_CONFIDENCE:
+        return None, confidence
+
+    def support(lag: float) -> float:
+        return float(np.interp(lag, np.arange(len(correlation)), correlation))
+
+    lag = float(best)
+    # Parabolic interpolation around the peak for a sub-frame lag
+    left, center, right = correlation[best - 1], correlation[best], correlation[best + 1]
+    denominator = left - 2 * center + right
+    if denominator:
+        lag += max(-0.5, min(0.5, 0.5 * (left - right) / denominator))
+    low, high = PREFERRED_TEMPO_RANGE
+    while frame_rate * 60 / lag < low and support(lag / 2) >= OCTAVE_SUPPORT * confidence:
+        lag /= 2
+    while frame_rate * 60 / lag > high and support(lag * 2) >= OCTAVE_SUPPORT * confidence:
+        lag *= 2
+    return float(frame_rate * 60 / lag), confidence
+
+
+def integrated_loudness(segments: np.ndarray) -> Optional[float]:
+    """Gated loudness in LUFS from per-100 ms K-weighted mean-square energies."""
+    if len(segments) < 4:
+        return None
+    blocks = np.lib.stride_tricks.sliding_window_view(segments, 4).mean(axis=1)
+    with np.errstate(divide="ignore"):
+        loudness = -0.691 + 10 * np.log10(blocks)
+    gated = blocks[loudness > ABSOLUTE_GATE_LUFS]
+    if not len(gated):
+        return None
+    threshold = -0.691 + 10 * math.log10(gated.mean()) + RELATIVE_GATE_LU
+    with np.errstate(divide="ignore"):
+        gated = gated[-0.691 + 10 * np.log10(gated) > threshold]
+    return float(-0.691 + 10 * math.log10(gated.mean()))
+
+
+def analyze_audio(source: str) -> Dict[str, object]:
+    """Estimate tempo (BPM) and integrated loudness (LUFS) of a WAV file."""
+    info = wav_info(source)
+    rate = int(info["sample_rate"])
+    segment = max(1, int(rate * LOUDNESS_SEGMENT_SECONDS))
+    window = np.hanning(ONSET_FRAME).astype(np.float32)
+    weighting = k_weighting(np.fft.rfftfreq(segment, 1.0 / rate), rate)
+
+    onset_tail = np.zeros(0, dtype=np.float32)
+    loudness_tail = np.zeros((0, int(info["channels"])), dtype=np.float32)
+    previous: Optional[np.ndarray] = None
+    flux, levels, energies = [], [], []
+    peak = 0.0
+    for chunk in iter_wav_chunks(source):
+        peak = max(peak, float(np.abs(chunk).max(initial=0.0)))
+
+        frames, onset_tail = frames_of(np.concatenate([onset_tail, chunk.mean(axis=1)]), ONSET_FRAME, ONSET_HOP)
+        if len(frames):
+            magnitude = np.log1p(100.0 * np.abs(np.fft.rfft(frames * window, axis=1)))
+            if previous is not None:
+                magnitude_prev = np.vstack([previous[None, :], magnitude[:-1]])
+            else:
+                magnitude_prev = np.vstack([magnitude[:1], magnitude[:-1]])
+            # Compare against the loudest neighbouring bin of the previous
+            # frame, so glides and vibrato do not register as onsets
+            neighbours = magnitude_prev.copy()
+            neighbours[:, 1:] = np.maximum(neighbours[:, 1:], magnitude_prev[:, :-1])
+            neighbours[:, :-1] = np.maximum(neighbours[:, :-1], magnitude_prev[:, 1:])
+            flux.append(np.maximum(magnitude - neighbours, 0.0).sum(axis=1))
+            levels.append(magnitude.sum(axis=1))
+            previous = magnitude[-1]
+
+        samples = np.concatenate([loudness_tail, chunk])
+        count = len(samples) // segment
+        if count:
+            # (segments, samples, channels) -> K-weighted mean square summed over channels
+            spectra = np.abs(np.fft.rfft(samples[:count * segment].reshape(count, segment, -1), axis=1)) ** 2
+            spectra[:, 1:-1 if segment % 2 == 0 else None] *= 2
+            energies.append((spectra * weighting[None, :, None]).sum(axis=(1, 2)) / (segment * segment))
+        loudness_tail = samples[count * segment:]
+
+    envelope = onset_envelope(np.concatenate(flux), np.concatenate(levels), rate / ONSET_HOP) if flux else np.zeros(0)
+    bpm, confidence = estimate_tempo(envelope, rate / ONSET_HOP)
+    loudness = integrated_loudness(np.concatenate(energies) if energies else np.zeros(0))
+    return {
+        "bpm": round(bpm, 1) if bpm else None,
+        "bpm_confidence": round(confidence, 3),
+        "loudness_lufs": round(loudness, 1) if loudness is not None else None,
+        "peak_dbfs": round(20 * math.log10(peak), 1) if peak > 0 else None,
+        "duration": round(info["duration"], 3),
+        "sample_rate": rate,
+    }
+
+
+def make_thumbnails(source: str, dest_dir: str, sizes: Sequence[int]) -> Dict[str, str]:
+    out_dir = Path(dest_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    thumbnails = {}
+    with Image.open(source) as image:
+        image.draft("RGB", (max(sizes), max(sizes)))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+        for size in sorted(sizes, reverse=True):
+            image.thumbnail((size, size))
+            target = out_dir / f"thumb_{size}.webp"
+            image.save(target, "WEBP", quality=80)
+            thumbnails[str(size)] = str(target)
+    return thumbnails
+
+
+def build_derivatives(source: str, dest_dir: str, kind: str, thumbnail_sizes: Sequence[int]) -> Dict[str, object]:
+    if kind == "image":
+        return {"thumbnails": make_thumbnails(source, dest_dir, thumbnail_sizes)}
+    if kind == "wav":
+        out_dir = Path(dest_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        target = out_dir / "waveform.json"
+        target.write_text(json.dumps(waveform_peaks(source)))
+        return {"waveform": str(target), "analysis": analyze_audio(source)}
+    raise ValueError(f"Unknown derivative kind: {kind}")
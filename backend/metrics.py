@@ -0,0 +1,244 @@
+"""Request and MongoDB instrumentation exposed in Prometheus text format.
+
+Metrics are kept in process memory and rendered on demand; there is no
+client library dependency. Each request carries a ``RequestTiming`` in a
+context variable so the phases spent in MongoDB and in JSON encoding can be
+reported back in a ``Server-Timing`` header. Motor runs driver calls on a
+thread pool with a copy of the caller's context, so the command listener sees
+the timing of the request that issued the command.
+"""
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastapi.responses import ORJSONResponse
+from pymongo import monitoring
+
+logger = logging.getLogger("mythrealms.mongo")
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+Labels = Tuple[str, ...]
+
+
+def escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def label_text(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1.0) -> None:
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self.lock:
+            values = sorted(self.values.items())
+        return self.header() + [f"{self.name}{label_text(self.labels, labels)} {value:g}" for labels, value in values]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, labels: Labels = (), amount: float = 1.0) -> None:
+        self.inc(labels, -amount)
+
+    def set(self, labels: Labels, value: float) -> None:
+        with self.lock:
+            self.values[labels] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str], buckets: Sequence[float]):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+        self.series: Dict[Labels, List[Any]] = {}  # labels -> [per-bucket counts (+Inf last), sum]
+
+    def observe(self, labels: Labels, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        with self.lock:
+            series = sorted((labels, list(counts), total) for labels, (counts, total) in self.series.items())
+        lines = self.header()
+        for labels, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(list(self.buckets) + ["+Inf"], counts):
+                cumulative += count
+                le = bound if bound == "+Inf" else f"{bound:g}"
+                bucket = label_text(self.labels, labels, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{bucket} {cumulative}")
+            lines.append(f"{self.name}_sum{label_text(self.labels, labels)} {total:g}")
+            lines.append(f"{self.name}_count{label_text(self.labels, labels)} {cumulative}")
+        return lines
+
+
+REGISTRY: List[Metric] = []
+
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests by route, method and status.", ("method", "route", "status"))
+HTTP_DURATION = Histogram("http_request_duration_seconds", "Time to response headers by route.", ("method", "route"), LATENCY_BUCKETS)
+HTTP_RESPONSE_SIZE = Histogram("http_response_size_bytes", "Response body size by route.", ("method", "route"), SIZE_BUCKETS)
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "Requests currently being handled by route.", ("route",))
+HTTP_SHED = Counter("http_requests_shed_total", "Requests rejected by admission control.", ("route",))
+MONGO_DURATION = Histogram("mongo_command_duration_seconds", "MongoDB command time by collection and command.", ("collection", "command"), LATENCY_BUCKETS)
+MONGO_FAILURES = Counter("mongo_command_failures_total", "Failed MongoDB commands.", ("collection", "command"))
+MONGO_SLOW = Counter("mongo_slow_commands_total", "MongoDB commands over the slow-query threshold.", ("collection", "command"))
+
+
+def render() -> str:
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+
+def observe_request(method: str, route: str, status: int, seconds: float, content_length: Optional[str]) -> None:
+    HTTP_REQUESTS.inc((method, route, str(status)))
+    HTTP_DURATION.observe((method, route), seconds)
+    if content_length and content_length.isdigit():
+        HTTP_RESPONSE_SIZE.observe((method, route), int(content_length))
+
+
+# Server-Timing
+class RequestTiming:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.phases: Dict[str, List[float]] = {}  # phase -> [seconds, count]
+
+    def add(self, phase: str, seconds: float) -> None:
+        with self.lock:
+            entry = self.phases.setdefault(phase, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += 1
+
+    def header(self, total: float) -> str:
+        with self.lock:
+            phases = dict(self.phases)
+        parts = [f'{phase};dur={seconds * 1000:.1f};desc="{count}x"' for phase, (seconds, count) in sorted(phases.items())]
+        # Concurrent commands overlap, so the remainder is clamped rather than negative
+        app_seconds = max(0.0, total - sum(seconds for seconds, _ in phases.values()))
+        parts.append(f"app;dur={app_seconds * 1000:.1f}")
+        parts.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(parts)
+
+
+current_timing: ContextVar[Optional[RequestTiming]] = ContextVar("current_timing", default=None)
+
+
+def record_phase(phase: str, seconds: float) -> None:
+    timing = current_timing.get()
+    if timing is not None:
+        timing.add(phase, seconds)
+
+
+class TimedJSONResponse(ORJSONResponse):
+    """ORJSONResponse that reports its encoding time as the ``encode`` phase."""
+
+    def render(self, content: Any) -> bytes:
+        start = time.perf_counter()
+        body = super().render(content)
+        record_phase("encode", time.perf_counter() - start)
+        return body
+
+
+# MongoDB commands
+def filter_shape(value: Any) -> Any:
+    """Replace literal values with ``?`` while keeping fields and operators."""
+    if isinstance(value, dict):
+        return {key: filter_shape(item) for key, item in value.items()}
+    if isinstance(value, list):
+        if value and all(isinstance(item, dict) for item in value):
+            return [filter_shape(item) for item in value]
+        return ["?"]
+    return "?"
+
+
+def command_filter(name: str, command: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    if name in ("find", "distinct"):
+        return command.get("filter") or command.get("query")
+    if name in ("count", "findAndModify"):
+        return command.get("query")
+    if name == "aggregate":
+        pipeline = command.get("pipeline") or [{}]
+        return pipeline[0].get("$match")
+    if name == "update":
+        updates = command.get("updates") or [{}]
+        return updates[0].get("q")
+    if name == "delete":
+        deletes = command.get("deletes") or [{}]
+        return deletes[0].get("q")
+    return None
+
+
+class CommandTimer(monitoring.CommandListener):
+    """Times every driver command and logs the ones over ``slow_ms``."""
+
+    def __init__(self, slow_ms: float):
+        self.slow_ms = slow_ms
+        self.pending: Dict[Tuple[Any, int], Tuple[str, Dict[str, Any]]] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        command = event.command
+        collection = command.get("collection") if event.command_name == "getMore" else command.get(event.command_name)
+        self.pending[(event.connection_id, event.request_id)] = (
+            collection if isinstance(collection, str) else "",
+            command_filter(event.command_name, command),
+        )
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self.finish(event, failed=False)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self.finish(event, failed=True)
+
+    def finish(self, event, failed: bool) -> None:
+        collection, query = self.pending.pop((event.connection_id, event.request_id), ("", None))
+        labels = (collection, event.command_name)
+        seconds = event.duration_micros / 1_000_000
+        MONGO_DURATION.observe(labels, seconds)
+        record_phase("db", seconds)
+        if failed:
+            MONGO_FAILURES.inc(labels)
+        if seconds * 1000 >= self.slow_ms:
+            MONGO_SLOW.inc(labels)
+            logger.warning(
+                "Slow %s on %s took %.1f ms, filter %s",
+                event.command_name, collection or "-", seconds * 1000,
+                json.dumps(filter_shape(query), sort_keys=True) if query is not None else "-",
+            )
@@ -0,0 +1,65 @@
+"""Bounded LRU cache for serialized GET responses.
+
+Entries are keyed by route plus query string and tagged with the generation
+counters of the collections the route reads. Writes bump a collection's
+generation, which makes every dependent entry unreachable without scanning
+the cache; stale entries then age out through normal LRU eviction.
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+Token = Tuple[int, ...]
+
+
+@dataclass
+class CacheEntry:
+    token: Token
+    body: bytes
+    headers: List[Tuple[str, str]]
+    etag: str
+    stored_at: float
+
+
+class ResponseCache:
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.generations: Dict[str, int] = {}
+        self.entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def token(self, collections: Iterable[str]) -> Token:
+        return tuple(self.generations.get(name, 0) for name in collections)
+
+    def invalidate(self, *collections: str) -> None:
+        for name in collections:
+            self.generations[name] = self.generations.get(name, 0) + 1
+
+    def get(self, key: str, token: Token) -> Optional[CacheEntry]:
+        entry = self.entries.get(key)
+        if entry is None or entry.token != token or time.monotonic() - entry.stored_at > self.ttl_seconds:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, token: Token, body: bytes, headers: List[Tuple[str, str]]) -> CacheEntry:
+        etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        entry = CacheEntry(token, body, headers, etag, time.monotonic())
+        if len(body) > self.max_bytes // 4:
+            return entry
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.size -= len(previous.body)
+        self.entries[key] = entry
+        self.size += len(body)
+        while self.size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted.body)
+        return entry
@@ -0,0 +1,37 @@
+"""Trusted-read serialization for documents loaded from MongoDB.
+
+Stored documents were validated when they were written, so read handlers
+shape them into the response model's fields directly instead of building a
+model and letting FastAPI validate it a second time against
+``response_model``. Missing fields get the model's defaults, extra keys such
+as ``_id`` or a text ``score`` are dropped, and the rows are encoded straight
+to bytes by orjson, which handles datetime and enum values natively.
+
+Run ``python serialization_bench.py`` to compare this path against the
+default one for every response model.
+"""
+from typing import Any, Dict, Iterable, List, Mapping, Tuple, Type
+
+from pydantic import BaseModel
+from pydantic.fields import FieldInfo
+
+_model_fields: Dict[Type[BaseModel], List[Tuple[str, FieldInfo]]] = {}
+
+
+def trusted_fields(model: Type[BaseModel]) -> List[Tuple[str, FieldInfo]]:
+    fields = _model_fields.get(model)
+    if fields is None:
+        fields = _model_fields[model] = list(model.model_fields.items())
+    return fields
+
+
+def trusted_row(model: Type[BaseModel], doc: Mapping[str, Any]) -> Dict[str, Any]:
+    return {
+        name: doc[name] if name in doc else field.get_default(call_default_factory=True)
+        for name, field in trusted_fields(model)
+    }
+
+
+def trusted_rows(model: Type[BaseModel], docs: Iterable[Mapping[str, Any]]) -> List[Dict[str, Any]]:
+    return [trusted_row(model, doc) for doc in docs]
+
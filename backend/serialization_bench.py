@@ -0,0 +1,186 @@
+"""Micro-benchmark: default response serialization vs. the trusted-read path.
+
+For each response model, a page of synthetic stored documents (shaped like
+rows read back from MongoDB, including ``_id``) is serialized two ways:
+
+* default: ``[Model(**doc) ...]``, FastAPI's ``response_model`` validation
+  and ``JSONResponse`` rendering, as the list handlers used to do;
+* trusted: ``trusted_rows`` rendered by ``ORJSONResponse``.
+
+Both bodies are decoded and compared before timing, so a speedup never comes
+from returning different data.
+
+    python serialization_bench.py --rows 100 --repeat 200 [--json]
+"""
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+import typer
+from bson import ObjectId
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from server import Asset, BaseDocument, Character, MusicTrack, Quest, Weapon
+from serialization import trusted_rows
+
+
+def stored_document(i: int) -> Dict[str, Any]:
+    return {
+        "title": f"Design notes {i}",
+        "document_type": "gdd",
+        "content": {"overview": "Lorem ipsum " * 40, "sections": [{"heading": f"Part {n}", "body": "text " * 30} for n in range(5)]},
+        "tags": ["forest", "combat", "lore"],
+        "version": 3,
+    }
+
+
+def stored_character(i: int) -> Dict[str, Any]:
+    return {
+        "name": f"Character {i}",
+        "description": "A wandering spirit of the old forest. " * 5,
+        "realm": "forest",
+        "character_type": "npc",
+        "emotions": {"joy": "smiles", "rage": "glows red", "calm": "hums", "fear": "flickers", "sorrow": "dims"},
+        "stats": {"health": 120, "attack": 14, "defense": 9, "speed": 1.25, "resistances": {"spirit": 0.3}},
+        "assets": [f"asset-{i}-{n}" for n in range(3)],
+        "dialogue_lines": [f"Line {n}: the roots remember everything." for n in range(20)],
+    }
+
+
+def stored_weapon(i: int) -> Dict[str, Any]:
+    return {
+        "name": f"Weapon {i}",
+        "weapon_type": "sword",
+        "lore": "Forged in the mountain halls. " * 6,
+        "damage_profile": {"physical": 50, "spirit": 30, "fire": 10},
+        "combo_path": ["light", "light", "heavy", "ability"],
+        "upgrade_tree": {f"tier_{n}": {"cost": n * 100, "bonus": {"physical": n * 5}} for n in range(1, 5)},
+        "vfx_sfx_notes": "Sparks on heavy hits.",
+        "accessibility_notes": "High-contrast trail option.",
+        "assets": [f"asset-{i}"],
+    }
+
+
+def stored_quest(i: int) -> Dict[str, Any]:
+    return {
+        "title": f"Quest {i}",
+        "description": "Recover the lost lantern from the underworld gate. " * 3,
+        "realm": "underworld",
+        "quest_type": "main",
+        "objectives": [f"Objective {n}" for n in range(6)],
+        "rewards": {"xp": 500, "items": ["lantern", "spirit shard"]},
+        "required_level": 12,
+        "estimated_duration": "30 minutes",
+        "npcs_involved": [f"character-{n}" for n in range(4)],
+        "assets": [],
+    }
+
+
+def stored_music(i: int) -> Dict[str, Any]:
+    return {
+        "name": f"Track {i}",
+        "realm": "mountain",
+        "mood": "exploration",
+        "tempo": 96,
+        "key": "D minor",
+        "instrumentation": ["strings", "flute", "taiko"],
+        "transition_rules": "Crossfade on combat start.",
+        "intensity_layers": {"low": "pads", "mid": "strings", "high": "percussion"},
+        "asset_id": f"asset-{i}",
+    }
+
+
+def stored_asset(i: int) -> Dict[str, Any]:
+    return {
+        "name": f"concept_{i}.png",
+        "file_path": f"uploads/blobs/ab/{i:064x}.png",
+        "file_type": "image/png",
+        "category": "image",
+        "tags": ["concept"],
+        "description": "Concept art",
+        "size": 1048576,
+        "sha256": f"{i:064x}",
+        "derivatives": {"thumbnails": {"128": f"uploads/derived/{i}/thumb_128.webp", "512": f"uploads/derived/{i}/thumb_512.webp"}},
+        "derivatives_status": "ready",
+    }
+
+
+MODELS = {
+    "documents": (BaseDocument, stored_document),
+    "characters": (Character, stored_character),
+    "weapons": (Weapon, stored_weapon),
+    "quests": (Quest, stored_quest),
+    "music": (MusicTrack, stored_music),
+    "assets": (Asset, stored_asset),
+}
+
+
+def stored_page(model, factory: Callable, rows: int) -> List[Dict[str, Any]]:
+    """Round-trip through JSON so enums come back as plain strings, as they do from MongoDB."""
+    now = datetime.utcnow()
+    docs = []
+    for i in range(rows):
+        doc = json.loads(model(**factory(i)).model_dump_json())
+        for name, field in model.model_fields.items():
+            if field.annotation is datetime:
+                doc[name] = now - timedelta(seconds=i)
+        doc["_id"] = ObjectId()
+        docs.append(doc)
+    return docs
+
+
+def default_body(model, field, docs, loop) -> bytes:
+    content = loop.run_until_complete(serialize_response(field=field, response_content=[model(**doc) for doc in docs]))
+    return JSONResponse(content).body
+
+
+def trusted_body(model, docs) -> bytes:
+    return ORJSONResponse(trusted_rows(model, docs)).body
+
+
+def best_of(func: Callable[[], bytes], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(
+    rows: int = typer.Option(100, help="Documents per simulated page."),
+    repeat: int = typer.Option(200, help="Timed runs per path; the fastest is reported."),
+    as_json: bool = typer.Option(False, "--json", help="Print machine-readable results."),
+):
+    loop = asyncio.new_event_loop()
+    results = {}
+    for name, (model, factory) in MODELS.items():
+        docs = stored_page(model, factory, rows)
+        field = create_response_field(name="Response", type_=List[model])
+        expected = json.loads(default_body(model, field, docs, loop))
+        if json.loads(trusted_body(model, docs)) != expected:
+            raise SystemExit(f"{name}: trusted body differs from the default body")
+        default_s = best_of(lambda: default_body(model, field, docs, loop), repeat)
+        trusted_s = best_of(lambda: trusted_body(model, docs), repeat)
+        results[name] = {
+            "rows": rows,
+            "default_ms": round(default_s * 1000, 3),
+            "trusted_ms": round(trusted_s * 1000, 3),
+            "speedup": round(default_s / trusted_s, 2),
+        }
+    loop.close()
+
+    if as_json:
+        typer.echo(json.dumps(results, indent=2))
+        return
+    typer.echo(f"{'model':<12}{'default ms':>12}{'trusted ms':>12}{'speedup':>10}")
+    for name, result in results.items():
+        typer.echo(f"{name:<12}{result['default_ms']:>12}{result['trusted_ms']:>12}{result['speedup']:>9}x")
+
+
+if __name__ == "__main__":
+    typer.run(main)
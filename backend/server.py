@@ -1,28 +1,71 @@
-from fastapi import FastAPI, APIRouter, HTTPException, File, UploadFile, Form
+from fastapi import FastAPI, APIRouter, HTTPException, File, UploadFile, Form, Query, Body, Request, Response
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import JSONResponse, StreamingResponse
 from dotenv import load_dotenv
+from starlette.datastructures import Headers
 from starlette.middleware.cors import CORSMiddleware
+from starlette.routing import Match
 from motor.motor_asyncio import AsyncIOMotorClient
+import pymongo
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel, ReturnDocument
+from pymongo.errors import (
+    BulkWriteError, ExecutionTimeout, NetworkTimeout, ServerSelectionTimeoutError, WaitQueueTimeoutError, WriteError
+)
 import os
+import asyncio
 import logging
+import time
 from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field, ValidationError
+from typing import List, Optional, Dict, Any, Union
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 from enum import Enum
+import base64
+import codecs
+import copy
+import hashlib
 import json
+import re
+import shutil
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import media
+from admission import AdmissionControl
+import balance
+from autocomplete import PrefixIndex
+from events import EventBus, watch_changes
+import metrics
+import snapshot
+from metrics import TimedJSONResponse
+from json_patch import PatchError, apply_steps, indexed_roots, parse_patch, to_update
+from deltas import apply_delta, changed_fields, compute_delta
+from response_cache import ResponseCache
+from serialization import trusted_row, trusted_rows
+from similarity import SimilarityIndex
+from transitions import RealmMatrix
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', '100'))
+MONGO_CLIENT_OPTIONS = {
+    "maxPoolSize": int(os.environ.get('MONGO_MAX_POOL_SIZE', '100')),
+    "minPoolSize": int(os.environ.get('MONGO_MIN_POOL_SIZE', '0')),
+    "maxConnecting": int(os.environ.get('MONGO_MAX_CONNECTING', '2')),
+    "maxIdleTimeMS": int(os.environ.get('MONGO_MAX_IDLE_MS', '300000')),
+    "connectTimeoutMS": int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', '10000')),
+    "serverSelectionTimeoutMS": int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000')),
+}
+mongo_commands = metrics.CommandTimer(SLOW_QUERY_MS)
+client = AsyncIOMotorClient(mongo_url, event_listeners=[mongo_commands], **MONGO_CLIENT_OPTIONS)
 db = client[os.environ['DB_NAME']]
 
 # Create the main app
-app = FastAPI(title="MythRealms GDD & Content Management Platform")
+app = FastAPI(title="MythRealms GDD & Content Management Platform", default_response_class=TimedJSONResponse)
 
 # Create router with /api prefix
 api_router = APIRouter(prefix="/api")
@@ -51,6 +94,19 @@ class WeaponType(str, Enum):
     STAFF = "staff"
     GREATSWORD = "greatsword"
 
+class RelatedType(str, Enum):
+    DOCUMENT = "document"
+    CHARACTER = "character"
+    WEAPON = "weapon"
+    QUEST = "quest"
+
+class BulkCollection(str, Enum):
+    DOCUMENTS = "documents"
+    CHARACTERS = "characters"
+    WEAPONS = "weapons"
+    QUESTS = "quests"
+    MUSIC = "music"
+
 class EmotionState(str, Enum):
     JOY = "joy"
     CALM = "calm"
@@ -77,6 +133,10 @@ class Asset(BaseModel):
     category: str  # "image", "audio", "document", "video"
     tags: List[str] = Field(default_factory=list)
     description: Optional[str] = None
+    size: int = 0  # bytes
+    sha256: Optional[str] = None
+    derivatives: Dict[str, Any] = Field(default_factory=dict)  # {"thumbnails": {"128": path}, "waveform": path, "analysis": {"bpm": ...}}
+    derivatives_status: Optional[str] = None  # "pending", "processing", "ready", "failed", "skipped"
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 class Character(BaseModel):
@@ -138,6 +198,12 @@ class DocumentCreate(BaseModel):
     content: Dict[str, Any] = Field(default_factory=dict)
     tags: List[str] = Field(default_factory=list)
 
+class DocumentUpdate(BaseModel):
+    title: Optional[str] = None
+    document_type: Optional[DocumentType] = None
+    content: Optional[Dict[str, Any]] = None
+    tags: Optional[List[str]] = None
+
 class CharacterCreate(BaseModel):
     name: str
     description: str
@@ -164,9 +230,352 @@ class MusicTrackCreate(BaseModel):
     name: str
     realm: RealmType
     mood: str
-    tempo: int
+    tempo: Optional[int] = None  # defaults to the analyzed BPM of asset_id
     key: str
     instrumentation: List[str] = Field(default_factory=list)
+    asset_id: Optional[str] = None
+
+# Pagination
+# List endpoints use keyset pagination ordered by (created_at, id) descending.
+# The cursor is an opaque token holding the sort key of the last row served;
+# the next page is a range scan from that key, so page N costs the same as page 1.
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+PAGE_SORT = [("created_at", -1), ("id", -1)]
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(doc: Dict[str, Any]) -> str:
+    payload = json.dumps({"t": doc["created_at"].isoformat(), "id": doc["id"]})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return {"created_at": datetime.fromisoformat(payload["t"]), "id": str(payload["id"])}
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def paginate(
+    collection,
+    filter_dict: Dict[str, Any],
+    limit: int,
+    cursor: Optional[str],
+    response: Response,
+    projection: Optional[Dict[str, int]] = None
+):
+    query = dict(filter_dict)
+    if cursor:
+        key = decode_cursor(cursor)
+        query["$or"] = [
+            {"created_at": {"$lt": key["created_at"]}},
+            {"created_at": key["created_at"], "id": {"$lt": key["id"]}},
+        ]
+    docs = await collection.find(query, projection).sort(PAGE_SORT).limit(limit + 1).to_list(limit + 1)
+    if len(docs) > limit:
+        docs = docs[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(docs[-1])
+    return docs
+
+# Sparse fieldsets
+# ?fields=a,b pushes a projection down to Mongo and returns the projected
+# documents as-is. id and created_at are always included so rows stay
+# addressable and pageable. Full rows take the trusted-read path: stored
+# documents are shaped into the model's fields without validating them again.
+SPARSE_BASE_FIELDS = {"id", "created_at"}
+
+def requested_fields(fields: Optional[str]) -> set:
+    return {field.strip() for field in (fields or "").split(",") if field.strip()}
+
+def parse_fields(model, fields: Optional[str], expand: List[str] = ()) -> Optional[Dict[str, int]]:
+    requested = requested_fields(fields)
+    if not requested:
+        return None
+    unknown = requested - set(model.model_fields)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return {"_id": 0, **{field: 1 for field in requested | SPARSE_BASE_FIELDS | set(expand)}}
+
+async def page_response(
+    model,
+    docs: List[Dict[str, Any]],
+    response: Response,
+    projection: Optional[Dict[str, int]],
+    expand: List[str] = ()
+) -> TimedJSONResponse:
+    headers = {NEXT_CURSOR_HEADER: response.headers[NEXT_CURSOR_HEADER]} if NEXT_CURSOR_HEADER in response.headers else None
+    rows = docs if projection else trusted_rows(model, docs)
+    if expand:
+        await expand_references(model, rows, expand)
+    return TimedJSONResponse(rows, headers=headers)
+
+# Reference expansion
+# ?expand=npcs_involved,assets resolves ID references for a whole page at
+# once: IDs are collected across rows and each target collection is read with
+# a single $in query, so a page costs one round trip per target collection
+# however many rows or repeated references it has. Resolved entities are
+# returned as summaries under each row's "expanded" key.
+REFERENCE_TARGETS = {  # target collection -> summary projection
+    "characters": {"_id": 0, "id": 1, "name": 1, "realm": 1, "character_type": 1},
+    "assets": {"_id": 0, "id": 1, "name": 1, "file_path": 1, "file_type": 1, "category": 1, "derivatives": 1},
+}
+EXPANSIONS = {  # model -> {reference field: target collection}
+    Character: {"assets": "assets"},
+    Weapon: {"assets": "assets"},
+    Quest: {"npcs_involved": "characters", "assets": "assets"},
+    MusicTrack: {"asset_id": "assets"},
+}
+
+def parse_expand(model, expand: Optional[str]) -> List[str]:
+    requested = requested_fields(expand)
+    unknown = requested - set(EXPANSIONS.get(model, {}))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Cannot expand: {', '.join(sorted(unknown))}")
+    return sorted(requested)
+
+def reference_ids(value: Any) -> List[str]:
+    if isinstance(value, list):
+        return [item for item in value if isinstance(item, str)]
+    return [value] if isinstance(value, str) else []
+
+class ReferenceLoader:
+    """Request-scoped batch loader with a per-collection cache of resolved IDs."""
+    
+    def __init__(self):
+        self.cache: Dict[str, Dict[str, Optional[Dict[str, Any]]]] = {}
+    
+    async def load(self, collection_name: str, ids: set) -> Dict[str, Optional[Dict[str, Any]]]:
+        cached = self.cache.setdefault(collection_name, {})
+        missing = [entity_id for entity_id in ids if entity_id not in cached]
+        if missing:
+            cached.update(dict.fromkeys(missing))
+            projection = REFERENCE_TARGETS[collection_name]
+            async for doc in db[collection_name].find({"id": {"$in": missing}}, projection):
+                cached[doc["id"]] = doc
+        return cached
+
+async def expand_references(model, rows: List[Dict[str, Any]], fields: List[str]):
+    targets = EXPANSIONS[model]
+    wanted: Dict[str, set] = {}
+    for field in fields:
+        ids = wanted.setdefault(targets[field], set())
+        for row in rows:
+            ids.update(reference_ids(row.get(field)))
+    loader = ReferenceLoader()
+    await asyncio.gather(*[loader.load(collection_name, ids) for collection_name, ids in wanted.items() if ids])
+    for row in rows:
+        expanded = {}
+        for field in fields:
+            resolved = loader.cache.get(targets[field], {})
+            value = row.get(field)
+            if isinstance(value, list):
+                expanded[field] = [resolved[entity_id] for entity_id in reference_ids(value) if resolved.get(entity_id)]
+            else:
+                expanded[field] = resolved.get(value) if isinstance(value, str) else None
+        row["expanded"] = expanded
+
+# Index management
+# Every list endpoint filters on an equality prefix and sorts by PAGE_SORT, so
+# each filter combination gets a compound index ending in (created_at, id).
+def page_index(*fields: str) -> IndexModel:
+    keys = [(field, ASCENDING) for field in fields] + [("created_at", DESCENDING), ("id", DESCENDING)]
+    return IndexModel(keys, name="_".join(fields + ("page",)))
+
+# Full-text search uses one weighted text index per collection; names and
+# titles dominate the relevance score, free text only breaks ties.
+def text_index(weights: Dict[str, int]) -> IndexModel:
+    return IndexModel(
+        [(field, TEXT) for field in weights],
+        name="search_text",
+        weights=weights,
+        default_language="english",
+    )
+
+BASE_INDEXES = [
+    IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+    page_index(),
+]
+
+COLLECTION_INDEXES: Dict[str, List[IndexModel]] = {
+    "documents": BASE_INDEXES + [
+        page_index("document_type"),
+        IndexModel([("updated_at", DESCENDING)], name="updated_at"),
+        IndexModel([("tags", ASCENDING)], name="tags"),
+        text_index({"title": 10, "tags": 5}),
+    ],
+    "characters": BASE_INDEXES + [
+        page_index("realm"),
+        page_index("character_type"),
+        page_index("realm", "character_type"),
+        text_index({"name": 10, "description": 1}),
+    ],
+    "weapons": BASE_INDEXES + [
+        page_index("weapon_type"),
+        text_index({"name": 10, "lore": 1}),
+    ],
+    "quests": BASE_INDEXES + [
+        page_index("realm"),
+        page_index("quest_type"),
+        page_index("realm", "quest_type"),
+        text_index({"title": 10, "description": 1}),
+    ],
+    "music_tracks": BASE_INDEXES + [
+        page_index("realm"),
+        page_index("mood"),
+        page_index("realm", "mood"),
+        text_index({"name": 10, "instrumentation": 3}),
+    ],
+    "assets": BASE_INDEXES + [
+        page_index("category"),
+        IndexModel([("tags", ASCENDING)], name="tags"),
+        IndexModel([("sha256", ASCENDING)], name="sha256"),
+    ],
+    "blobs": [
+        IndexModel([("refcount", ASCENDING), ("released_at", ASCENDING)], name="gc"),
+    ],
+    "document_versions": [
+        IndexModel([("document_id", ASCENDING), ("version", DESCENDING)], name="document_version", unique=True),
+    ],
+}
+
+# Representative query shapes for each route, checked with explain() when
+# VERIFY_INDEXES is set so a missing index fails startup instead of scanning.
+_SAMPLE_CURSOR = {"created_at": datetime(2000, 1, 1), "id": ""}
+ROUTE_QUERIES = [
+    ("GET /documents/{id}", "documents", {"id": ""}, None),
+    ("PUT /documents/{id}", "documents", {"id": ""}, None),
+    ("GET /documents", "documents", {}, PAGE_SORT),
+    ("GET /documents?document_type", "documents", {"document_type": DocumentType.GDD.value}, PAGE_SORT),
+    ("GET /documents?cursor", "documents", {"$or": [
+        {"created_at": {"$lt": _SAMPLE_CURSOR["created_at"]}},
+        {"created_at": _SAMPLE_CURSOR["created_at"], "id": {"$lt": _SAMPLE_CURSOR["id"]}},
+    ]}, PAGE_SORT),
+    ("GET /characters/{id}", "characters", {"id": ""}, None),
+    ("GET /characters", "characters", {}, PAGE_SORT),
+    ("GET /characters?realm", "characters", {"realm": RealmType.FOREST.value}, PAGE_SORT),
+    ("GET /characters?character_type", "characters", {"character_type": "hero"}, PAGE_SORT),
+    ("GET /characters?realm&character_type", "characters", {"realm": RealmType.FOREST.value, "character_type": "hero"}, PAGE_SORT),
+    ("GET /weapons", "weapons", {}, PAGE_SORT),
+    ("GET /weapons?weapon_type", "weapons", {"weapon_type": WeaponType.SWORD.value}, PAGE_SORT),
+    ("GET /quests", "quests", {}, PAGE_SORT),
+    ("GET /quests?realm", "quests", {"realm": RealmType.FOREST.value}, PAGE_SORT),
+    ("GET /quests?quest_type", "quests", {"quest_type": "main"}, PAGE_SORT),
+    ("GET /quests?realm&quest_type", "quests", {"realm": RealmType.FOREST.value, "quest_type": "main"}, PAGE_SORT),
+    ("GET /music", "music_tracks", {}, PAGE_SORT),
+    ("GET /music?realm", "music_tracks", {"realm": RealmType.FOREST.value}, PAGE_SORT),
+    ("GET /music?mood", "music_tracks", {"mood": "combat"}, PAGE_SORT),
+    ("GET /music?realm&mood", "music_tracks", {"realm": RealmType.FOREST.value, "mood": "combat"}, PAGE_SORT),
+    ("GET /music/transitions/{realm}", "music_tracks", {"realm": RealmType.FOREST.value}, None),
+    ("GET /assets", "assets", {}, PAGE_SORT),
+    ("GET /assets?category", "assets", {"category": "image"}, PAGE_SORT),
+    ("GET /home (documents activity)", "documents", {}, [("updated_at", DESCENDING)]),
+    ("GET ?expand (characters)", "characters", {"id": {"$in": ["", " "]}}, None),
+    ("GET ?expand (assets)", "assets", {"id": {"$in": ["", " "]}}, None),
+] + [
+    (f"GET /search ({collection_name})", collection_name, {"$text": {"$search": "realm"}}, None)
+    for collection_name in ("documents", "characters", "weapons", "quests", "music_tracks")
+]
+
+async def ensure_indexes():
+    for collection_name, indexes in COLLECTION_INDEXES.items():
+        created = await db[collection_name].create_indexes(indexes)
+        logger.info("Ensured indexes on %s: %s", collection_name, ", ".join(created))
+
+def plan_stages(plan: Dict[str, Any]):
+    yield plan.get("stage")
+    for child_key in ("inputStage", "queryPlan"):
+        if child_key in plan:
+            yield from plan_stages(plan[child_key])
+    for child in plan.get("inputStages", []):
+        yield from plan_stages(child)
+
+async def verify_indexes():
+    collscans = []
+    for route, collection_name, filter_dict, sort in ROUTE_QUERIES:
+        cursor = db[collection_name].find(filter_dict).limit(DEFAULT_PAGE_SIZE)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.explain()
+        if "COLLSCAN" in plan_stages(explain["queryPlanner"]["winningPlan"]):
+            collscans.append(route)
+    if collscans:
+        raise RuntimeError(f"Routes fall back to COLLSCAN: {', '.join(collscans)}")
+    logger.info("Verified index usage for %d route queries", len(ROUTE_QUERIES))
+
+# Response cache
+# GET responses are cached as serialized bytes, keyed by path and query string.
+# Routes are matched on their first segment under /api and depend on the
+# generations of the listed collections, which write paths invalidate.
+# Generations are per process; the TTL bounds staleness across workers.
+RESPONSE_CACHE_MAX_BYTES = int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', str(64 * 1024 ** 2)))
+RESPONSE_CACHE_TTL_SECONDS = float(os.environ.get('RESPONSE_CACHE_TTL_SECONDS', '60'))
+CACHED_ROUTES = {
+    "documents": ("documents",),
+    "characters": ("characters",),
+    "weapons": ("weapons",),
+    "quests": ("quests",),
+    "music": ("music_tracks",),
+    "assets": ("assets",),
+    "dashboard": ("stats",),
+    "search": ("documents", "characters", "weapons", "quests", "music_tracks"),
+    "home": ("stats", "documents", "characters", "weapons", "quests", "music_tracks", "assets"),
+}
+UNCACHED_HEADERS = {"content-length", "etag"}
+response_cache = ResponseCache(RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_TTL_SECONDS)
+
+# If-None-Match uses the weak comparison (RFC 9110 13.1.2): a W/ prefix on
+# either side is ignored, so tags weakened by a compressing proxy still match.
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag.removeprefix("W/") in candidates
+
+# Change feed
+# Write handlers publish to an in-process event bus that /events streams as
+# server-sent events. With CHANGE_STREAMS=1 the bus is fed from MongoDB change
+# streams instead (replica set required), so writes made by other workers and
+# processes reach every subscriber as well.
+EVENT_HISTORY = int(os.environ.get('EVENT_HISTORY', '1000'))
+EVENT_QUEUE_SIZE = int(os.environ.get('EVENT_QUEUE_SIZE', '500'))
+EVENT_HEARTBEAT_SECONDS = float(os.environ.get('EVENT_HEARTBEAT_SECONDS', '15'))
+EVENT_MAX_SUBSCRIBERS = int(os.environ.get('EVENT_MAX_SUBSCRIBERS', '256'))
+CHANGE_STREAMS = os.environ.get('CHANGE_STREAMS', '').lower() in ('1', 'true', 'yes')
+FEED_SOURCES = {  # stored collection -> (feed name, model)
+    "documents": ("documents", BaseDocument),
+    "characters": ("characters", Character),
+    "weapons": ("weapons", Weapon),
+    "quests": ("quests", Quest),
+    "music_tracks": ("music", MusicTrack),
+    "assets": ("assets", Asset),
+}
+FEED_NAMES = {name for name, _ in FEED_SOURCES.values()}
+event_bus = EventBus(EVENT_HISTORY, EVENT_QUEUE_SIZE, EVENT_HEARTBEAT_SECONDS)
+
+def emit_change(collection_name: str, action: str, doc: Optional[Dict[str, Any]] = None, **details):
+    feed_name, model = FEED_SOURCES[collection_name]
+    entity_id = doc.get("id") if doc else None
+    payload = trusted_row(model, doc) if doc and action != "deleted" else None
+    event_bus.publish(feed_name, action, entity_id, payload, **details)
+
+def publish_change(collection_name: str, action: str, doc: Optional[Dict[str, Any]] = None, **details):
+    """Publish from a write handler, unless change streams are the source."""
+    if not CHANGE_STREAMS:
+        emit_change(collection_name, action, doc, **details)
+
+@api_router.get("/events")
+async def stream_events(request: Request, collections: Optional[str] = None):
+    names = requested_fields(collections)
+    unknown = names - FEED_NAMES
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown collections: {', '.join(sorted(unknown))}")
+    last_event_id = request.headers.get("last-event-id") or request.query_params.get("last_event_id")
+    subscription = event_bus.subscribe(names, last_event_id)
+    return StreamingResponse(
+        event_bus.stream(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 # API Routes
 
@@ -176,64 +585,251 @@ async def create_document(document: DocumentCreate):
     doc_dict = document.dict()
     doc_obj = BaseDocument(**doc_dict)
     await db.documents.insert_one(doc_obj.dict())
+    await bump_stats("documents", doc_obj.dict())
+    response_cache.invalidate("documents")
+    index_related(RelatedType.DOCUMENT, doc_obj.dict())
+    index_autocomplete("documents", doc_obj.dict())
+    publish_change("documents", "created", doc_obj.dict())
     return doc_obj
 
 @api_router.get("/documents", response_model=List[BaseDocument])
-async def get_documents(document_type: Optional[DocumentType] = None, limit: int = 100):
+async def get_documents(
+    response: Response,
+    document_type: Optional[DocumentType] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
+):
+    projection = parse_fields(BaseDocument, fields)
     filter_dict = {}
     if document_type:
         filter_dict["document_type"] = document_type
     
-    documents = await db.documents.find(filter_dict).limit(limit).to_list(limit)
-    return [BaseDocument(**doc) for doc in documents]
+    documents = await paginate(db.documents, filter_dict, limit, cursor, response, projection)
+    return await page_response(BaseDocument, documents, response, projection)
 
 @api_router.get("/documents/{document_id}", response_model=BaseDocument)
 async def get_document(document_id: str):
     document = await db.documents.find_one({"id": document_id})
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
-    return BaseDocument(**document)
+    return TimedJSONResponse(trusted_row(BaseDocument, document))
 
 @api_router.put("/documents/{document_id}", response_model=BaseDocument)
-async def update_document(document_id: str, updates: Dict[str, Any]):
+async def update_document(document_id: str, document: DocumentUpdate):
+    updates = document.dict(exclude_unset=True, exclude_none=True)
     updates["updated_at"] = datetime.utcnow()
+    updates["history_tracked"] = True
     
-    existing = await db.documents.find_one({"id": document_id})
-    if not existing:
+    # Single atomic write; the pre-image feeds the version history
+    previous = await db.documents.find_one_and_update(
+        {"id": document_id},
+        {"$set": updates, "$inc": {"version": 1}},
+        return_document=ReturnDocument.BEFORE
+    )
+    if not previous:
         raise HTTPException(status_code=404, detail="Document not found")
     
-    # Increment version
-    updates["version"] = existing.get("version", 1) + 1
+    updated_doc = {**previous, **updates, "version": previous.get("version", 0) + 1}
+    await finish_document_update(previous, updated_doc)
+    return BaseDocument(**updated_doc)
+
+# Partial updates: RFC 6902 operations or dotted set/unset paths are turned
+# into targeted $set/$unset/$push operators, so autosave traffic scales with
+# the edit. expected_version makes the write conditional on the stored version.
+# Only patches ending a path in a number read the document first, to learn
+# whether that number indexes an array or names an object key.
+PATCHABLE_DOCUMENT_FIELDS = ("title", "document_type", "content", "tags")
+
+def validate_document_patch(steps):
+    for op, path, value in steps:
+        try:
+            if len(path) == 1 and op == "$set":
+                DocumentUpdate(**{path[0]: value})
+            elif path[0] == "tags":
+                DocumentUpdate(tags=[value])
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=[{"loc": ["/".join(path)], "msg": err["msg"]} for err in e.errors()])
+        if len(path) == 1 and value is None:
+            raise HTTPException(status_code=422, detail=f"{path[0]} cannot be null")
+
+@api_router.patch("/documents/{document_id}", response_model=BaseDocument)
+async def patch_document(
+    document_id: str,
+    patch: Union[List[Dict[str, Any]], Dict[str, Any]] = Body(...),
+    expected_version: Optional[int] = None
+):
+    # Numeric last tokens need the stored parent to tell indexes from keys
+    stored = {}
+    roots = indexed_roots(patch) & set(PATCHABLE_DOCUMENT_FIELDS)
+    if roots:
+        stored = await db.documents.find_one({"id": document_id}, {root: 1 for root in roots})
+        if not stored:
+            raise HTTPException(status_code=404, detail="Document not found")
+    try:
+        steps, conditions = parse_patch(patch, PATCHABLE_DOCUMENT_FIELDS, stored)
+    except PatchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    validate_document_patch(steps)
+    
+    update = to_update(steps)
+    update.setdefault("$set", {}).update({"updated_at": datetime.utcnow(), "history_tracked": True})
+    update["$inc"] = {"version": 1}
+    query = {"id": document_id, **conditions}
+    if expected_version is not None:
+        query["version"] = expected_version
+    
+    try:
+        previous = await db.documents.find_one_and_update(query, update, return_document=ReturnDocument.BEFORE)
+    except WriteError as e:
+        raise HTTPException(status_code=400, detail=e.details.get("errmsg", str(e)) if e.details else str(e))
+    if not previous:
+        current = await db.documents.find_one({"id": document_id}, {"version": 1})
+        if not current:
+            raise HTTPException(status_code=404, detail="Document not found")
+        raise HTTPException(status_code=409, detail={"message": "Precondition failed", "version": current.get("version")})
     
-    await db.documents.update_one({"id": document_id}, {"$set": updates})
-    updated_doc = await db.documents.find_one({"id": document_id})
+    updated_doc = apply_steps(copy.deepcopy(previous), steps)
+    updated_doc["updated_at"] = update["$set"]["updated_at"]
+    updated_doc["history_tracked"] = True
+    updated_doc["version"] = previous.get("version", 0) + 1
+    await finish_document_update(previous, updated_doc)
     return BaseDocument(**updated_doc)
 
+async def finish_document_update(previous: Dict[str, Any], updated_doc: Dict[str, Any]):
+    await record_document_version(previous, updated_doc)
+    await move_stats("documents", previous, updated_doc)
+    response_cache.invalidate("documents")
+    index_related(RelatedType.DOCUMENT, updated_doc)
+    index_autocomplete("documents", updated_doc)
+    publish_change("documents", "updated", updated_doc)
+
+# Document history
+# Each revision is stored as a delta against the previous one, with a full
+# keyframe every DOCUMENT_KEYFRAME_INTERVAL versions, so rebuilding any version
+# replays at most that many deltas. Documents written before history existed
+# get a keyframe of their pre-image on their first tracked update.
+DOCUMENT_KEYFRAME_INTERVAL = 10
+HISTORY_EXCLUDED_FIELDS = {"_id", "history_tracked"}
+
+def history_snapshot(doc: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in doc.items() if key not in HISTORY_EXCLUDED_FIELDS}
+
+def keyframe_entry(doc: Dict[str, Any], changed: List[str]) -> Dict[str, Any]:
+    return {
+        "document_id": doc["id"],
+        "version": doc["version"],
+        "kind": "keyframe",
+        "snapshot": history_snapshot(doc),
+        "changed_fields": changed,
+        "created_at": doc.get("updated_at", datetime.utcnow())
+    }
+
+async def record_document_version(previous: Dict[str, Any], updated: Dict[str, Any]):
+    entries = []
+    if not previous.get("history_tracked"):
+        entries.append(keyframe_entry({"version": 1, **previous}, []))
+    delta = compute_delta(history_snapshot(previous), history_snapshot(updated))
+    if updated["version"] % DOCUMENT_KEYFRAME_INTERVAL == 1:
+        entries.append(keyframe_entry(updated, changed_fields(delta)))
+    else:
+        entries.append({
+            "document_id": updated["id"],
+            "version": updated["version"],
+            "kind": "delta",
+            "delta": delta,
+            "changed_fields": changed_fields(delta),
+            "created_at": updated["updated_at"]
+        })
+    await db.document_versions.insert_many(entries)
+
+async def load_document_version(document_id: str, version: int) -> Optional[Dict[str, Any]]:
+    keyframe = await db.document_versions.find_one(
+        {"document_id": document_id, "kind": "keyframe", "version": {"$lte": version}},
+        sort=[("version", DESCENDING)]
+    )
+    if not keyframe:
+        return None
+    deltas = await db.document_versions.find(
+        {"document_id": document_id, "version": {"$gt": keyframe["version"], "$lte": version}}
+    ).sort("version", ASCENDING).to_list(DOCUMENT_KEYFRAME_INTERVAL)
+    if [entry["version"] for entry in deltas] != list(range(keyframe["version"] + 1, version + 1)):
+        return None
+    doc = keyframe["snapshot"]
+    for entry in deltas:
+        doc = entry["snapshot"] if entry["kind"] == "keyframe" else apply_delta(doc, entry["delta"])
+    return doc
+
+@api_router.get("/documents/{document_id}/versions")
+async def get_document_versions(document_id: str, limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE)):
+    versions = await db.document_versions.find(
+        {"document_id": document_id},
+        {"_id": 0, "version": 1, "kind": 1, "changed_fields": 1, "created_at": 1}
+    ).sort("version", DESCENDING).limit(limit).to_list(limit)
+    if not versions:
+        current = await db.documents.find_one({"id": document_id}, {"_id": 0, "version": 1, "updated_at": 1})
+        if not current:
+            raise HTTPException(status_code=404, detail="Document not found")
+        versions = [{"version": current.get("version", 1), "kind": "current", "changed_fields": [], "created_at": current.get("updated_at")}]
+    return versions
+
+@api_router.get("/documents/{document_id}/versions/{version}", response_model=BaseDocument)
+async def get_document_version(document_id: str, version: int):
+    doc = await load_document_version(document_id, version)
+    if doc is None:
+        current = await db.documents.find_one({"id": document_id})
+        if not current or current.get("version", 1) != version:
+            raise HTTPException(status_code=404, detail="Version not found")
+        doc = current
+    return TimedJSONResponse(trusted_row(BaseDocument, doc))
+
 # Character Management
 @api_router.post("/characters", response_model=Character)
 async def create_character(character: CharacterCreate):
     char_dict = character.dict()
     char_obj = Character(**char_dict)
     await db.characters.insert_one(char_obj.dict())
+    await bump_stats("characters", char_obj.dict())
+    response_cache.invalidate("characters")
+    index_related(RelatedType.CHARACTER, char_obj.dict())
+    index_autocomplete("characters", char_obj.dict())
+    publish_change("characters", "created", char_obj.dict())
     return char_obj
 
 @api_router.get("/characters", response_model=List[Character])
-async def get_characters(realm: Optional[RealmType] = None, character_type: Optional[str] = None):
+async def get_characters(
+    response: Response,
+    realm: Optional[RealmType] = None,
+    character_type: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    expand: Optional[str] = None
+):
+    expand_fields = parse_expand(Character, expand)
+    projection = parse_fields(Character, fields, expand_fields)
     filter_dict = {}
     if realm:
         filter_dict["realm"] = realm
     if character_type:
         filter_dict["character_type"] = character_type
     
-    characters = await db.characters.find(filter_dict).to_list(100)
-    return [Character(**char) for char in characters]
+    characters = await paginate(db.characters, filter_dict, limit, cursor, response, projection)
+    return await page_response(Character, characters, response, projection, expand_fields)
 
 @api_router.get("/characters/{character_id}", response_model=Character)
-async def get_character(character_id: str):
-    character = await db.characters.find_one({"id": character_id})
-    if not character:
-        raise HTTPException(status_code=404, detail="Character not found")
-    return Character(**character)
+async def get_character(character_id: str, expand: Optional[str] = None):
+    return await get_entity(db.characters, Character, character_id, expand, "Character not found")
+
+async def get_entity(collection, model, entity_id: str, expand: Optional[str], not_found: str):
+    expand_fields = parse_expand(model, expand)
+    doc = await collection.find_one({"id": entity_id})
+    if not doc:
+        raise HTTPException(status_code=404, detail=not_found)
+    row = trusted_row(model, doc)
+    if expand_fields:
+        await expand_references(model, [row], expand_fields)
+    return TimedJSONResponse(row)
 
 # Weapon Management
 @api_router.post("/weapons", response_model=Weapon)
@@ -241,16 +837,116 @@ async def create_weapon(weapon: WeaponCreate):
     weapon_dict = weapon.dict()
     weapon_obj = Weapon(**weapon_dict)
     await db.weapons.insert_one(weapon_obj.dict())
+    await bump_stats("weapons", weapon_obj.dict())
+    response_cache.invalidate("weapons")
+    index_related(RelatedType.WEAPON, weapon_obj.dict())
+    index_autocomplete("weapons", weapon_obj.dict())
+    publish_change("weapons", "created", weapon_obj.dict())
     return weapon_obj
 
 @api_router.get("/weapons", response_model=List[Weapon])
-async def get_weapons(weapon_type: Optional[WeaponType] = None):
+async def get_weapons(
+    response: Response,
+    weapon_type: Optional[WeaponType] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    expand: Optional[str] = None
+):
+    expand_fields = parse_expand(Weapon, expand)
+    projection = parse_fields(Weapon, fields, expand_fields)
     filter_dict = {}
     if weapon_type:
         filter_dict["weapon_type"] = weapon_type
     
-    weapons = await db.weapons.find(filter_dict).to_list(100)
-    return [Weapon(**weapon) for weapon in weapons]
+    weapons = await paginate(db.weapons, filter_dict, limit, cursor, response, projection)
+    return await page_response(Weapon, weapons, response, projection, expand_fields)
+
+# Weapon balance
+# Every weapon/upgrade-tier row is simulated in one vectorized pass (see
+# balance.py). Monte-Carlo runs are split into chunks of rows on a process
+# pool. Results are cached per weapon content hash and simulation parameters,
+# so a balance pass only simulates weapons that changed since the last one.
+SIMULATION_WORKERS = int(os.environ.get('SIMULATION_WORKERS', '2'))
+SIMULATION_CHUNK_ROWS = 256
+BALANCE_CACHE_ENTRIES = int(os.environ.get('BALANCE_CACHE_ENTRIES', '20000'))
+BALANCE_PROJECTION = {"_id": 0, "id": 1, "name": 1, **{field: 1 for field in balance.BALANCE_FIELDS}}
+balance_cache = balance.ResultCache(BALANCE_CACHE_ENTRIES)
+
+async def simulate_weapons(
+    weapons: List[Dict[str, Any]], monte_carlo: bool, iterations: int, fight_seconds: float, variance: float
+) -> List[List[Dict[str, Any]]]:
+    weapon_tiers = [balance.weapon_tiers(weapon) for weapon in weapons]
+    rows = [tier for tiers in weapon_tiers for tier in tiers]
+    results = await asyncio.to_thread(balance.expected, rows)
+    
+    if monte_carlo:
+        # Seeds come from the content hash, so cached and fresh runs agree
+        seeds = [
+            int(balance.content_hash(weapon)[:8], 16) + position
+            for weapon, tiers in zip(weapons, weapon_tiers)
+            for position in range(len(tiers))
+        ]
+        loop = asyncio.get_running_loop()
+        chunks = await asyncio.gather(*[
+            loop.run_in_executor(
+                app.state.simulation_pool, balance.monte_carlo,
+                rows[start:start + SIMULATION_CHUNK_ROWS], seeds[start:start + SIMULATION_CHUNK_ROWS],
+                iterations, fight_seconds, variance
+            )
+            for start in range(0, len(rows), SIMULATION_CHUNK_ROWS)
+        ])
+        for result, sampled in zip(results, [item for chunk in chunks for item in chunk]):
+            result["monte_carlo"] = sampled
+    
+    grouped, start = [], 0
+    for tiers in weapon_tiers:
+        grouped.append(results[start:start + len(tiers)])
+        start += len(tiers)
+    return grouped
+
+@api_router.get("/weapons/balance")
+async def get_weapon_balance(
+    weapon_type: Optional[WeaponType] = None,
+    ids: Optional[str] = None,
+    monte_carlo: bool = False,
+    iterations: int = Query(1000, ge=100, le=10000),
+    fight_seconds: float = Query(30.0, gt=0, le=120),
+    variance: float = Query(0.1, ge=0, le=1)
+):
+    filter_dict = {}
+    if weapon_type:
+        filter_dict["weapon_type"] = weapon_type
+    if ids:
+        filter_dict["id"] = {"$in": [weapon_id.strip() for weapon_id in ids.split(",") if weapon_id.strip()]}
+    weapons = await db.weapons.find(filter_dict, BALANCE_PROJECTION).to_list(None)
+    weapons.sort(key=lambda weapon: (weapon.get("name") or "", weapon["id"]))
+    
+    params = (iterations, fight_seconds, variance) if monte_carlo else ()
+    keys = [(balance.content_hash(weapon), params) for weapon in weapons]
+    tiers = [balance_cache.get(key) for key in keys]
+    missing = [position for position, cached in enumerate(tiers) if cached is None]
+    if missing:
+        fresh = await simulate_weapons(
+            [weapons[position] for position in missing], monte_carlo, iterations, fight_seconds, variance
+        )
+        for position, result in zip(missing, fresh):
+            balance_cache.put(keys[position], result)
+            tiers[position] = result
+    
+    return TimedJSONResponse({
+        "monte_carlo": monte_carlo,
+        "simulated": len(missing),
+        "cached": len(weapons) - len(missing),
+        "weapons": [
+            {"id": weapon["id"], "name": weapon.get("name"), "weapon_type": weapon.get("weapon_type"), "tiers": result}
+            for weapon, result in zip(weapons, tiers)
+        ]
+    })
+
+@api_router.get("/weapons/{weapon_id}", response_model=Weapon)
+async def get_weapon(weapon_id: str, expand: Optional[str] = None):
+    return await get_entity(db.weapons, Weapon, weapon_id, expand, "Weapon not found")
 
 # Quest Management
 @api_router.post("/quests", response_model=Quest)
@@ -258,39 +954,380 @@ async def create_quest(quest: QuestCreate):
     quest_dict = quest.dict()
     quest_obj = Quest(**quest_dict)
     await db.quests.insert_one(quest_obj.dict())
+    await bump_stats("quests", quest_obj.dict())
+    response_cache.invalidate("quests")
+    index_related(RelatedType.QUEST, quest_obj.dict())
+    index_autocomplete("quests", quest_obj.dict())
+    publish_change("quests", "created", quest_obj.dict())
     return quest_obj
 
 @api_router.get("/quests", response_model=List[Quest])
-async def get_quests(realm: Optional[RealmType] = None, quest_type: Optional[str] = None):
+async def get_quests(
+    response: Response,
+    realm: Optional[RealmType] = None,
+    quest_type: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    expand: Optional[str] = None
+):
+    expand_fields = parse_expand(Quest, expand)
+    projection = parse_fields(Quest, fields, expand_fields)
     filter_dict = {}
     if realm:
         filter_dict["realm"] = realm
     if quest_type:
         filter_dict["quest_type"] = quest_type
     
-    quests = await db.quests.find(filter_dict).to_list(100)
-    return [Quest(**quest) for quest in quests]
+    quests = await paginate(db.quests, filter_dict, limit, cursor, response, projection)
+    return await page_response(Quest, quests, response, projection, expand_fields)
+
+@api_router.get("/quests/{quest_id}", response_model=Quest)
+async def get_quest(quest_id: str, expand: Optional[str] = None):
+    return await get_entity(db.quests, Quest, quest_id, expand, "Quest not found")
 
 # Music Management
 @api_router.post("/music", response_model=MusicTrack)
 async def create_music_track(track: MusicTrackCreate):
     track_dict = track.dict()
+    if track.asset_id:
+        asset = await db.assets.find_one({"id": track.asset_id}, {"derivatives.analysis": 1})
+        if not asset:
+            raise HTTPException(status_code=400, detail="Asset not found")
+        analysis = asset.get("derivatives", {}).get("analysis") or {}
+        if track_dict["tempo"] is None and analysis.get("bpm"):
+            track_dict["tempo"] = round(analysis["bpm"])
+    if track_dict["tempo"] is None:
+        raise HTTPException(status_code=400, detail="Tempo is required unless the asset has an analyzed BPM")
     track_obj = MusicTrack(**track_dict)
     await db.music_tracks.insert_one(track_obj.dict())
+    await bump_stats("music_tracks", track_obj.dict())
+    response_cache.invalidate("music_tracks")
+    index_autocomplete("music_tracks", track_obj.dict())
+    update_transitions(track_obj.dict())
+    publish_change("music_tracks", "created", track_obj.dict())
     return track_obj
 
 @api_router.get("/music", response_model=List[MusicTrack])
-async def get_music_tracks(realm: Optional[RealmType] = None, mood: Optional[str] = None):
+async def get_music_tracks(
+    response: Response,
+    realm: Optional[RealmType] = None,
+    mood: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    expand: Optional[str] = None
+):
+    expand_fields = parse_expand(MusicTrack, expand)
+    projection = parse_fields(MusicTrack, fields, expand_fields)
     filter_dict = {}
     if realm:
         filter_dict["realm"] = realm
     if mood:
         filter_dict["mood"] = mood
     
-    tracks = await db.music_tracks.find(filter_dict).to_list(100)
-    return [MusicTrack(**track) for track in tracks]
+    tracks = await paginate(db.music_tracks, filter_dict, limit, cursor, response, projection)
+    return await page_response(MusicTrack, tracks, response, projection, expand_fields)
+
+@api_router.get("/music/{track_id}", response_model=MusicTrack)
+async def get_music_track(track_id: str, expand: Optional[str] = None):
+    return await get_entity(db.music_tracks, MusicTrack, track_id, expand, "Music track not found")
+
+# Music transitions
+# Pairwise crossfade scores per realm (see transitions.py). A realm's matrix is
+# computed in one vectorized pass the first time it is requested and then kept
+# current by the write handlers, which only recompute the changed track's row
+# and column. Writes that land while a realm is being built are queued and
+# replayed onto the new matrix. Bulk imports and restores drop the cached
+# realms instead, and a build they interrupt is not cached.
+TRANSITION_MATRIX_MAX_TRACKS = int(os.environ.get('TRANSITION_MATRIX_MAX_TRACKS', '2000'))
+TRANSITION_FIELDS = {"_id": 0, "id": 1, "name": 1, "realm": 1, "mood": 1, "tempo": 1, "key": 1}
+transition_matrices: Dict[str, RealmMatrix] = {}
+transition_pending: Dict[str, List[Dict[str, Any]]] = {}
+transition_lock = asyncio.Lock()
+
+def transition_track(doc: Dict[str, Any]) -> Dict[str, Any]:
+    return {field: doc.get(field) for field in TRANSITION_FIELDS if field != "_id"}
+
+def update_transitions(doc: Dict[str, Any]):
+    realm = RealmType(doc["realm"]).value
+    matrix = transition_matrices.get(realm)
+    if matrix is not None:
+        matrix.upsert(transition_track(doc))
+    elif realm in transition_pending:
+        transition_pending[realm].append(transition_track(doc))
+
+def reset_transitions():
+    transition_matrices.clear()
+    transition_pending.clear()
+
+async def realm_transitions(realm: RealmType) -> RealmMatrix:
+    matrix = transition_matrices.get(realm.value)
+    if matrix is None:
+        async with transition_lock:
+            matrix = transition_matrices.get(realm.value)
+            if matrix is None:
+                pending = transition_pending[realm.value] = []
+                try:
+                    tracks = await db.music_tracks.find({"realm": realm.value}, TRANSITION_FIELDS).to_list(None)
+                    matrix = await asyncio.to_thread(RealmMatrix, tracks, TRANSITION_MATRIX_MAX_TRACKS)
+                finally:
+                    current = transition_pending.pop(realm.value, None) is pending
+                for track in pending:
+                    matrix.upsert(track)
+                if current:
+                    transition_matrices[realm.value] = matrix
+    return matrix
+
+def transition_summary(track: Dict[str, Any]) -> Dict[str, Any]:
+    return {field: track.get(field) for field in ("id", "name", "mood", "tempo", "key")}
+
+@api_router.get("/music/transitions/{realm}")
+async def get_transition_matrix(realm: RealmType):
+    matrix = await realm_transitions(realm)
+    if not matrix.materialized:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Realm has {len(matrix)} tracks; the full matrix is limited to {TRANSITION_MATRIX_MAX_TRACKS}"
+        )
+    return TimedJSONResponse({
+        "realm": realm.value,
+        "tracks": [transition_summary(track) for track in matrix.tracks],
+        "scores": matrix.matrix.round(3)
+    })
+
+@api_router.get("/music/{track_id}/transitions")
+async def get_transition_candidates(
+    track_id: str,
+    limit: int = Query(10, ge=1, le=100),
+    mood: Optional[str] = None,
+    min_score: float = Query(0.0, ge=0.0, le=1.0)
+):
+    track = await db.music_tracks.find_one({"id": track_id}, TRANSITION_FIELDS)
+    if not track:
+        raise HTTPException(status_code=404, detail="Music track not found")
+    matrix = await realm_transitions(RealmType(track["realm"]))
+    if track_id not in matrix.row_of:
+        matrix.upsert(transition_track(track))
+    
+    return TimedJSONResponse({
+        "track": transition_summary(track),
+        "candidates": [
+            {**transition_summary(matrix.tracks[row]), "score": score, "components": components}
+            for row, score, components in matrix.candidates(track_id, limit, mood, min_score)
+        ]
+    })
 
 # Asset Management
+# Asset bytes are content-addressed: each distinct SHA-256 is stored once
+# under uploads/blobs and tracked in db.blobs with a reference count. An
+# upload is hashed first, straight from the spooled request file, so a
+# duplicate costs one hash pass and a metadata insert with no disk write.
+# Chunks are hashed and written in worker threads to keep the event loop free.
+# Garbage collection first claims a blob with a conditional update, then
+# unlinks its files and only then drops the record. A re-upload revives a blob
+# with an increment conditioned on that same claim being absent, and waits for
+# a collection in progress to finish before writing the file again.
+UPLOADS_DIR = Path("uploads")
+BLOBS_DIR = UPLOADS_DIR / "blobs"
+MAX_UPLOAD_BYTES = int(os.environ.get('MAX_UPLOAD_BYTES', str(2 * 1024 ** 3)))
+UPLOAD_CHUNK_BYTES = 1024 ** 2
+UPLOAD_FORM_OVERHEAD = 64 * 1024
+BLOB_GC_GRACE_SECONDS = int(os.environ.get('BLOB_GC_GRACE_SECONDS', '3600'))
+BLOB_GC_CLAIM_SECONDS = 600  # a collector that died mid-claim is taken over after this
+BLOB_COLLECT_WAIT_SECONDS = 5.0
+
+# Derivatives (thumbnails, waveform peaks) are built per blob by a small set of
+# consumers feeding a process pool. The queue is bounded and uploads only
+# put_nowait, so a backlog marks new assets as skipped instead of slowing them.
+# A job is claimed on the blob first, so uploading the same content again while
+# it is pending, or after it is built, never queues a second job. Claims left
+# by a restarted worker expire after DERIVATIVE_CLAIM_SECONDS.
+DERIVED_DIR = UPLOADS_DIR / "derived"
+DERIVATIVE_WORKERS = int(os.environ.get('DERIVATIVE_WORKERS', '2'))
+DERIVATIVE_CLAIM_SECONDS = int(os.environ.get('DERIVATIVE_CLAIM_SECONDS', '3600'))
+DERIVATIVE_ACTIVE = ("pending", "processing")
+DERIVATIVE_QUEUE_SIZE = int(os.environ.get('DERIVATIVE_QUEUE_SIZE', '100'))
+THUMBNAIL_SIZES = (128, 512)
+WAV_CONTENT_TYPES = {"audio/wav", "audio/x-wav", "audio/wave", "audio/vnd.wave"}
+derivative_queue: asyncio.Queue = asyncio.Queue(maxsize=DERIVATIVE_QUEUE_SIZE)
+
+async def hash_upload(file: UploadFile):
+    digest = hashlib.sha256()
+    size = 0
+    while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+        size += len(chunk)
+        if size > MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail="File too large")
+        await asyncio.to_thread(digest.update, chunk)
+    return size, digest.hexdigest()
+
+async def copy_upload(file: UploadFile, file_path: Path):
+    await file.seek(0)
+    partial_path = file_path.with_name(f".{uuid.uuid4()}.part")
+    buffer = await asyncio.to_thread(open, partial_path, "wb")
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+            await asyncio.to_thread(buffer.write, chunk)
+    except BaseException:
+        await asyncio.to_thread(buffer.close)
+        await asyncio.to_thread(partial_path.unlink, True)
+        raise
+    await asyncio.to_thread(buffer.close)
+    await asyncio.to_thread(os.replace, partial_path, file_path)
+
+async def store_blob(file: UploadFile):
+    size, sha256 = await hash_upload(file)
+    deadline = time.monotonic() + BLOB_COLLECT_WAIT_SECONDS
+    while True:
+        with pymongo.timeout(QUERY_BUDGET_SECONDS):
+            blob = await db.blobs.find_one_and_update(
+                {"_id": sha256, "collecting": {"$exists": False}}, {"$inc": {"refcount": 1}}
+            )
+            if blob:
+                return blob["file_path"], size, sha256
+            if not await db.blobs.find_one({"_id": sha256}, {"_id": 1}):
+                break
+        # Being collected: its file goes away before its record does
+        if time.monotonic() > deadline:
+            raise HTTPException(status_code=503, detail="Blob is being garbage collected; retry the upload")
+        await asyncio.sleep(0.05)
+    
+    suffix = Path(file.filename or "").suffix.lower()
+    file_path = BLOBS_DIR / sha256[:2] / f"{sha256}{suffix}"
+    await asyncio.to_thread(file_path.parent.mkdir, parents=True, exist_ok=True)
+    await copy_upload(file, file_path)
+    with pymongo.timeout(QUERY_BUDGET_SECONDS):
+        blob = await db.blobs.find_one_and_update(
+            {"_id": sha256},
+            {
+                "$inc": {"refcount": 1},
+                "$setOnInsert": {"file_path": str(file_path), "size": size, "created_at": datetime.utcnow()}
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+    return blob["file_path"], size, sha256
+
+async def release_blob(sha256: str):
+    await db.blobs.update_one(
+        {"_id": sha256},
+        {"$inc": {"refcount": -1}, "$set": {"released_at": datetime.utcnow()}}
+    )
+
+async def collect_blob_garbage():
+    cutoff = datetime.utcnow() - timedelta(seconds=BLOB_GC_GRACE_SECONDS)
+    reclaimed_blobs = reclaimed_bytes = 0
+    stale_claim = datetime.utcnow() - timedelta(seconds=BLOB_GC_CLAIM_SECONDS)
+    async for blob in db.blobs.find({"refcount": {"$lte": 0}, "released_at": {"$lt": cutoff}}):
+        claimed_at = datetime.utcnow()
+        claim = await db.blobs.update_one(
+            {
+                "_id": blob["_id"],
+                "refcount": {"$lte": 0},
+                "released_at": {"$lt": cutoff},
+                "$or": [{"collecting": {"$exists": False}}, {"collecting": {"$lt": stale_claim}}]
+            },
+            {"$set": {"collecting": claimed_at}}
+        )
+        if not claim.modified_count:
+            continue
+        try:
+            await asyncio.to_thread(Path(blob["file_path"]).unlink, True)
+            await asyncio.to_thread(shutil.rmtree, DERIVED_DIR / blob["_id"], True)
+        finally:
+            await db.blobs.delete_one({"_id": blob["_id"], "collecting": claimed_at})
+        reclaimed_blobs += 1
+        reclaimed_bytes += blob.get("size", 0)
+    
+    # Files left behind by interrupted uploads or lost upsert races
+    known = {blob["file_path"] async for blob in db.blobs.find({}, {"file_path": 1})}
+    
+    def remove_orphans():
+        removed = 0
+        for path in BLOBS_DIR.glob("*/*"):
+            if str(path) not in known and datetime.utcfromtimestamp(path.stat().st_mtime) < cutoff:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+    
+    orphans_removed = await asyncio.to_thread(remove_orphans)
+    return {
+        "reclaimed_blobs": reclaimed_blobs,
+        "reclaimed_bytes": reclaimed_bytes,
+        "orphans_removed": orphans_removed
+    }
+
+def derivative_kind(file_type: str, file_path: str) -> Optional[str]:
+    if file_type.startswith("image/"):
+        return "image"
+    if file_type in WAV_CONTENT_TYPES or file_path.lower().endswith(".wav"):
+        return "wav"
+    return None
+
+async def claim_derivatives(sha256: str, rebuild: bool = False) -> bool:
+    """Mark the blob's derivative job pending; False when a job is already
+    queued or running, or (unless ``rebuild``) derivatives are already built."""
+    now = datetime.utcnow()
+    query = {"_id": sha256, "$or": [
+        {"derivatives_status": {"$nin": list(DERIVATIVE_ACTIVE)}},
+        {"derivatives_claimed_at": {"$lt": now - timedelta(seconds=DERIVATIVE_CLAIM_SECONDS)}},
+    ]}
+    if not rebuild:
+        query["derivatives"] = {"$exists": False}
+    result = await db.blobs.update_one(
+        query, {"$set": {"derivatives_status": "pending", "derivatives_claimed_at": now}}
+    )
+    return bool(result.modified_count)
+
+def enqueue_derivatives(asset: Asset) -> bool:
+    try:
+        derivative_queue.put_nowait((asset.sha256, asset.file_path, derivative_kind(asset.file_type, asset.file_path)))
+    except asyncio.QueueFull:
+        return False
+    return True
+
+async def publish_blob_assets(sha256: str):
+    if CHANGE_STREAMS:
+        return
+    async for asset in db.assets.find({"sha256": sha256}):
+        emit_change("assets", "updated", asset)
+
+async def derivative_worker(pool: ProcessPoolExecutor):
+    loop = asyncio.get_running_loop()
+    while True:
+        sha256, file_path, kind = await derivative_queue.get()
+        try:
+            await db.blobs.update_one({"_id": sha256}, {"$set": {"derivatives_status": "processing"}})
+            await db.assets.update_many(
+                {"sha256": sha256, "derivatives_status": "pending"},
+                {"$set": {"derivatives_status": "processing"}}
+            )
+            derivatives = await loop.run_in_executor(
+                pool, media.build_derivatives, file_path, str(DERIVED_DIR / sha256), kind, THUMBNAIL_SIZES
+            )
+            status = "ready"
+        except Exception:
+            logger.exception("Derivative generation failed for blob %s", sha256)
+            derivatives, status = {}, "failed"
+        try:
+            # The blob first: an upload that read it as in progress re-reads
+            # it after inserting its asset (see upload_asset)
+            await db.blobs.update_one(
+                {"_id": sha256},
+                {"$set": {"derivatives_status": status, **({"derivatives": derivatives} if status == "ready" else {})}}
+            )
+            await db.assets.update_many(
+                {"sha256": sha256},
+                {"$set": {"derivatives": derivatives, "derivatives_status": status}}
+            )
+            response_cache.invalidate("assets")
+            await publish_blob_assets(sha256)
+        except Exception:
+            logger.exception("Recording derivatives failed for blob %s", sha256)
+        finally:
+            derivative_queue.task_done()
+
 @api_router.post("/assets", response_model=Asset)
 async def upload_asset(
     file: UploadFile = File(...),
@@ -299,117 +1336,938 @@ async def upload_asset(
     description: Optional[str] = Form(None),
     tags: str = Form("[]")
 ):
-    # Create uploads directory if it doesn't exist
-    uploads_dir = Path("uploads")
-    uploads_dir.mkdir(exist_ok=True)
-    
-    # Save file
-    file_path = uploads_dir / f"{uuid.uuid4()}_{file.filename}"
-    with open(file_path, "wb") as buffer:
-        content = await file.read()
-        buffer.write(content)
-    
     # Parse tags
     tags_list = json.loads(tags) if tags else []
     
-    # Create asset record
-    asset_obj = Asset(
-        name=name,
-        file_path=str(file_path),
-        file_type=file.content_type or "unknown",
-        category=category,
-        description=description,
-        tags=tags_list
-    )
+    # Store bytes once per distinct content
+    file_path, size, sha256 = await store_blob(file)
+    file_type = file.content_type or "unknown"
     
-    await db.assets.insert_one(asset_obj.dict())
+    # The bytes are in; the remaining queries share one budget from here
+    with pymongo.timeout(QUERY_BUDGET_SECONDS):
+        # Reuse derivatives already built for this blob, or the job building them
+        derivatives, derivatives_status, claimed = {}, None, False
+        if derivative_kind(file_type, file_path):
+            claimed = await claim_derivatives(sha256)
+            if claimed:
+                derivatives_status = "pending"
+            else:
+                blob = await db.blobs.find_one({"_id": sha256}, {"derivatives": 1, "derivatives_status": 1}) or {}
+                derivatives = blob.get("derivatives") or {}
+                derivatives_status = "ready" if derivatives else blob.get("derivatives_status", "pending")
+    
+        # Create asset record
+        asset_obj = Asset(
+            name=name,
+            file_path=str(file_path),
+            file_type=file_type,
+            category=category,
+            description=description,
+            tags=tags_list,
+            size=size,
+            sha256=sha256,
+            derivatives=derivatives,
+            derivatives_status=derivatives_status
+        )
+    
+        await db.assets.insert_one(asset_obj.dict())
+        await bump_stats("assets", asset_obj.dict())
+        response_cache.invalidate("assets")
+        if claimed and not enqueue_derivatives(asset_obj):
+            asset_obj.derivatives_status = "skipped"
+            await db.blobs.update_one({"_id": sha256}, {"$set": {"derivatives_status": "skipped"}})
+            await db.assets.update_one({"id": asset_obj.id}, {"$set": {"derivatives_status": "skipped"}})
+        elif derivatives_status in DERIVATIVE_ACTIVE and not claimed:
+            # The job may have finished between reading the blob and the insert
+            blob = await db.blobs.find_one({"_id": sha256}, {"derivatives": 1, "derivatives_status": 1}) or {}
+            if blob.get("derivatives_status") not in DERIVATIVE_ACTIVE:
+                asset_obj.derivatives = blob.get("derivatives") or {}
+                asset_obj.derivatives_status = blob.get("derivatives_status") or "skipped"
+                await db.assets.update_one(
+                    {"id": asset_obj.id},
+                    {"$set": {"derivatives": asset_obj.derivatives, "derivatives_status": asset_obj.derivatives_status}}
+                )
+    publish_change("assets", "created", asset_obj.dict())
     return asset_obj
 
+@api_router.get("/assets/{asset_id}/derivatives")
+async def get_asset_derivatives(asset_id: str):
+    asset = await db.assets.find_one({"id": asset_id}, {"derivatives": 1, "derivatives_status": 1})
+    if not asset:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    return {
+        "asset_id": asset_id,
+        "status": asset.get("derivatives_status"),
+        "derivatives": asset.get("derivatives", {}),
+        "queue_depth": derivative_queue.qsize()
+    }
+
+@api_router.post("/assets/{asset_id}/derivatives")
+async def regenerate_asset_derivatives(asset_id: str):
+    asset = await db.assets.find_one({"id": asset_id})
+    if not asset:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    asset_obj = Asset(**asset)
+    if not asset_obj.sha256 or not derivative_kind(asset_obj.file_type, asset_obj.file_path):
+        raise HTTPException(status_code=400, detail="Asset type has no derivatives")
+    if not await claim_derivatives(asset_obj.sha256, rebuild=True):
+        return {"asset_id": asset_id, "status": "pending", "queue_depth": derivative_queue.qsize()}
+    if not enqueue_derivatives(asset_obj):
+        await db.blobs.update_one({"_id": asset_obj.sha256}, {"$set": {"derivatives_status": "skipped"}})
+        raise HTTPException(status_code=503, detail="Derivative queue is full")
+    await db.assets.update_many({"sha256": asset_obj.sha256}, {"$set": {"derivatives_status": "pending"}})
+    response_cache.invalidate("assets")
+    await publish_blob_assets(asset_obj.sha256)
+    return {"asset_id": asset_id, "status": "pending", "queue_depth": derivative_queue.qsize()}
+
+@api_router.delete("/assets/{asset_id}")
+async def delete_asset(asset_id: str):
+    asset = await db.assets.find_one_and_delete({"id": asset_id})
+    if not asset:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    await bump_stats("assets", asset, -1)
+    response_cache.invalidate("assets")
+    publish_change("assets", "deleted", asset)
+    if asset.get("sha256"):
+        await release_blob(asset["sha256"])
+    return {"deleted": asset_id}
+
+@api_router.post("/assets/gc")
+async def run_asset_gc():
+    return await collect_blob_garbage()
+
+# Audio analysis
+# Tempo and loudness are part of the WAV derivatives built on upload. The batch
+# endpoint re-analyzes every distinct audio blob in the library on the
+# derivative pool, keeping at most two jobs per worker in flight.
+@api_router.post("/assets/analyze")
+async def reanalyze_audio_assets():
+    loop = asyncio.get_running_loop()
+    pool = app.state.derivative_pool
+    slots = asyncio.Semaphore(2 * DERIVATIVE_WORKERS)
+    started = time.perf_counter()
+    blobs = await db.assets.aggregate([
+        {"$match": {"sha256": {"$ne": None}, "$or": [
+            {"file_type": {"$in": list(WAV_CONTENT_TYPES)}},
+            {"file_path": {"$regex": r"\.wav$", "$options": "i"}},
+        ]}},
+        {"$group": {"_id": "$sha256", "file_path": {"$first": "$file_path"}}},
+    ]).to_list(None)
+    
+    async def analyze(blob: Dict[str, Any]) -> bool:
+        async with slots:
+            try:
+                analysis = await loop.run_in_executor(pool, media.analyze_audio, blob["file_path"])
+            except Exception:
+                logger.exception("Audio analysis failed for blob %s", blob["_id"])
+                return False
+        await db.assets.update_many({"sha256": blob["_id"]}, {"$set": {"derivatives.analysis": analysis}})
+        await db.blobs.update_one(
+            {"_id": blob["_id"], "derivatives.waveform": {"$exists": True}},
+            {"$set": {"derivatives.analysis": analysis}}
+        )
+        return True
+    
+    results = await asyncio.gather(*[analyze(blob) for blob in blobs])
+    response_cache.invalidate("assets")
+    for blob in blobs:
+        await publish_blob_assets(blob["_id"])
+    return {
+        "blobs": len(blobs),
+        "analyzed": sum(results),
+        "failed": len(results) - sum(results),
+        "seconds": round(time.perf_counter() - started, 3)
+    }
+
 @api_router.get("/assets", response_model=List[Asset])
-async def get_assets(category: Optional[str] = None):
+async def get_assets(
+    response: Response,
+    category: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
+):
+    projection = parse_fields(Asset, fields)
     filter_dict = {}
     if category:
         filter_dict["category"] = category
     
-    assets = await db.assets.find(filter_dict).to_list(100)
-    return [Asset(**asset) for asset in assets]
+    assets = await paginate(db.assets, filter_dict, limit, cursor, response, projection)
+    return await page_response(Asset, assets, response, projection)
+
+# Bulk Import
+# Each bulk collection is (create model, stored model, collection name, related type).
+# Records are validated one at a time as the body streams in and written in
+# unordered insert_many batches; one batch is in flight while the next is parsed.
+# Stored documents are built when a batch is flushed, after any defaults that
+# need a lookup have been filled in.
+BULK_SOURCES = {
+    BulkCollection.DOCUMENTS: (DocumentCreate, BaseDocument, "documents", RelatedType.DOCUMENT),
+    BulkCollection.CHARACTERS: (CharacterCreate, Character, "characters", RelatedType.CHARACTER),
+    BulkCollection.WEAPONS: (WeaponCreate, Weapon, "weapons", RelatedType.WEAPON),
+    BulkCollection.QUESTS: (QuestCreate, Quest, "quests", RelatedType.QUEST),
+    BulkCollection.MUSIC: (MusicTrackCreate, MusicTrack, "music_tracks", None),
+}
+BULK_BATCH_SIZE = 1000
+BULK_MAX_ERRORS = 1000
+BULK_MAX_RECORD_BYTES = 1024 ** 2
+JSON_DECODER = json.JSONDecoder()
+JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+# JSON array bodies are decoded element by element as the body streams in, like
+# NDJSON, so neither form is held in memory whole. An element that does not
+# parse, or grows past BULK_MAX_RECORD_BYTES before it closes, is yielded as its
+# error in place of a record and ends the import, since the array cannot be
+# resynchronised after it.
+async def iter_json_array(request: Request):
+    decode = codecs.getincrementaldecoder("utf-8")().decode
+    chunks = request.stream().__aiter__()
+    buffer, position, state, more = "", 0, "open", True
+    while True:
+        position = JSON_WHITESPACE.match(buffer, position).end()
+        if position < len(buffer):
+            char = buffer[position]
+            if state == "open":
+                if char != "[":
+                    raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+                position, state = position + 1, "first"
+                continue
+            if state in ("first", "separator") and char == "]":
+                position, state = position + 1, "closed"
+                continue
+            if state == "separator":
+                if char != ",":
+                    yield ValueError(f"Expected ',' or ']' at character {position}")
+                    return
+                position, state = position + 1, "value"
+                continue
+            if state == "closed":
+                yield ValueError("Unexpected data after the array")
+                return
+            try:
+                record, end = JSON_DECODER.raw_decode(buffer, position)
+            except ValueError as e:
+                if not more:
+                    yield e
+                    return
+                if len(buffer) - position > BULK_MAX_RECORD_BYTES:
+                    yield ValueError(f"Record exceeds {BULK_MAX_RECORD_BYTES} bytes")
+                    return
+            else:
+                # A number at the end of the buffer may continue in the next chunk
+                if end < len(buffer) or not more:
+                    yield record
+                    position, state = end, "separator"
+                    continue
+        if not more:
+            if state == "open":
+                raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+            if state != "closed":
+                yield ValueError("Body ended before the array was closed")
+            return
+        try:
+            buffer = buffer[position:] + decode(await chunks.__anext__())
+        except StopAsyncIteration:
+            buffer, more = buffer[position:] + decode(b"", final=True), False
+        except UnicodeDecodeError as e:
+            if state == "open":
+                raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+            yield e
+            return
+        position = 0
+
+async def iter_bulk_records(request: Request):
+    content_type = request.headers.get("content-type", "")
+    if not content_type.startswith(NDJSON_CONTENT_TYPES):
+        async for record in iter_json_array(request):
+            yield record
+        return
+    
+    pending = b""
+    async for chunk in request.stream():
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if pending.strip():
+        yield pending
+
+class BulkErrors:
+    def __init__(self):
+        self.count = 0
+        self.items: List[Dict[str, Any]] = []
+    
+    def add(self, index: int, error: Any):
+        self.count += 1
+        if len(self.items) < BULK_MAX_ERRORS:
+            self.items.append({"index": index, "error": error})
+
+async def write_bulk_batch(collection_name: str, related_type: Optional[RelatedType], batch: List[tuple], errors: BulkErrors):
+    failed = set()
+    try:
+        await db[collection_name].insert_many([doc for _, doc in batch], ordered=False)
+    except BulkWriteError as e:
+        for write_error in e.details.get("writeErrors", []):
+            failed.add(write_error["index"])
+            errors.add(batch[write_error["index"]][0], write_error.get("errmsg", "Write failed"))
+    
+    inserted = [doc for position, (_, doc) in enumerate(batch) if position not in failed]
+    if inserted:
+        await bump_stats_bulk(collection_name, inserted)
+        if related_type:
+            for doc in inserted:
+                index_related(related_type, doc)
+        index_autocomplete(collection_name, *inserted)
+    return len(inserted)
+
+# Bulk tracks get the same tempo default as create_music_track: the analyzed BPM
+# of their asset, looked up once per batch.
+async def resolve_bulk_tempos(batch: List[tuple], errors: BulkErrors) -> List[tuple]:
+    asset_ids = list({record["asset_id"] for _, record in batch if record["asset_id"]})
+    analyses = {}
+    if asset_ids:
+        async for asset in db.assets.find({"id": {"$in": asset_ids}}, {"id": 1, "derivatives.analysis": 1}):
+            analyses[asset["id"]] = asset.get("derivatives", {}).get("analysis") or {}
+    resolved = []
+    for index, record in batch:
+        if record["asset_id"]:
+            if record["asset_id"] not in analyses:
+                errors.add(index, "Asset not found")
+                continue
+            if record["tempo"] is None and analyses[record["asset_id"]].get("bpm"):
+                record["tempo"] = round(analyses[record["asset_id"]]["bpm"])
+        if record["tempo"] is None:
+            errors.add(index, "Tempo is required unless the asset has an analyzed BPM")
+            continue
+        resolved.append((index, record))
+    return resolved
+
+@api_router.post("/{collection}/bulk")
+async def bulk_create(collection: BulkCollection, request: Request):
+    create_model, stored_model, collection_name, related_type = BULK_SOURCES[collection]
+    errors = BulkErrors()
+    received = inserted = 0
+    batch: List[tuple] = []
+    in_flight: Optional[asyncio.Task] = None
+    
+    async def flush(next_batch: List[tuple]):
+        nonlocal in_flight, inserted
+        if collection_name == "music_tracks" and next_batch:
+            next_batch = await resolve_bulk_tempos(next_batch, errors)
+        next_batch = [(index, stored_model(**record).dict()) for index, record in next_batch]
+        if in_flight:
+            inserted += await in_flight
+        in_flight = asyncio.create_task(write_bulk_batch(collection_name, related_type, next_batch, errors)) if next_batch else None
+    
+    try:
+        async for record in iter_bulk_records(request):
+            index = received
+            received += 1
+            try:
+                if isinstance(record, Exception):
+                    raise record
+                if isinstance(record, bytes):
+                    record = json.loads(record)
+                if not isinstance(record, dict):
+                    raise TypeError("Record must be a JSON object")
+                doc = create_model(**record).dict()
+            except ValidationError as e:
+                errors.add(index, [{"loc": err["loc"], "msg": err["msg"]} for err in e.errors()])
+                continue
+            except (ValueError, TypeError) as e:
+                errors.add(index, str(e))
+                continue
+            batch.append((index, doc))
+            if len(batch) >= BULK_BATCH_SIZE:
+                await flush(batch)
+                batch = []
+        await flush(batch)
+        await flush([])
+    finally:
+        if in_flight and not in_flight.done():
+            in_flight.cancel()
+        response_cache.invalidate(collection_name)
+        if inserted:
+            if collection_name == "music_tracks":
+                reset_transitions()
+            publish_change(collection_name, "bulk", count=inserted)
+    
+    return {
+        "received": received,
+        "inserted": inserted,
+        "failed": errors.count,
+        "errors": sorted(errors.items, key=lambda error: error["index"])
+    }
+
+# Project Snapshot
+# Export streams every collection as NDJSON straight from lazy cursors; restore
+# upserts by _id in batches. Both live in snapshot.py, which is also a CLI.
+# Restore merges by default: documents created after the snapshot was taken
+# are kept. ?replace=true gives the project exactly as exported; it is staged
+# and swapped in only once the whole snapshot has been read, so a bad one
+# changes nothing. A merge is not atomic; an invalid line or rejected write
+# stops with a 400 listing the documents written per collection so far.
+@api_router.get("/snapshot")
+async def export_project_snapshot(gzip: bool = False, inline_assets: bool = False):
+    stream = snapshot.export_snapshot(db, inline_assets=inline_assets)
+    filename = f"mythrealms-{datetime.utcnow():%Y%m%dT%H%M%S}.ndjson"
+    if gzip:
+        return StreamingResponse(
+            snapshot.gzip_stream(stream),
+            media_type="application/gzip",
+            headers={"Content-Disposition": f'attachment; filename="{filename}.gz"'}
+        )
+    return StreamingResponse(
+        stream,
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@api_router.post("/snapshot/restore")
+async def restore_project_snapshot(request: Request, replace: bool = False):
+    error = None
+    try:
+        counts = await snapshot.restore_snapshot(
+            db, snapshot.iter_snapshot_lines(request.stream()), UPLOADS_DIR, replace=replace
+        )
+    except snapshot.RestoreError as e:
+        error = e
+    finally:
+        response_cache.invalidate(*snapshot.EXPORT_COLLECTIONS)
+        event_bus.publish("*", "reset", reason="snapshot restored")
+        reset_transitions()
+    # Earlier batches of a failed restore are in place, so rebuild either way
+    await reconcile_stats()
+    await build_related_index()
+    await build_autocomplete_index()
+    if error is not None:
+        raise HTTPException(status_code=400, detail={"message": str(error), "restored": error.counts})
+    return {"restored": counts}
 
 # Dashboard Stats
+# Counters live in one materialized document keyed by collection, with a
+# breakdown per dimension. Create handlers $inc it, updates move the document
+# between breakdown buckets when a dimension changes, and a periodic job
+# recomputes it from the collections to repair any drift.
+STATS_DIMENSIONS = {
+    "documents": ("document_type",),
+    "characters": ("realm", "character_type"),
+    "weapons": ("weapon_type",),
+    "quests": ("realm", "quest_type"),
+    "music_tracks": ("realm", "mood"),
+    "assets": ("category",),
+}
+STATS_ID = "dashboard"
+STATS_RECONCILE_SECONDS = int(os.environ.get('STATS_RECONCILE_SECONDS', '300'))
+
+def stats_key(value: Any) -> str:
+    value = value.value if isinstance(value, Enum) else str(value)
+    return value.replace(".", "_").lstrip("$") or "unknown"
+
+async def bump_stats(collection_name: str, doc: Dict[str, Any], delta: int = 1):
+    await bump_stats_bulk(collection_name, [doc], delta)
+
+async def bump_stats_bulk(collection_name: str, docs: List[Dict[str, Any]], delta: int = 1):
+    increments = {f"totals.{collection_name}": delta * len(docs)}
+    for doc in docs:
+        for dimension in STATS_DIMENSIONS[collection_name]:
+            field = f"breakdowns.{collection_name}.{dimension}.{stats_key(doc.get(dimension))}"
+            increments[field] = increments.get(field, 0) + delta
+    await db.stats.update_one({"_id": STATS_ID}, {"$inc": increments}, upsert=True)
+    response_cache.invalidate("stats")
+
+async def move_stats(collection_name: str, previous: Dict[str, Any], updated: Dict[str, Any]):
+    increments = {}
+    for dimension in STATS_DIMENSIONS[collection_name]:
+        before, after = stats_key(previous.get(dimension)), stats_key(updated.get(dimension))
+        if before != after:
+            increments[f"breakdowns.{collection_name}.{dimension}.{before}"] = -1
+            increments[f"breakdowns.{collection_name}.{dimension}.{after}"] = 1
+    if increments:
+        await db.stats.update_one({"_id": STATS_ID}, {"$inc": increments}, upsert=True)
+        response_cache.invalidate("stats")
+
+async def count_collection(collection_name: str):
+    collection = db[collection_name]
+    dimensions = STATS_DIMENSIONS[collection_name]
+    total, *groups = await asyncio.gather(
+        collection.count_documents({}),
+        *[collection.aggregate([{"$group": {"_id": f"${dimension}", "count": {"$sum": 1}}}]).to_list(None)
+          for dimension in dimensions]
+    )
+    breakdown = {
+        dimension: {stats_key(group["_id"]): group["count"] for group in rows}
+        for dimension, rows in zip(dimensions, groups)
+    }
+    return collection_name, total, breakdown
+
+async def reconcile_stats() -> Dict[str, Any]:
+    counted = await asyncio.gather(*[count_collection(name) for name in STATS_DIMENSIONS])
+    snapshot = {
+        "_id": STATS_ID,
+        "totals": {name: total for name, total, _ in counted},
+        "breakdowns": {name: breakdown for name, _, breakdown in counted},
+        "reconciled_at": datetime.utcnow(),
+    }
+    await db.stats.replace_one({"_id": STATS_ID}, snapshot, upsert=True)
+    response_cache.invalidate("stats")
+    return snapshot
+
+async def reconcile_stats_periodically():
+    while True:
+        await asyncio.sleep(STATS_RECONCILE_SECONDS)
+        try:
+            await reconcile_stats()
+        except Exception:
+            logger.exception("Dashboard stats reconciliation failed")
+
 @api_router.get("/dashboard/stats")
 async def get_dashboard_stats():
-    stats = {
-        "documents": await db.documents.count_documents({}),
-        "characters": await db.characters.count_documents({}),
-        "weapons": await db.weapons.count_documents({}),
-        "quests": await db.quests.count_documents({}),
-        "music_tracks": await db.music_tracks.count_documents({}),
-        "assets": await db.assets.count_documents({})
-    }
+    snapshot = await db.stats.find_one({"_id": STATS_ID})
+    if not snapshot or "reconciled_at" not in snapshot:
+        snapshot = await reconcile_stats()
+    totals = snapshot.get("totals", {})
+    stats = {name: totals.get(name, 0) for name in STATS_DIMENSIONS}
+    stats["breakdowns"] = snapshot.get("breakdowns", {})
+    stats["reconciled_at"] = snapshot.get("reconciled_at")
     return stats
 
+# Home
+# One round trip for the Dashboard and Showcase landing pages: stats, the
+# newest entries per collection and a merged activity feed, all queried
+# concurrently. Each feed source is (type, collection, label field, time field)
+# and is read through an index on its time field.
+ACTIVITY_SOURCES = [
+    ("document", "documents", "title", "updated_at"),
+    ("character", "characters", "name", "created_at"),
+    ("weapon", "weapons", "name", "created_at"),
+    ("quest", "quests", "title", "created_at"),
+    ("music", "music_tracks", "name", "created_at"),
+    ("asset", "assets", "name", "created_at"),
+]
+HOME_DOCUMENT_FIELDS = {"_id": 0, "id": 1, "title": 1, "document_type": 1, "tags": 1, "version": 1, "created_at": 1, "updated_at": 1}
+
+async def latest_entries(collection, limit: int, projection: Optional[Dict[str, int]] = None):
+    return await collection.find({}, projection).sort(PAGE_SORT).limit(limit).to_list(limit)
+
+async def activity_source(entity_type: str, collection_name: str, label_field: str, time_field: str, limit: int):
+    projection = {"_id": 0, "id": 1, label_field: 1, time_field: 1, "version": 1}
+    docs = await db[collection_name].find({}, projection).sort(time_field, DESCENDING).limit(limit).to_list(limit)
+    return [
+        {
+            "type": entity_type,
+            "item": {"id": doc["id"], label_field: doc.get(label_field)},
+            "action": "updated" if doc.get("version", 1) > 1 else "created",
+            "time": doc[time_field]
+        }
+        for doc in docs if doc.get(time_field)
+    ]
+
+async def recent_activity(limit: int):
+    sources = await asyncio.gather(*[
+        activity_source(*source, limit) for source in ACTIVITY_SOURCES
+    ])
+    feed = [entry for source in sources for entry in source]
+    feed.sort(key=lambda entry: entry["time"], reverse=True)
+    return feed[:limit]
+
+@api_router.get("/home")
+async def get_home(
+    limit: int = Query(6, ge=1, le=50),
+    activity: int = Query(10, ge=1, le=50)
+):
+    stats, documents, characters, weapons, quests, feed = await asyncio.gather(
+        get_dashboard_stats(),
+        latest_entries(db.documents, limit, HOME_DOCUMENT_FIELDS),
+        latest_entries(db.characters, limit),
+        latest_entries(db.weapons, limit),
+        latest_entries(db.quests, limit),
+        recent_activity(activity)
+    )
+    return TimedJSONResponse({
+        "stats": stats,
+        "documents": documents,
+        "characters": trusted_rows(Character, characters),
+        "weapons": trusted_rows(Weapon, weapons),
+        "quests": trusted_rows(Quest, quests),
+        "recent_activity": feed
+    })
+
 # Search across all content
+# Each source is (result key, collection, model). All sources are queried
+# concurrently through their text index and merged into one ranked list.
+# Text scores depend on each index's weights, so every source's scores are
+# scaled by its best hit before merging. total counts the hits returned;
+# facets count every match per source.
+SEARCH_SOURCES = [
+    ("documents", db.documents, BaseDocument),
+    ("characters", db.characters, Character),
+    ("weapons", db.weapons, Weapon),
+    ("quests", db.quests, Quest),
+    ("music", db.music_tracks, MusicTrack),
+]
+TEXT_SCORE = {"$meta": "textScore"}
+
+async def search_source(key: str, collection, model, query: str, limit: int, fields: set):
+    text_filter = {"$text": {"$search": query}}
+    projection = {"score": TEXT_SCORE}
+    if fields:
+        projection.update({"_id": 0, **{field: 1 for field in (fields & set(model.model_fields)) | SPARSE_BASE_FIELDS}})
+    docs, total = await asyncio.gather(
+        collection.find(text_filter, projection).sort([("score", TEXT_SCORE)]).limit(limit).to_list(limit),
+        collection.count_documents(text_filter),
+    )
+    if fields:
+        return key, total, [(doc.pop("score"), doc) for doc in docs]
+    return key, total, [(doc["score"], trusted_row(model, doc)) for doc in docs]
+
+def merge_search_hits(sources, limit: int) -> List[Dict[str, Any]]:
+    ranked = []
+    for key, _, hits in sources:
+        best = max((score for score, _ in hits), default=0) or 1
+        ranked.extend({"type": key, "score": score / best, "item": item} for score, item in hits)
+    ranked.sort(key=lambda hit: hit["score"], reverse=True)
+    return ranked[:limit]
+
 @api_router.get("/search")
-async def search_content(query: str, limit: int = 50):
-    results = {
-        "documents": [],
-        "characters": [],
-        "weapons": [],
-        "quests": [],
-        "music": []
-    }
+async def search_content(
+    query: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None
+):
+    requested = requested_fields(fields)
+    unknown = requested - set().union(*[model.model_fields for _, _, model in SEARCH_SOURCES])
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    facets = {key: 0 for key, _, _ in SEARCH_SOURCES}
+    results = []
     
-    # Search documents
-    docs = await db.documents.find({
-        "$or": [
-            {"title": {"$regex": query, "$options": "i"}},
-            {"tags": {"$regex": query, "$options": "i"}}
-        ]
-    }).limit(limit).to_list(limit)
-    results["documents"] = [BaseDocument(**doc) for doc in docs]
-    
-    # Search characters  
-    chars = await db.characters.find({
-        "$or": [
-            {"name": {"$regex": query, "$options": "i"}},
-            {"description": {"$regex": query, "$options": "i"}}
-        ]
-    }).limit(limit).to_list(limit)
-    results["characters"] = [Character(**char) for char in chars]
-    
-    # Search weapons
-    weapons = await db.weapons.find({
-        "$or": [
-            {"name": {"$regex": query, "$options": "i"}},
-            {"lore": {"$regex": query, "$options": "i"}}
-        ]
-    }).limit(limit).to_list(limit)
-    results["weapons"] = [Weapon(**weapon) for weapon in weapons]
-    
-    # Search quests
-    quests = await db.quests.find({
-        "$or": [
-            {"title": {"$regex": query, "$options": "i"}},
-            {"description": {"$regex": query, "$options": "i"}}
-        ]
-    }).limit(limit).to_list(limit)
-    results["quests"] = [Quest(**quest) for quest in quests]
+    if query.strip():
+        sources = await asyncio.gather(*[
+            search_source(key, collection, model, query, limit, requested)
+            for key, collection, model in SEARCH_SOURCES
+        ])
+        facets.update({key: total for key, total, _ in sources})
+        results = merge_search_hits(sources, limit)
     
-    # Search music
-    music = await db.music_tracks.find({
-        "name": {"$regex": query, "$options": "i"}
-    }).limit(limit).to_list(limit)
-    results["music"] = [MusicTrack(**track) for track in music]
+    return TimedJSONResponse({
+        "query": query,
+        "total": len(results),
+        "facets": facets,
+        "results": results
+    })
+
+# Related content
+# Each related type is (collection, label field, text fields). The similarity
+# index is built once at startup and updated by the write handlers.
+RELATED_SOURCES = {
+    RelatedType.DOCUMENT: (db.documents, "title", ("title", "tags", "content")),
+    RelatedType.CHARACTER: (db.characters, "name", ("name", "description")),
+    RelatedType.WEAPON: (db.weapons, "name", ("name", "lore")),
+    RelatedType.QUEST: (db.quests, "title", ("title", "description")),
+}
+related_index = SimilarityIndex()
+
+def flatten_text(value: Any) -> str:
+    if isinstance(value, dict):
+        return " ".join(flatten_text(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return " ".join(flatten_text(item) for item in value)
+    return value if isinstance(value, str) else ""
+
+def index_related(related_type: RelatedType, doc: Dict[str, Any]):
+    _, label_field, text_fields = RELATED_SOURCES[related_type]
+    text = " ".join(flatten_text(doc.get(field)) for field in text_fields)
+    related_index.add(related_type.value, doc["id"], doc[label_field], text)
+
+async def build_related_index():
+    for related_type, (collection, label_field, text_fields) in RELATED_SOURCES.items():
+        projection = {"_id": 0, "id": 1, label_field: 1, **{field: 1 for field in text_fields}}
+        async for doc in collection.find({}, projection):
+            index_related(related_type, doc)
+    logger.info("Built related-content index with %d entities", len(related_index))
+
+@api_router.get("/related/{related_type}/{entity_id}")
+async def get_related_content(
+    related_type: RelatedType,
+    entity_id: str,
+    k: int = Query(10, ge=1, le=100),
+    types: Optional[List[RelatedType]] = Query(None)
+):
+    try:
+        return related_index.related(
+            related_type.value,
+            entity_id,
+            k=k,
+            kinds=[t.value for t in types] if types else None
+        )
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Entity not found")
+
+# Autocomplete
+# Typeahead suggestions come from an in-memory prefix index instead of
+# MongoDB. Each source is (type, label field, time field, tags field) by
+# collection name; types earlier in the list rank first, then newest first.
+# The index is built from one projected scan per collection at startup and
+# kept current by the write handlers.
+AUTOCOMPLETE_SOURCES = {
+    "characters": (BulkCollection.CHARACTERS, "name", "created_at", None),
+    "weapons": (BulkCollection.WEAPONS, "name", "created_at", None),
+    "quests": (BulkCollection.QUESTS, "title", "created_at", None),
+    "music_tracks": (BulkCollection.MUSIC, "name", "created_at", None),
+    "documents": (BulkCollection.DOCUMENTS, "title", "updated_at", "tags"),
+}
+AUTOCOMPLETE_MAX_TERMS = int(os.environ.get('AUTOCOMPLETE_MAX_TERMS', '500000'))
+
+def new_autocomplete_index() -> PrefixIndex:
+    return PrefixIndex([kind.value for kind, *_ in AUTOCOMPLETE_SOURCES.values()], AUTOCOMPLETE_MAX_TERMS)
+
+autocomplete_index = new_autocomplete_index()
+
+def autocomplete_entry(collection_name: str, doc: Dict[str, Any]):
+    kind, label_field, time_field, tags_field = AUTOCOMPLETE_SOURCES[collection_name]
+    updated = doc.get(time_field) or doc.get("created_at") or datetime.utcnow()
+    tags = (doc.get(tags_field) or ()) if tags_field else ()
+    return kind.value, doc["id"], doc.get(label_field) or "", updated.timestamp(), tags
+
+def index_autocomplete(collection_name: str, *docs: Dict[str, Any]):
+    if collection_name not in AUTOCOMPLETE_SOURCES:
+        return
+    if len(docs) == 1:
+        autocomplete_index.add(*autocomplete_entry(collection_name, docs[0]))
+    else:
+        autocomplete_index.load(autocomplete_entry(collection_name, doc) for doc in docs)
+
+async def build_autocomplete_index():
+    global autocomplete_index
+    
+    async def scan(collection_name: str):
+        _, label_field, time_field, tags_field = AUTOCOMPLETE_SOURCES[collection_name]
+        projection = {"_id": 0, "id": 1, "created_at": 1, label_field: 1, time_field: 1}
+        if tags_field:
+            projection[tags_field] = 1
+        return [autocomplete_entry(collection_name, doc) async for doc in db[collection_name].find({}, projection)]
     
-    return results
+    scans = await asyncio.gather(*[scan(collection_name) for collection_name in AUTOCOMPLETE_SOURCES])
+    index = new_autocomplete_index()
+    index.load(entry for entries in scans for entry in entries)
+    autocomplete_index = index
+    logger.info("Built autocomplete index with %d entities", len(index))
+
+@api_router.get("/autocomplete")
+async def autocomplete(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    types: Optional[List[BulkCollection]] = Query(None)
+):
+    suggestions = autocomplete_index.suggest(q, limit, kinds=[t.value for t in types] if types else None)
+    return TimedJSONResponse({"query": q, "suggestions": suggestions})
 
 # Root endpoint
 @api_router.get("/")
 async def root():
     return {"message": "MythRealms GDD & Content Management Platform API"}
 
+# Prometheus metrics
+@api_router.get("/metrics")
+async def get_metrics():
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4")
+
 # Include router
 app.include_router(api_router)
 
+# Admission control and query budgets
+# Each route gets ROUTE_CONCURRENCY slots and a wait queue of ROUTE_QUEUE_SIZE;
+# anything beyond that is shed with 503 and Retry-After. Every MongoDB call a
+# request makes shares one deadline (pymongo.timeout sends it as maxTimeMS),
+# so a runaway query fails with 504 instead of holding its slot indefinitely.
+# Registered first, so it is the innermost middleware and cache hits skip it.
+ROUTE_CONCURRENCY = int(os.environ.get('ROUTE_CONCURRENCY', '64'))
+ROUTE_QUEUE_SIZE = int(os.environ.get('ROUTE_QUEUE_SIZE', '128'))
+ROUTE_QUEUE_TIMEOUT_SECONDS = float(os.environ.get('ROUTE_QUEUE_TIMEOUT_MS', '2000')) / 1000
+ROUTE_LIMITS = {  # route -> (concurrency, queue size)
+    "/api/search": (16, 64),
+    "/api/home": (16, 64),
+    "/api/related/{related_type}/{entity_id}": (16, 64),
+    "/api/assets": (16, 32),
+    "/api/{collection}/bulk": (4, 8),
+    "/api/snapshot": (2, 2),
+    "/api/snapshot/restore": (1, 0),
+    "/api/assets/analyze": (1, 0),
+    "/api/events": (EVENT_MAX_SUBSCRIBERS, 0),
+    "/api/metrics": (0, 0),  # never shed
+}
+QUERY_BUDGET_SECONDS = float(os.environ.get('QUERY_BUDGET_MS', '5000')) / 1000
+ROUTE_QUERY_BUDGETS = {  # seconds; None for streams and batch jobs
+    "/api/search": 2.0,
+    "/api/home": 2.0,
+    "/api/dashboard/stats": 1.0,
+    "/api/{collection}/bulk": None,
+    "/api/snapshot": None,
+    "/api/snapshot/restore": None,
+    "/api/assets/gc": None,
+    "/api/assets/analyze": None,
+    "/api/events": None,
+}
+# Uploads can take far longer to arrive than any budget; their handler starts
+# one around its own queries instead (see store_blob and upload_asset)
+UPLOAD_ROUTES = {"/api/assets"}
+admission = AdmissionControl(ROUTE_CONCURRENCY, ROUTE_QUEUE_SIZE, ROUTE_QUEUE_TIMEOUT_SECONDS, ROUTE_LIMITS)
+
+async def release_after(body_iterator, limiter):
+    try:
+        async for chunk in body_iterator:
+            yield chunk
+    finally:
+        limiter.release()
+
+@app.middleware("http")
+async def admit_requests(request, call_next):
+    route = getattr(request.state, "route", None) or route_template(request.scope)
+    limiter = admission.limiter(route)
+    if limiter is not None and not await limiter.acquire():
+        metrics.HTTP_SHED.inc((route,))
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Server is busy, retry later"},
+            headers={"Retry-After": str(limiter.retry_after)}
+        )
+    try:
+        uploading = request.method == "POST" and route in UPLOAD_ROUTES
+        with pymongo.timeout(None if uploading else ROUTE_QUERY_BUDGETS.get(route, QUERY_BUDGET_SECONDS)):
+            response = await call_next(request)
+    except BaseException:
+        if limiter is not None:
+            limiter.release()
+        raise
+    if limiter is not None:
+        # Hold the slot until the body has been sent, so streams count too
+        response.body_iterator = release_after(response.body_iterator, limiter)
+    return response
+
+@app.exception_handler(ExecutionTimeout)
+@app.exception_handler(NetworkTimeout)
+async def handle_query_timeout(request, exc):
+    return JSONResponse(status_code=504, content={"detail": "Query exceeded its time budget"})
+
+@app.exception_handler(WaitQueueTimeoutError)
+@app.exception_handler(ServerSelectionTimeoutError)
+async def handle_database_unavailable(request, exc):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Database unavailable, retry later"},
+        headers={"Retry-After": str(max(1, round(ROUTE_QUEUE_TIMEOUT_SECONDS)))}
+    )
+
+# Serve cacheable GETs from the response cache, answering If-None-Match with 304
+@app.middleware("http")
+async def cache_get_responses(request, call_next):
+    segments = request.url.path.split("/")
+    collections = CACHED_ROUTES.get(segments[2]) if len(segments) > 2 and segments[1] == "api" else None
+    if request.method != "GET" or not collections:
+        return await call_next(request)
+    
+    key = f"{request.url.path}?{sorted(request.query_params.multi_items())}"
+    token = response_cache.token(collections)
+    entry = response_cache.get(key, token)
+    cache_status = "HIT"
+    if entry is None:
+        response = await call_next(request)
+        if response.status_code != 200:
+            return response
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        headers = [(name, value) for name, value in response.headers.items() if name not in UNCACHED_HEADERS]
+        entry = response_cache.put(key, token, body, headers)
+        cache_status = "MISS"
+    
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache", "X-Cache": cache_status}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    response = Response(content=entry.body, headers=headers)
+    for name, value in entry.headers:
+        response.headers[name] = value
+    return response
+
+# Per-route metrics and Server-Timing. Registered last among the http
+# middlewares so it is the outermost one and also times cache hits.
+def route_template(scope) -> str:
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+@app.middleware("http")
+async def record_request_metrics(request, call_next):
+    route = request.state.route = route_template(request.scope)
+    timing = metrics.RequestTiming()
+    token = metrics.current_timing.set(timing)
+    metrics.HTTP_IN_FLIGHT.inc((route,))
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except Exception:
+        metrics.observe_request(request.method, route, 500, time.perf_counter() - start, None)
+        raise
+    finally:
+        metrics.HTTP_IN_FLIGHT.dec((route,))
+        metrics.current_timing.reset(token)
+    elapsed = time.perf_counter() - start
+    metrics.observe_request(request.method, route, response.status_code, elapsed, response.headers.get("content-length"))
+    response.headers["Server-Timing"] = timing.header(elapsed)
+    return response
+
+# Reject oversized uploads before the body is parsed: straight away from an
+# honest Content-Length, otherwise as soon as the bytes received pass the
+# limit, so a chunked body or a wrong Content-Length is cut off mid-stream
+# instead of being spooled to disk in full first. Added after the http
+# middlewares so it wraps them: their disconnect listeners would otherwise
+# drain the rest of the body from the client before the 413 goes out.
+class UploadSizeLimit:
+    def __init__(self, app, path: str):
+        self.app = app
+        self.path = path
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] != self.path:
+            return await self.app(scope, receive, send)
+        max_bytes = MAX_UPLOAD_BYTES + UPLOAD_FORM_OVERHEAD
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+            response = JSONResponse(status_code=413, content={"detail": "File too large"})
+            return await response(scope, receive, send)
+        received, exceeded = 0, False
+        
+        async def receive_limited():
+            nonlocal received, exceeded
+            # Layers that drain the rest of the body must not read past the abort
+            if exceeded:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    exceeded = True
+                    raise HTTPException(status_code=413, detail="File too large")
+            return message
+        
+        async def send_unless_exceeded(message):
+            if not exceeded:
+                await send(message)
+        
+        # Body parsing reports the abort as its own error; answer 413 instead
+        try:
+            await self.app(scope, receive_limited, send_unless_exceeded)
+        except Exception:
+            if not exceeded:
+                raise
+        if exceeded:
+            await JSONResponse(status_code=413, content={"detail": "File too large"})(scope, receive, send)
+
+app.add_middleware(UploadSizeLimit, path="/api/assets")
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -417,10 +2275,12 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Server-Timing"],
 )
 
 # Serve uploaded files
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+UPLOADS_DIR.mkdir(exist_ok=True)
+app.mount("/uploads", StaticFiles(directory=UPLOADS_DIR), name="uploads")
 
 # Configure logging
 logging.basicConfig(
@@ -429,6 +2289,70 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def startup_indexes():
+    await ensure_indexes()
+    if os.environ.get('VERIFY_INDEXES', '').lower() in ('1', 'true', 'yes'):
+        await verify_indexes()
+
+@app.on_event("startup")
+async def startup_related_index():
+    await build_related_index()
+
+@app.on_event("startup")
+async def startup_autocomplete_index():
+    await build_autocomplete_index()
+
+@app.on_event("startup")
+async def startup_stats_reconciler():
+    await reconcile_stats()
+    app.state.stats_task = asyncio.create_task(reconcile_stats_periodically())
+
+@app.on_event("startup")
+async def startup_derivative_pipeline():
+    app.state.derivative_pool = ProcessPoolExecutor(
+        max_workers=DERIVATIVE_WORKERS,
+        mp_context=multiprocessing.get_context("spawn")
+    )
+    app.state.derivative_workers = [
+        asyncio.create_task(derivative_worker(app.state.derivative_pool))
+        for _ in range(DERIVATIVE_WORKERS)
+    ]
+
+@app.on_event("startup")
+async def startup_simulation_pool():
+    app.state.simulation_pool = ProcessPoolExecutor(
+        max_workers=SIMULATION_WORKERS,
+        mp_context=multiprocessing.get_context("spawn")
+    )
+
+@app.on_event("startup")
+async def startup_change_feed():
+    app.state.change_feed_task = None
+    if CHANGE_STREAMS:
+        app.state.change_feed_task = asyncio.create_task(
+            watch_changes(db, FEED_SOURCES, lambda name, action, doc: emit_change(name, action, doc))
+        )
+
+@app.on_event("shutdown")
+async def shutdown_change_feed():
+    if app.state.change_feed_task:
+        app.state.change_feed_task.cancel()
+
+@app.on_event("shutdown")
+async def shutdown_derivative_pipeline():
+    for task in app.state.derivative_workers:
+        task.cancel()
+    app.state.derivative_pool.shutdown(wait=False, cancel_futures=True)
+
+@app.on_event("shutdown")
+async def shutdown_simulation_pool():
+    app.state.simulation_pool.shutdown(wait=False, cancel_futures=True)
+
+@app.on_event("shutdown")
+async def shutdown_stats_reconciler():
+    app.state.stats_task.cancel()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
     client.close()
\ No newline at end of file
@@ -0,0 +1,174 @@
+"""In-memory TF-IDF index for "related content" lookups.
+
+Entities are tokenized once when they are added. Term frequencies live in
+flat append-only arrays with a per-term postings list, so an update only
+touches the changed entity: the old row is tombstoned and a new one is
+appended. IDF weights and row norms are derived from document frequencies
+and refreshed lazily with a single vectorized pass after writes.
+"""
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in into is it its of on or "
+    "that the their them they this to was were which while will with".split()
+)
+
+Key = Tuple[str, str]
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_RE.findall(text.lower()) if len(token) > 1 and token not in STOPWORDS]
+
+
+class GrowableArray:
+    """Append-only 1-D numpy buffer with amortized doubling."""
+
+    def __init__(self, dtype, capacity: int = 1024):
+        self._data = np.zeros(capacity, dtype=dtype)
+        self.size = 0
+
+    def extend(self, values) -> None:
+        values = np.asarray(values, dtype=self._data.dtype)
+        needed = self.size + len(values)
+        if needed > len(self._data):
+            grown = np.zeros(max(needed, 2 * len(self._data)), dtype=self._data.dtype)
+            grown[:self.size] = self._data[:self.size]
+            self._data = grown
+        self._data[self.size:needed] = values
+        self.size = needed
+
+    @property
+    def view(self) -> np.ndarray:
+        return self._data[:self.size]
+
+
+class SimilarityIndex:
+    def __init__(self):
+        self.vocab: Dict[str, int] = {}
+        self.df = GrowableArray(np.float64)
+        self.keys: List[Key] = []
+        self.labels: List[str] = []
+        self.kinds: List[str] = []
+        self.kind_codes = GrowableArray(np.int16)
+        self.alive = GrowableArray(np.bool_)
+        self.row_of: Dict[Key, int] = {}
+        self.row_span: List[Tuple[int, int]] = []
+        self.coo_rows = GrowableArray(np.int32)
+        self.coo_terms = GrowableArray(np.int32)
+        self.coo_tf = GrowableArray(np.float32)
+        self.postings: Dict[int, List[int]] = {}
+        self._kind_code: Dict[str, int] = {}
+        self._norms: Optional[np.ndarray] = None
+        self._dead = 0
+
+    def __len__(self) -> int:
+        return len(self.row_of)
+
+    def add(self, kind: str, entity_id: str, label: str, text: str) -> None:
+        self._insert((kind, entity_id), label, Counter(tokenize(text)))
+
+    def _insert(self, key: Key, label: str, counts: Dict[str, int]) -> None:
+        self.remove(key)
+        terms = np.array([self._term_id(token) for token in counts], dtype=np.int32)
+
+        row = len(self.keys)
+        start = self.coo_rows.size
+        self.keys.append(key)
+        self.labels.append(label)
+        self.kinds.append(key[0])
+        self.kind_codes.extend([self._kind_code.setdefault(key[0], len(self._kind_code))])
+        self.alive.extend([True])
+        self.row_of[key] = row
+        self.row_span.append((start, start + len(terms)))
+        self.coo_rows.extend(np.full(len(terms), row, dtype=np.int32))
+        self.coo_terms.extend(terms)
+        self.coo_tf.extend([1.0 + math.log(count) for count in counts.values()])
+        for offset, term in enumerate(terms.tolist()):
+            self.postings.setdefault(term, []).append(start + offset)
+        if len(terms):
+            np.add.at(self.df.view, terms, 1.0)
+        self._norms = None
+
+        if self._dead > 1024 and self._dead > len(self.row_of):
+            self.compact()
+
+    def remove(self, key: Key) -> None:
+        row = self.row_of.pop(key, None)
+        if row is None:
+            return
+        start, end = self.row_span[row]
+        np.subtract.at(self.df.view, self.coo_terms.view[start:end], 1.0)
+        self.alive.view[row] = False
+        self._dead += 1
+        self._norms = None
+
+    def compact(self) -> None:
+        """Drop tombstoned rows by replaying the live ones into a fresh index."""
+        fresh = SimilarityIndex()
+        inverse_vocab = {term: token for token, term in self.vocab.items()}
+        for row in sorted(self.row_of.values()):
+            start, end = self.row_span[row]
+            terms = self.coo_terms.view[start:end].tolist()
+            tfs = self.coo_tf.view[start:end].tolist()
+            counts = {inverse_vocab[term]: round(math.exp(tf - 1.0)) for term, tf in zip(terms, tfs)}
+            fresh._insert(self.keys[row], self.labels[row], counts)
+        self.__dict__.update(fresh.__dict__)
+
+    def related(self, kind: str, entity_id: str, k: int = 10, kinds: Optional[Iterable[str]] = None) -> List[Dict]:
+        row = self.row_of.get((kind, entity_id))
+        if row is None:
+            raise KeyError((kind, entity_id))
+        idf = self._idf()
+        norms = self._row_norms(idf)
+        start, end = self.row_span[row]
+        q_terms = self.coo_terms.view[start:end]
+        if not len(q_terms) or norms[row] == 0:
+            return []
+        q_weights = self.coo_tf.view[start:end] * idf[q_terms]
+
+        positions = np.concatenate([np.asarray(self.postings[term], dtype=np.int64) for term in q_terms.tolist()])
+        lengths = [len(self.postings[term]) for term in q_terms.tolist()]
+        rows = self.coo_rows.view[positions]
+        contrib = self.coo_tf.view[positions] * idf[self.coo_terms.view[positions]] * np.repeat(q_weights, lengths)
+        dots = np.bincount(rows, weights=contrib, minlength=len(self.keys))
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = np.where(norms > 0, dots / (norms * norms[row]), 0.0)
+        scores[~self.alive.view] = 0.0
+        scores[row] = 0.0
+        if kinds is not None:
+            codes = [self._kind_code[name] for name in kinds if name in self._kind_code]
+            scores[~np.isin(self.kind_codes.view, codes)] = 0.0
+
+        k = min(k, int(np.count_nonzero(scores > 0)))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            {"type": self.kinds[i], "id": self.keys[i][1], "label": self.labels[i], "score": float(scores[i])}
+            for i in top.tolist()
+        ]
+
+    def _term_id(self, token: str) -> int:
+        term = self.vocab.get(token)
+        if term is None:
+            term = self.vocab[token] = len(self.vocab)
+            self.df.extend([0.0])
+        return term
+
+    def _idf(self) -> np.ndarray:
+        n = len(self.row_of)
+        return (np.log((1.0 + n) / (1.0 + self.df.view)) + 1.0).astype(np.float32)
+
+    def _row_norms(self, idf: np.ndarray) -> np.ndarray:
+        if self._norms is None:
+            weights = self.coo_tf.view * idf[self.coo_terms.view]
+            self._norms = np.sqrt(np.bincount(self.coo_rows.view, weights=weights * weights, minlength=len(self.keys)))
+        return self._norms
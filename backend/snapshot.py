@@ -0,0 +1,325 @@
+"""Streaming NDJSON export and restore of a whole MythRealms project.
+
+A snapshot is a sequence of JSON lines encoded with bson.json_util so dates
+and ObjectIds round-trip exactly:
+
+    {"snapshot": {...header...}}
+    {"collection": "documents", "doc": {...}}       one line per stored document
+    {"file": "uploads/...", "offset": 0, "data": "<base64>"}   inline asset bytes
+    {"end": {"counts": {...}}}
+
+Cursors are iterated lazily and files are read in fixed-size chunks, so memory
+use does not depend on project size. Restore upserts by ``_id`` (merge), or
+replaces the snapshot's collections outright (replace). A merge is not atomic:
+one that fails part way keeps the batches written before the failure. A
+replace writes into staging collections and swaps each one in with ``$out``
+only after the whole snapshot has been read and written, so an invalid or
+truncated snapshot leaves the project as it was. Run
+``python snapshot.py --help`` for the command-line interface.
+"""
+import asyncio
+import base64
+import os
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+
+import typer
+from bson import json_util
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReplaceOne
+from pymongo.errors import BulkWriteError, OperationFailure
+
+SNAPSHOT_VERSION = 1
+EXPORT_COLLECTIONS = [
+    "documents", "document_versions", "characters", "weapons", "quests", "music_tracks", "assets", "blobs",
+]
+EXPORT_BATCH_SIZE = 1000
+RESTORE_BATCH_SIZE = 1000
+FILE_CHUNK_BYTES = 768 * 1024  # 1 MiB once base64-encoded
+STAGING_SUFFIX = "_restore_staging"
+
+
+class RestoreError(ValueError):
+    """A restore stopped part way; ``counts`` are the documents written so far."""
+
+    def __init__(self, message: str, counts: Dict[str, int]):
+        super().__init__(message)
+        self.counts = counts
+
+
+def encode_line(value: Dict) -> bytes:
+    return json_util.dumps(value).encode() + b"\n"
+
+
+async def is_replica_set(db) -> bool:
+    hello = await db.client.admin.command("hello")
+    return "setName" in hello
+
+
+async def export_snapshot(
+    db,
+    collections: Iterable[str] = EXPORT_COLLECTIONS,
+    inline_assets: bool = False,
+) -> AsyncIterator[bytes]:
+    collections = list(collections)
+    consistent = await is_replica_set(db)
+    session = await db.client.start_session(snapshot=True) if consistent else None
+    counts: Dict[str, int] = {}
+    try:
+        yield encode_line({"snapshot": {
+            "version": SNAPSHOT_VERSION,
+            "created_at": datetime.utcnow(),
+            "collections": collections,
+            "assets": "inline" if inline_assets else "reference",
+            "consistent": consistent,
+        }})
+        for name in collections:
+            counts[name] = 0
+            async for doc in db[name].find({}, session=session, batch_size=EXPORT_BATCH_SIZE):
+                counts[name] += 1
+                yield encode_line({"collection": name, "doc": doc})
+
+        if inline_assets:
+            seen = set()
+            async for asset in db.assets.find({}, {"file_path": 1}, session=session, batch_size=EXPORT_BATCH_SIZE):
+                file_path = asset.get("file_path")
+                if file_path and file_path not in seen:
+                    seen.add(file_path)
+                    async for line in export_file(file_path):
+                        yield line
+            counts["files"] = len(seen)
+
+        yield encode_line({"end": {"counts": counts}})
+    finally:
+        if session is not None:
+            await session.end_session()
+
+
+async def export_file(file_path: str) -> AsyncIterator[bytes]:
+    try:
+        handle = await asyncio.to_thread(open, file_path, "rb")
+    except FileNotFoundError:
+        return
+    try:
+        offset = 0
+        while chunk := await asyncio.to_thread(handle.read, FILE_CHUNK_BYTES):
+            yield encode_line({"file": file_path, "offset": offset, "data": base64.b64encode(chunk).decode()})
+            offset += len(chunk)
+    finally:
+        await asyncio.to_thread(handle.close)
+
+
+async def gzip_stream(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+async def iter_snapshot_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Split a (possibly gzip-compressed) byte stream into NDJSON lines."""
+    decompressor = None
+    first = True
+    pending = b""
+    async for chunk in chunks:
+        if first and chunk:
+            first = False
+            if chunk[:2] == b"\x1f\x8b":
+                decompressor = zlib.decompressobj(47)
+        if decompressor is not None:
+            try:
+                chunk = decompressor.decompress(chunk)
+            except zlib.error as e:
+                raise ValueError(f"Corrupt gzip data: {e}") from e
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if decompressor is not None:
+        pending += decompressor.flush()
+        if not decompressor.eof:
+            raise ValueError("Gzip data is truncated")
+    if pending.strip():
+        yield pending
+
+
+class FileRestorer:
+    """Reassembles inline asset files, confined to the uploads directory."""
+
+    def __init__(self, uploads_dir: Path):
+        self.uploads_root = uploads_dir.resolve()
+        self.path: Optional[Path] = None
+        self.partial: Optional[Path] = None
+        self.handle = None
+        self.count = 0
+
+    async def write(self, file_path: str, offset: int, data: bytes) -> None:
+        target = Path(file_path)
+        if self.path != target or offset == 0:
+            await self.close()
+            if self.uploads_root not in target.resolve().parents:
+                raise ValueError(f"Refusing to restore file outside uploads: {file_path}")
+            await asyncio.to_thread(target.parent.mkdir, parents=True, exist_ok=True)
+            self.path = target
+            self.partial = target.with_name(f".{target.name}.restore")
+            self.handle = await asyncio.to_thread(open, self.partial, "wb")
+        await asyncio.to_thread(self.handle.write, data)
+
+    async def close(self) -> None:
+        if self.handle is not None:
+            await asyncio.to_thread(self.handle.close)
+            await asyncio.to_thread(os.replace, self.partial, self.path)
+            self.count += 1
+        self.path = self.partial = self.handle = None
+
+    async def discard(self) -> None:
+        if self.handle is not None:
+            await asyncio.to_thread(self.handle.close)
+            await asyncio.to_thread(self.partial.unlink, True)
+        self.path = self.partial = self.handle = None
+
+
+async def restore_snapshot(db, lines: AsyncIterator[bytes], uploads_dir: Path, replace: bool = False) -> Dict[str, int]:
+    """Upsert every document by _id in batches and rewrite inline files.
+
+    With ``replace`` the collections named in the header are rebuilt from
+    staging collections once the end line has been read, so documents created
+    after the snapshot do not survive and a failed restore changes nothing.
+    Invalid lines and rejected writes raise RestoreError with the
+    per-collection counts written before the failure (none when replacing).
+    """
+    counts: Dict[str, int] = {}
+    batches: Dict[str, List[ReplaceOne]] = {}
+    files = FileRestorer(uploads_dir)
+    staged: List[str] = []
+    header_seen = end_seen = False
+    line_number = 0
+
+    def written() -> Dict[str, int]:
+        return {} if replace else counts
+
+    async def flush(name: str) -> None:
+        batch = batches.pop(name, None)
+        if not batch:
+            return
+        try:
+            await db[name + STAGING_SUFFIX if replace else name].bulk_write(batch, ordered=False)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            counts[name] = counts.get(name, 0) + len(batch) - len(errors)
+            first = errors[0].get("errmsg", "") if errors else str(e)
+            raise RestoreError(f"{len(errors)} {name} document(s) could not be written: {first}", written()) from e
+        counts[name] = counts.get(name, 0) + len(batch)
+
+    try:
+        async for line in lines:
+            line_number += 1
+            entry = json_util.loads(line)
+            if end_seen:
+                raise ValueError("Data after the end line")
+            if "snapshot" in entry:
+                if entry["snapshot"].get("version") != SNAPSHOT_VERSION:
+                    raise ValueError(f"Unsupported snapshot version: {entry['snapshot'].get('version')}")
+                header_seen = True
+                if replace:
+                    staged = [name for name in entry["snapshot"].get("collections", EXPORT_COLLECTIONS) if name in EXPORT_COLLECTIONS]
+                    for name in staged:
+                        await db[name + STAGING_SUFFIX].drop()
+            elif not header_seen:
+                raise ValueError("Snapshot header missing")
+            elif "collection" in entry:
+                name, doc = entry["collection"], entry["doc"]
+                if name not in EXPORT_COLLECTIONS or (replace and name not in staged):
+                    raise ValueError(f"Unknown collection in snapshot: {name}")
+                if not isinstance(doc, dict) or "_id" not in doc:
+                    raise ValueError(f"{name} document without _id")
+                batches.setdefault(name, []).append(ReplaceOne({"_id": doc["_id"]}, doc, upsert=True))
+                if len(batches[name]) >= RESTORE_BATCH_SIZE:
+                    await flush(name)
+            elif "file" in entry:
+                await files.write(entry["file"], entry["offset"], base64.b64decode(entry["data"]))
+            elif "end" in entry:
+                end_seen = True
+        if not end_seen:
+            raise ValueError("Snapshot ended before its end line")
+        for name in list(batches):
+            await flush(name)
+        await files.close()
+        if replace:
+            # Each swap is atomic and keeps the target's indexes; a failure
+            # part way leaves the collections before it replaced
+            replaced: Dict[str, int] = {}
+            for name in staged:
+                try:
+                    if counts.get(name):
+                        await db[name + STAGING_SUFFIX].aggregate([{"$out": name}]).to_list(None)
+                    else:
+                        await db[name].delete_many({})
+                except OperationFailure as e:
+                    raise RestoreError(f"{name} could not be replaced: {e}", replaced) from e
+                replaced[name] = counts.get(name, 0)
+    except RestoreError:
+        await files.discard()
+        raise
+    except (KeyError, TypeError, ValueError) as e:
+        await files.discard()
+        reason = f"missing field {e}" if isinstance(e, KeyError) else str(e)
+        raise RestoreError(f"Invalid snapshot line {line_number}: {reason}", written()) from e
+    except BaseException:
+        await files.discard()
+        raise
+    finally:
+        for name in staged:
+            await db[name + STAGING_SUFFIX].drop()
+    counts["files"] = files.count
+    return counts
+
+
+cli = typer.Typer(help="Export or restore a MythRealms project snapshot.")
+
+
+def connect():
+    load_dotenv(Path(__file__).parent / ".env")
+    return AsyncIOMotorClient(os.environ["MONGO_URL"])[os.environ["DB_NAME"]]
+
+
+@cli.command()
+def export(
+    output: Path,
+    compress: bool = typer.Option(False, "--gzip", help="Gzip-compress the snapshot."),
+    inline_assets: bool = typer.Option(False, "--inline-assets", help="Embed asset bytes in the snapshot."),
+):
+    async def run():
+        stream = export_snapshot(connect(), inline_assets=inline_assets)
+        with open(output, "wb") as handle:
+            async for chunk in (gzip_stream(stream) if compress else stream):
+                handle.write(chunk)
+
+    asyncio.run(run())
+
+
+@cli.command()
+def restore(
+    source: Path,
+    uploads_dir: Path = typer.Option(Path("uploads"), help="Directory inline asset files are restored into."),
+    replace: bool = typer.Option(False, "--replace", help="Empty the snapshot's collections first instead of merging."),
+):
+    async def read_chunks():
+        with open(source, "rb") as handle:
+            while chunk := handle.read(FILE_CHUNK_BYTES):
+                yield chunk
+
+    async def run():
+        return await restore_snapshot(connect(), iter_snapshot_lines(read_chunks()), uploads_dir, replace=replace)
+
+    typer.echo(asyncio.run(run()))
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,202 @@
+"""Pairwise transition compatibility between music tracks.
+
+Scores say how well track ``i`` can crossfade into track ``j`` and combine
+three vectorized components:
+
+* tempo: ratio of the two tempos, folded over half/double time, decaying
+  linearly to 0 at ``TEMPO_TOLERANCE``;
+* key: distance on the circle of fifths, relative major/minor counting as
+  neighbours;
+* mood: a directed transition table (exploration to combat is smoother than
+  combat to meditation).
+
+Each realm keeps its track attributes in flat arrays and the score matrix in
+an over-allocated square buffer, so adding or changing a track only
+recomputes that track's row and column. Realms larger than ``max_tracks`` keep
+the attributes only and compute rows on demand.
+"""
+import math
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+PITCH_CLASSES = {"c": 0, "d": 2, "e": 4, "f": 5, "g": 7, "a": 9, "b": 11}
+KEY_RE = re.compile(r"^\s*([a-g])\s*([#b♯♭]?)\s*(major|minor|maj|min|m)?\s*$", re.IGNORECASE)
+
+MOODS = ["exploration", "combat", "meditation"]
+# MOOD_TRANSITIONS[from][to]; unknown moods score UNKNOWN_MOOD against others
+MOOD_TRANSITIONS = {
+    "exploration": {"exploration": 1.0, "combat": 0.9, "meditation": 0.8},
+    "combat": {"exploration": 0.7, "combat": 1.0, "meditation": 0.3},
+    "meditation": {"exploration": 0.8, "combat": 0.4, "meditation": 1.0},
+}
+UNKNOWN_MOOD = 0.5
+UNKNOWN_KEY = 0.5
+MODE_CHANGE_PENALTY = 0.5  # in circle-of-fifths steps
+TEMPO_TOLERANCE = 1.25
+HALF_TIME_FACTOR = 0.9
+WEIGHTS = {"tempo": 0.4, "key": 0.35, "mood": 0.25}
+
+
+def parse_key(key: str) -> Tuple[float, float]:
+    """Return (circle-of-fifths position of the relative major, minor flag).
+
+    Unparseable keys return NaN for both and score ``UNKNOWN_KEY``.
+    """
+    match = KEY_RE.match(key or "")
+    if not match:
+        return math.nan, math.nan
+    note, accidental, mode = match.groups()
+    pitch = PITCH_CLASSES[note.lower()] + {"#": 1, "♯": 1, "b": -1, "♭": -1}.get(accidental, 0)
+    minor = (mode or "").lower() in ("minor", "min", "m") or (not mode and note.islower())
+    if minor:
+        pitch += 3
+    return float((pitch * 7) % 12), float(minor)
+
+
+def mood_code(mood: str) -> int:
+    mood = (mood or "").lower()
+    return MOODS.index(mood) if mood in MOODS else -1
+
+
+# Directed mood table with a trailing row and column for unknown moods
+MOOD_TABLE = np.full((len(MOODS) + 1, len(MOODS) + 1), UNKNOWN_MOOD, dtype=np.float32)
+for _from, _targets in MOOD_TRANSITIONS.items():
+    for _to, _score in _targets.items():
+        MOOD_TABLE[MOODS.index(_from), MOODS.index(_to)] = _score
+
+
+class Tracks:
+    """Column-oriented track attributes for one realm."""
+
+    def __init__(self, tracks: Sequence[Dict]):
+        self.tempo = np.array([track_tempo(track) for track in tracks], dtype=np.float64)
+        keys = [parse_key(track.get("key", "")) for track in tracks]
+        self.fifths = np.array([position for position, _ in keys], dtype=np.float64)
+        self.minor = np.array([minor for _, minor in keys], dtype=np.float64)
+        self.mood = np.array([mood_code(track.get("mood", "")) for track in tracks], dtype=np.int64)
+
+    def put(self, row: int, track: Dict) -> None:
+        values = (track_tempo(track), *parse_key(track.get("key", "")), mood_code(track.get("mood", "")))
+        if row == len(self.tempo):
+            self.tempo, self.fifths, self.minor, self.mood = (
+                np.append(column, value).astype(column.dtype)
+                for column, value in zip((self.tempo, self.fifths, self.minor, self.mood), values)
+            )
+        else:
+            self.tempo[row], self.fifths[row], self.minor[row], self.mood[row] = values
+
+
+def track_tempo(track: Dict) -> float:
+    return max(float(track.get("tempo") or 0), 1.0)
+
+
+def component_scores(src: Tracks, src_index, dst: Tracks, dst_index) -> Dict[str, np.ndarray]:
+    """Scores from the ``src_index`` tracks (rows) to the ``dst_index`` tracks (columns)."""
+    tempo_a = src.tempo[src_index][:, None]
+    tempo_b = dst.tempo[dst_index][None, :]
+    octaves = np.log2(tempo_b / tempo_a)
+    folded = np.abs(octaves - np.round(octaves))
+    tempo = np.clip(1.0 - folded * math.log(2) / math.log(TEMPO_TOLERANCE), 0.0, 1.0)
+    tempo = np.where(np.abs(np.round(octaves)) >= 1, tempo * HALF_TIME_FACTOR, tempo)
+
+    steps = np.abs(src.fifths[src_index][:, None] - dst.fifths[dst_index][None, :])
+    steps = np.minimum(steps, 12 - steps)
+    steps = steps + MODE_CHANGE_PENALTY * (src.minor[src_index][:, None] != dst.minor[dst_index][None, :])
+    key = np.clip(1.0 - steps / 6.0, 0.0, 1.0)
+    key = np.where(np.isnan(key), UNKNOWN_KEY, key)
+
+    mood = MOOD_TABLE[src.mood[src_index][:, None], dst.mood[dst_index][None, :]]
+    return {"tempo": tempo, "key": key, "mood": mood}
+
+
+def combine(components: Dict[str, np.ndarray]) -> np.ndarray:
+    return sum(WEIGHTS[name] * components[name] for name in WEIGHTS).astype(np.float32)
+
+
+class RealmMatrix:
+    def __init__(self, tracks: Sequence[Dict], max_tracks: int):
+        self.max_tracks = max_tracks
+        self.tracks: List[Dict] = list(tracks)
+        self.row_of = {track["id"]: row for row, track in enumerate(self.tracks)}
+        self.columns = Tracks(self.tracks)
+        self.buffer: Optional[np.ndarray] = None
+        if len(self.tracks) <= max_tracks:
+            everything = np.arange(len(self.tracks))
+            self.buffer = self._allocate(len(self.tracks))
+            self.buffer[:len(self.tracks), :len(self.tracks)] = combine(
+                component_scores(self.columns, everything, self.columns, everything)
+            )
+
+    def __len__(self) -> int:
+        return len(self.tracks)
+
+    @property
+    def materialized(self) -> bool:
+        return self.buffer is not None
+
+    @property
+    def matrix(self) -> np.ndarray:
+        n = len(self.tracks)
+        scores = self.buffer[:n, :n].copy()
+        np.fill_diagonal(scores, np.nan)
+        return scores
+
+    def upsert(self, track: Dict) -> None:
+        row = self.row_of.get(track["id"])
+        if row is None:
+            row = len(self.tracks)
+            self.tracks.append(track)
+            self.row_of[track["id"]] = row
+        else:
+            self.tracks[row] = track
+        self.columns.put(row, track)
+        self._refresh(row)
+
+    def row(self, track_id: str) -> Optional[np.ndarray]:
+        """Scores from one track to every track in the realm (NaN for itself)."""
+        row = self.row_of.get(track_id)
+        if row is None:
+            return None
+        if self.buffer is not None:
+            scores = self.buffer[row, :len(self.tracks)].copy()
+        else:
+            scores = combine(component_scores(self.columns, [row], self.columns, np.arange(len(self.tracks))))[0]
+        scores[row] = np.nan
+        return scores
+
+    def candidates(self, track_id: str, limit: int, mood: Optional[str] = None,
+                   min_score: float = 0.0) -> List[Tuple[int, float, Dict[str, float]]]:
+        """Best transitions out of one track as (row, score, component scores)."""
+        scores = self.row(track_id)
+        eligible = ~np.isnan(scores) & (scores >= min_score)
+        if mood:
+            eligible &= self.columns.mood == mood_code(mood)
+        columns = np.flatnonzero(eligible)
+        if len(columns) > limit:
+            columns = columns[np.argpartition(-scores[columns], limit - 1)[:limit]]
+        columns = columns[np.argsort(-scores[columns], kind="stable")]
+        parts = component_scores(self.columns, [self.row_of[track_id]], self.columns, columns)
+        return [
+            (column, round(float(scores[column]), 3), {name: round(float(values[0, position]), 3) for name, values in parts.items()})
+            for position, column in enumerate(columns.tolist())
+        ]
+
+    def _allocate(self, n: int) -> np.ndarray:
+        return np.zeros((max(n, 16), max(n, 16)), dtype=np.float32)
+
+    def _refresh(self, row: int) -> None:
+        n = len(self.tracks)
+        if self.buffer is None:
+            return
+        if n > self.max_tracks:
+            self.buffer = None
+            return
+        if n > len(self.buffer):
+            grown = self._allocate(min(2 * len(self.buffer), self.max_tracks))
+            grown[:n - 1, :n - 1] = self.buffer[:n - 1, :n - 1]
+            self.buffer = grown
+        everything = np.arange(n)
+        self.buffer[row, :n] = combine(component_scores(self.columns, [row], self.columns, everything))[0]
+        self.buffer[:n, row] = combine(component_scores(self.columns, everything, self.columns, [row]))[:, 0]
@@ -150,6 +150,10 @@ class MythRealmsAPITester:
         # Test get characters by type
         self.run_test("Get Characters by Type", "GET", "characters", 200, params={"character_type": "hero"})
         
+        # Test paginated characters
+        self.run_test("Get Characters Page", "GET", "characters", 200, params={"limit": 1})
+        self.run_test("Get Characters with Bad Cursor", "GET", "characters", 400, params={"cursor": "not-a-cursor"})
+        
         return True
 
     def test_weapon_management(self):
@@ -1,5 +1,7 @@
 import { useState, useEffect } from "react";
 import { apiClient } from "../App";
+import { useChangeFeed, applyChange } from "../hooks/use-change-feed";
+import { fetchAllPages } from "../lib/pagination";
 
 const AssetManager = () => {
   const [assets, setAssets] = useState([]);
@@ -18,13 +20,21 @@ const AssetManager = () => {
     fetchAssets();
   }, [selectedCategory]);
 
+  const matchesFilters = (item) =>
+    selectedCategory === "all" || item.category === selectedCategory;
+
+  useChangeFeed(
+    "assets",
+    (change) => setAssets((current) => applyChange(current, change, matchesFilters)),
+    () => fetchAssets()
+  );
+
   const fetchAssets = async () => {
     try {
       const params = new URLSearchParams();
       if (selectedCategory !== "all") params.append("category", selectedCategory);
       
-      const response = await apiClient.get(`/assets?${params}`);
-      setAssets(response.data);
+      setAssets(await fetchAllPages("/assets", params));
     } catch (error) {
       console.error("Error fetching assets:", error);
     } finally {
@@ -58,14 +68,14 @@ const AssetManager = () => {
         uploadData.append("description", formData.description);
         uploadData.append("tags", JSON.stringify(formData.tags.split(",").map(tag => tag.trim()).filter(Boolean)));
 
-        await apiClient.post("/assets", uploadData, {
+        const response = await apiClient.post("/assets", uploadData, {
           headers: {
             "Content-Type": "multipart/form-data"
           }
         });
 
         setShowUploadModal(false);
-        await fetchAssets();
+        setAssets((current) => applyChange(current, { action: "created", id: response.data.id, doc: response.data }, matchesFilters));
         setFormData({
           name: "",
           category: "image", 
@@ -258,7 +268,7 @@ const AssetManager = () => {
             <div className="aspect-square bg-gray-800 rounded-lg mb-4 flex items-center justify-center overflow-hidden">
               {asset.category === "image" && asset.file_path ? (
                 <img 
-                  src={`${process.env.REACT_APP_BACKEND_URL}/${asset.file_path}`}
+                  src={`${process.env.REACT_APP_BACKEND_URL}/${asset.derivatives?.thumbnails?.["512"] || asset.file_path}`}
                   alt={asset.name}
                   className="w-full h-full object-cover"
                   onError={(e) => {
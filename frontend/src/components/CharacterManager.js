@@ -1,5 +1,7 @@
 import { useState, useEffect } from "react";
 import { apiClient } from "../App";
+import { useChangeFeed, applyChange } from "../hooks/use-change-feed";
+import { fetchAllPages } from "../lib/pagination";
 
 const CharacterManager = () => {
   const [characters, setCharacters] = useState([]);
@@ -29,14 +31,23 @@ const CharacterManager = () => {
     fetchCharacters();
   }, [selectedRealm, selectedType]);
 
+  const matchesFilters = (item) =>
+    (selectedRealm === "all" || item.realm === selectedRealm) &&
+    (selectedType === "all" || item.character_type === selectedType);
+
+  useChangeFeed(
+    "characters",
+    (change) => setCharacters((current) => applyChange(current, change, matchesFilters)),
+    () => fetchCharacters()
+  );
+
   const fetchCharacters = async () => {
     try {
       const params = new URLSearchParams();
       if (selectedRealm !== "all") params.append("realm", selectedRealm);
       if (selectedType !== "all") params.append("character_type", selectedType);
       
-      const response = await apiClient.get(`/characters?${params}`);
-      setCharacters(response.data);
+      setCharacters(await fetchAllPages("/characters", params));
     } catch (error) {
       console.error("Error fetching characters:", error);
     } finally {
@@ -64,9 +75,9 @@ const CharacterManager = () => {
 
       setCreating(true);
       try {
-        await apiClient.post("/characters", formData);
+        const response = await apiClient.post("/characters", formData);
         setShowCreateModal(false);
-        await fetchCharacters();
+        setCharacters((current) => applyChange(current, { action: "created", id: response.data.id, doc: response.data }, matchesFilters));
         setFormData({
           name: "",
           description: "",
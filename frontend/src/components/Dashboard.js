@@ -10,29 +10,15 @@ const Dashboard = () => {
   useEffect(() => {
     const fetchDashboardData = async () => {
       try {
-        const [statsResponse, documentsResponse, charactersResponse] = await Promise.all([
-          apiClient.get("/dashboard/stats"),
-          apiClient.get("/documents?limit=5"),
-          apiClient.get("/characters?limit=5"),
-        ]);
+        const response = await apiClient.get("/home?limit=5&activity=10");
 
-        setStats(statsResponse.data);
+        setStats(response.data.stats);
         
-        // Combine recent activity
-        const activity = [
-          ...documentsResponse.data.map(doc => ({ 
-            type: "document", 
-            item: doc, 
-            action: "updated",
-            time: new Date(doc.updated_at)
-          })),
-          ...charactersResponse.data.map(char => ({ 
-            type: "character", 
-            item: char, 
-            action: "created",
-            time: new Date(char.created_at)
-          }))
-        ].sort((a, b) => b.time - a.time).slice(0, 10);
+        // Recent activity is merged and ordered server-side
+        const activity = response.data.recent_activity.map(entry => ({
+          ...entry,
+          time: new Date(entry.time)
+        }));
 
         setRecentActivity(activity);
       } catch (error) {
@@ -206,7 +192,7 @@ const Dashboard = () => {
                   </div>
                   <div className="flex-1">
                     <p className="text-white text-sm font-medium">
-                      {activity.type === "document" ? activity.item.title : activity.item.name}
+                      {activity.item.title || activity.item.name}
                     </p>
                     <p className="text-gray-400 text-xs">
                       {activity.action} • {activity.time.toLocaleDateString()}
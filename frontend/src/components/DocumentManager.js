@@ -1,6 +1,8 @@
 import { useState, useEffect } from "react";
 import { useParams, useNavigate } from "react-router-dom";
 import { apiClient } from "../App";
+import { useChangeFeed, applyChange } from "../hooks/use-change-feed";
+import { fetchAllPages } from "../lib/pagination";
 
 const DocumentManager = () => {
   const { documentId } = useParams();
@@ -105,6 +107,12 @@ const DocumentManager = () => {
     fetchDocuments();
   }, []);
 
+  useChangeFeed(
+    "documents",
+    (change) => setDocuments((current) => applyChange(current, change)),
+    () => fetchDocuments()
+  );
+
   useEffect(() => {
     if (documentId && documentId !== "new") {
       fetchDocument(documentId);
@@ -121,8 +129,7 @@ const DocumentManager = () => {
 
   const fetchDocuments = async () => {
     try {
-      const response = await apiClient.get("/documents");
-      setDocuments(response.data);
+      setDocuments(await fetchAllPages("/documents", { fields: "title,document_type,tags,version,updated_at" }));
     } catch (error) {
       console.error("Error fetching documents:", error);
     } finally {
@@ -157,15 +164,15 @@ const DocumentManager = () => {
         
         const response = await apiClient.post("/documents", documentData);
         setCurrentDocument(response.data);
+        setDocuments((current) => applyChange(current, { action: "created", id: response.data.id, doc: response.data }));
         setIsCreating(false);
         navigate(`/documents/${response.data.id}`, { replace: true });
       } else {
         // Update existing document
         const response = await apiClient.put(`/documents/${currentDocument.id}`, currentDocument);
         setCurrentDocument(response.data);
+        setDocuments((current) => applyChange(current, { action: "updated", id: response.data.id, doc: response.data }));
       }
-      
-      await fetchDocuments(); // Refresh list
     } catch (error) {
       console.error("Error saving document:", error);
       alert("Error saving document. Please try again.");
@@ -1,5 +1,7 @@
 import { useState, useEffect } from "react";
 import { apiClient } from "../App";
+import { useChangeFeed, applyChange } from "../hooks/use-change-feed";
+import { fetchAllPages } from "../lib/pagination";
 
 const MusicManager = () => {
   const [tracks, setTracks] = useState([]);
@@ -35,14 +37,23 @@ const MusicManager = () => {
     fetchTracks();
   }, [selectedRealm, selectedMood]);
 
+  const matchesFilters = (item) =>
+    (selectedRealm === "all" || item.realm === selectedRealm) &&
+    (selectedMood === "all" || item.mood === selectedMood);
+
+  useChangeFeed(
+    "music",
+    (change) => setTracks((current) => applyChange(current, change, matchesFilters)),
+    () => fetchTracks()
+  );
+
   const fetchTracks = async () => {
     try {
       const params = new URLSearchParams();
       if (selectedRealm !== "all") params.append("realm", selectedRealm);
       if (selectedMood !== "all") params.append("mood", selectedMood);
       
-      const response = await apiClient.get(`/music?${params}`);
-      setTracks(response.data);
+      setTracks(await fetchAllPages("/music", params));
     } catch (error) {
       console.error("Error fetching music tracks:", error);
     } finally {
@@ -57,9 +68,28 @@ const MusicManager = () => {
       mood: "exploration",
       tempo: 120,
       key: "C",
-      instrumentation: []
+      instrumentation: [],
+      asset_id: ""
     });
     const [creating, setCreating] = useState(false);
+    const [audioAssets, setAudioAssets] = useState([]);
+
+    useEffect(() => {
+      fetchAllPages("/assets", { category: "audio", fields: "name,derivatives" })
+        .then(setAudioAssets)
+        .catch((error) => console.error("Error fetching audio assets:", error));
+    }, []);
+
+    const selectAudioAsset = (assetId) => {
+      const analysis = audioAssets.find(asset => asset.id === assetId)?.derivatives?.analysis;
+      setFormData(prev => ({
+        ...prev,
+        asset_id: assetId,
+        tempo: analysis?.bpm ? Math.round(analysis.bpm) : prev.tempo
+      }));
+    };
+
+    const selectedAnalysis = audioAssets.find(asset => asset.id === formData.asset_id)?.derivatives?.analysis;
 
     const toggleInstrument = (instrument) => {
       setFormData(prev => ({
@@ -79,16 +109,17 @@ const MusicManager = () => {
 
       setCreating(true);
       try {
-        await apiClient.post("/music", formData);
+        const response = await apiClient.post("/music", { ...formData, asset_id: formData.asset_id || null });
         setShowCreateModal(false);
-        await fetchTracks();
+        setTracks((current) => applyChange(current, { action: "created", id: response.data.id, doc: response.data }, matchesFilters));
         setFormData({
           name: "",
           realm: "forest",
           mood: "exploration",
           tempo: 120,
           key: "C",
-          instrumentation: []
+          instrumentation: [],
+          asset_id: ""
         });
       } catch (error) {
         console.error("Error creating music track:", error);
@@ -161,6 +192,28 @@ const MusicManager = () => {
               </div>
             </div>
 
+            <div>
+              <label className="block text-sm font-medium text-gray-300 mb-2">
+                Audio Asset
+              </label>
+              <select
+                value={formData.asset_id}
+                onChange={(e) => selectAudioAsset(e.target.value)}
+                className="form-input"
+              >
+                <option value="">None</option>
+                {audioAssets.map(asset => (
+                  <option key={asset.id} value={asset.id}>{asset.name}</option>
+                ))}
+              </select>
+              {selectedAnalysis && (
+                <p className="text-xs text-gray-400 mt-1">
+                  {selectedAnalysis.bpm ? `Detected ${selectedAnalysis.bpm} BPM` : "No steady tempo detected"}
+                  {selectedAnalysis.loudness_lufs != null && ` · ${selectedAnalysis.loudness_lufs} LUFS`}
+                </p>
+              )}
+            </div>
+
             <div className="grid grid-cols-1 md:grid-cols-2 gap-6">
               <div>
                 <label className="block text-sm font-medium text-gray-300 mb-2">
@@ -1,5 +1,7 @@
 import { useState, useEffect } from "react";
 import { apiClient } from "../App";
+import { useChangeFeed, applyChange } from "../hooks/use-change-feed";
+import { fetchAllPages } from "../lib/pagination";
 
 const QuestManager = () => {
   const [quests, setQuests] = useState([]);
@@ -27,14 +29,23 @@ const QuestManager = () => {
     fetchQuests();
   }, [selectedRealm, selectedType]);
 
+  const matchesFilters = (item) =>
+    (selectedRealm === "all" || item.realm === selectedRealm) &&
+    (selectedType === "all" || item.quest_type === selectedType);
+
+  useChangeFeed(
+    "quests",
+    (change) => setQuests((current) => applyChange(current, change, matchesFilters)),
+    () => fetchQuests()
+  );
+
   const fetchQuests = async () => {
     try {
       const params = new URLSearchParams();
       if (selectedRealm !== "all") params.append("realm", selectedRealm);
       if (selectedType !== "all") params.append("quest_type", selectedType);
       
-      const response = await apiClient.get(`/quests?${params}`);
-      setQuests(response.data);
+      setQuests(await fetchAllPages("/quests", params));
     } catch (error) {
       console.error("Error fetching quests:", error);
     } finally {
@@ -87,9 +98,9 @@ const QuestManager = () => {
 
       setCreating(true);
       try {
-        await apiClient.post("/quests", questData);
+        const response = await apiClient.post("/quests", questData);
         setShowCreateModal(false);
-        await fetchQuests();
+        setQuests((current) => applyChange(current, { action: "created", id: response.data.id, doc: response.data }, matchesFilters));
         setFormData({
           title: "",
           description: "",
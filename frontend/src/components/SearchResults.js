@@ -1,4 +1,4 @@
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
 import { useSearchParams, Link } from "react-router-dom";
 import { apiClient } from "../App";
 
@@ -7,6 +7,8 @@ const SearchResults = () => {
   const [results, setResults] = useState(null);
   const [loading, setLoading] = useState(false);
   const [query, setQuery] = useState(searchParams.get("q") || "");
+  const [suggestions, setSuggestions] = useState([]);
+  const latestSuggestion = useRef(0);
 
   useEffect(() => {
     if (query.trim()) {
@@ -14,6 +16,31 @@ const SearchResults = () => {
     }
   }, []);
 
+  // Typeahead from the in-memory autocomplete index; stale replies are ignored
+  const fetchSuggestions = (value) => {
+    const requestId = ++latestSuggestion.current;
+    if (!value.trim()) {
+      setSuggestions([]);
+      return;
+    }
+    apiClient
+      .get("/autocomplete", { params: { q: value, limit: 8 } })
+      .then((response) => {
+        if (requestId === latestSuggestion.current) {
+          setSuggestions(response.data.suggestions);
+        }
+      })
+      .catch((error) => console.error("Error fetching suggestions:", error));
+  };
+
+  const selectSuggestion = (suggestion) => {
+    latestSuggestion.current += 1;
+    setSuggestions([]);
+    setQuery(suggestion.label);
+    setSearchParams({ q: suggestion.label });
+    performSearch(suggestion.label);
+  };
+
   const performSearch = async (searchQuery) => {
     setLoading(true);
     try {
@@ -28,6 +55,8 @@ const SearchResults = () => {
 
   const handleSearch = (e) => {
     e.preventDefault();
+    latestSuggestion.current += 1;
+    setSuggestions([]);
     if (query.trim()) {
       setSearchParams({ q: query });
       performSearch(query);
@@ -36,17 +65,20 @@ const SearchResults = () => {
 
   const getTotalResults = () => {
     if (!results) return 0;
-    return Object.values(results).reduce((total, items) => total + items.length, 0);
+    return results.total;
   };
 
-  const renderResultSection = (title, items, icon, linkPrefix) => {
-    if (!items || items.length === 0) return null;
+  // Hits arrive as one ranked list; each section keeps that order
+  const renderResultSection = (title, type, icon, linkPrefix) => {
+    const items = results.results.filter((hit) => hit.type === type).map((hit) => hit.item);
+    if (items.length === 0) return null;
+    const matches = results.facets[type];
 
     return (
       <div className="mb-8">
         <h3 className="text-xl font-semibold text-white mb-4 flex items-center">
           <span className="mr-2">{icon}</span>
-          {title} ({items.length})
+          {title} ({matches > items.length ? `${items.length} of ${matches}` : items.length})
         </h3>
         <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-4">
           {items.map((item) => (
@@ -91,14 +123,37 @@ const SearchResults = () => {
       {/* Search Form */}
       <form onSubmit={handleSearch} className="max-w-2xl">
         <div className="flex gap-3">
-          <input
-            type="text"
-            value={query}
-            onChange={(e) => setQuery(e.target.value)}
-            placeholder="Search for anything in MythRealms..."
-            className="form-input flex-1"
-            autoFocus
-          />
+          <div className="relative flex-1">
+            <input
+              type="text"
+              value={query}
+              onChange={(e) => {
+                setQuery(e.target.value);
+                fetchSuggestions(e.target.value);
+              }}
+              onBlur={() => setTimeout(() => setSuggestions([]), 150)}
+              placeholder="Search for anything in MythRealms..."
+              className="form-input w-full"
+              autoFocus
+            />
+            {suggestions.length > 0 && (
+              <ul className="absolute left-0 right-0 mt-1 bg-gray-800 border border-gray-700 rounded-lg shadow-lg z-10 overflow-hidden">
+                {suggestions.map((suggestion) => (
+                  <li key={`${suggestion.type}-${suggestion.id}`}>
+                    <button
+                      type="button"
+                      onMouseDown={(e) => e.preventDefault()}
+                      onClick={() => selectSuggestion(suggestion)}
+                      className="w-full flex items-center justify-between px-4 py-2 text-left hover:bg-gray-700 transition-colors"
+                    >
+                      <span className="text-white line-clamp-1">{suggestion.label}</span>
+                      <span className="badge badge-gray text-xs capitalize">{suggestion.type}</span>
+                    </button>
+                  </li>
+                ))}
+              </ul>
+            )}
+          </div>
           <button
             type="submit"
             disabled={loading || !query.trim()}
@@ -140,11 +195,11 @@ const SearchResults = () => {
                 </span>
               </div>
 
-              {renderResultSection("Documents", results.documents, "📄", "/documents")}
-              {renderResultSection("Characters", results.characters, "👤", "/characters")}
-              {renderResultSection("Weapons", results.weapons, "⚔️", "/weapons")}
-              {renderResultSection("Quests", results.quests, "📋", "/quests")}
-              {renderResultSection("Music", results.music, "🎵", "/music")}
+              {renderResultSection("Documents", "documents", "📄", "/documents")}
+              {renderResultSection("Characters", "characters", "👤", "/characters")}
+              {renderResultSection("Weapons", "weapons", "⚔️", "/weapons")}
+              {renderResultSection("Quests", "quests", "📋", "/quests")}
+              {renderResultSection("Music", "music", "🎵", "/music")}
             </>
           ) : (
             <div className="text-center py-12">
@@ -51,18 +51,13 @@ const ShowcaseHome = () => {
   useEffect(() => {
     const fetchShowcaseData = async () => {
       try {
-        const [statsRes, charactersRes, weaponsRes, questsRes] = await Promise.all([
-          apiClient.get("/dashboard/stats"),
-          apiClient.get("/characters?limit=6"),
-          apiClient.get("/weapons?limit=6"), 
-          apiClient.get("/quests?limit=6")
-        ]);
+        const response = await apiClient.get("/home?limit=6");
 
-        setStats(statsRes.data);
+        setStats(response.data.stats);
         setFeaturedContent({
-          characters: charactersRes.data,
-          weapons: weaponsRes.data,
-          quests: questsRes.data
+          characters: response.data.characters,
+          weapons: response.data.weapons,
+          quests: response.data.quests
         });
       } catch (error) {
         console.error("Error fetching showcase data:", error);
@@ -1,5 +1,7 @@
 import { useState, useEffect } from "react";
 import { apiClient } from "../App";
+import { useChangeFeed, applyChange } from "../hooks/use-change-feed";
+import { fetchAllPages } from "../lib/pagination";
 
 const WeaponManager = () => {
   const [weapons, setWeapons] = useState([]);
@@ -20,13 +22,21 @@ const WeaponManager = () => {
     fetchWeapons();
   }, [selectedType]);
 
+  const matchesFilters = (item) =>
+    selectedType === "all" || item.weapon_type === selectedType;
+
+  useChangeFeed(
+    "weapons",
+    (change) => setWeapons((current) => applyChange(current, change, matchesFilters)),
+    () => fetchWeapons()
+  );
+
   const fetchWeapons = async () => {
     try {
       const params = new URLSearchParams();
       if (selectedType !== "all") params.append("weapon_type", selectedType);
       
-      const response = await apiClient.get(`/weapons?${params}`);
-      setWeapons(response.data);
+      setWeapons(await fetchAllPages("/weapons", params));
     } catch (error) {
       console.error("Error fetching weapons:", error);
     } finally {
@@ -53,9 +63,9 @@ const WeaponManager = () => {
 
       setCreating(true);
       try {
-        await apiClient.post("/weapons", formData);
+        const response = await apiClient.post("/weapons", formData);
         setShowCreateModal(false);
-        await fetchWeapons();
+        setWeapons((current) => applyChange(current, { action: "created", id: response.data.id, doc: response.data }, matchesFilters));
         setFormData({
           name: "",
           weapon_type: "sword",
@@ -0,0 +1,43 @@
+import { useEffect, useRef } from "react";
+import { apiClient } from "../App";
+
+// Subscribes to the server-sent change feed for one collection.
+// onChange receives { action, id, doc } for created/updated/deleted items;
+// onReset fires when the server cannot replay what was missed (bulk import,
+// snapshot restore, reconnecting to another worker) and the list should be
+// reloaded from the REST endpoint.
+export const useChangeFeed = (collection, onChange, onReset) => {
+  const handlers = useRef({ onChange, onReset });
+  handlers.current = { onChange, onReset };
+
+  useEffect(() => {
+    if (typeof EventSource === "undefined") return undefined;
+    const source = new EventSource(`${apiClient.defaults.baseURL}/events?collections=${collection}`);
+    source.addEventListener("change", (event) => {
+      const change = JSON.parse(event.data);
+      if (change.action === "bulk") {
+        handlers.current.onReset?.();
+      } else {
+        handlers.current.onChange?.(change);
+      }
+    });
+    source.addEventListener("reset", () => handlers.current.onReset?.());
+    return () => source.close();
+  }, [collection]);
+};
+
+// Applies one change to a list ordered newest first. Items that no longer
+// match the view's filters are dropped; repeated events are idempotent.
+export const applyChange = (items, change, matches = () => true) => {
+  if (change.action === "deleted") {
+    return items.filter((item) => item.id !== change.id);
+  }
+  if (!change.doc) return items;
+  if (!matches(change.doc)) {
+    return items.filter((item) => item.id !== change.id);
+  }
+  if (!items.some((item) => item.id === change.id)) {
+    return [change.doc, ...items];
+  }
+  return items.map((item) => (item.id === change.id ? { ...item, ...change.doc } : item));
+};
@@ -0,0 +1,20 @@
+import { apiClient } from "../App";
+
+const PAGE_SIZE = 500;
+
+// List endpoints return one page per request, newest first, with the cursor
+// for the next page in the X-Next-Cursor header (absent on the last page).
+// Follows the cursors and resolves with every row.
+export const fetchAllPages = async (path, params = {}) => {
+  const items = [];
+  let cursor = null;
+  do {
+    const query = new URLSearchParams(params);
+    query.set("limit", PAGE_SIZE);
+    if (cursor) query.set("cursor", cursor);
+    const response = await apiClient.get(`${path}?${query}`);
+    items.push(...response.data);
+    cursor = response.headers["x-next-cursor"];
+  } while (cursor);
+  return items;
+};
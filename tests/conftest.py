@@ -0,0 +1,49 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import mongomock_motor
+import motor.motor_asyncio
+import pytest
+
+# The backend modules import each other by plain module name
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+# server.py connects when it is imported; point it at an in-memory MongoDB
+motor.motor_asyncio.AsyncIOMotorClient = mongomock_motor.AsyncMongoMockClient
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    """The server module with an empty database and fresh in-memory state.
+
+    Startup hooks are not run, so no process pools or background tasks are
+    started; tests that need a worker drive it themselves.
+    """
+    import server
+    from admission import AdmissionControl
+    from events import EventBus
+    from response_cache import ResponseCache
+
+    for name in asyncio.run(server.db.list_collection_names()):
+        asyncio.run(server.db.drop_collection(name))
+    # uploads/ is relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "uploads").mkdir()
+    monkeypatch.setattr(server, "response_cache", ResponseCache(server.RESPONSE_CACHE_MAX_BYTES, server.RESPONSE_CACHE_TTL_SECONDS))
+    monkeypatch.setattr(server, "event_bus", EventBus(server.EVENT_HISTORY, server.EVENT_QUEUE_SIZE, server.EVENT_HEARTBEAT_SECONDS))
+    monkeypatch.setattr(server, "related_index", server.SimilarityIndex())
+    monkeypatch.setattr(server, "autocomplete_index", server.new_autocomplete_index())
+    monkeypatch.setattr(server, "derivative_queue", asyncio.Queue(maxsize=server.DERIVATIVE_QUEUE_SIZE))
+    monkeypatch.setattr(server, "admission", AdmissionControl(
+        server.ROUTE_CONCURRENCY, server.ROUTE_QUEUE_SIZE, server.ROUTE_QUEUE_TIMEOUT_SECONDS, server.ROUTE_LIMITS
+    ))
+    server.reset_transitions()
+    return server
+
+
+@pytest.fixture
+def client(server):
+    from fastapi.testclient import TestClient
+
+    return TestClient(server.app)
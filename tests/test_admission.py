@@ -0,0 +1,125 @@
+import asyncio
+
+import mongomock
+import pytest
+from pymongo import _csot
+from pymongo.errors import ExecutionTimeout
+
+from admission import AdmissionControl, RouteLimiter
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_requests_queue_for_a_slot_and_are_admitted_in_turn():
+    async def scenario():
+        limiter = RouteLimiter(limit=1, max_queue=1, queue_timeout=1.0)
+        assert await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.waiting == 1
+        limiter.release()
+        assert await waiter
+        assert limiter.waiting == 0
+
+    run(scenario())
+
+
+def test_a_full_queue_rejects_straight_away():
+    async def scenario():
+        limiter = RouteLimiter(limit=1, max_queue=1, queue_timeout=1.0)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert not await asyncio.wait_for(limiter.acquire(), 0.1)
+        limiter.release()
+        assert await waiter
+
+    run(scenario())
+
+
+def test_waiters_give_up_after_the_queue_timeout():
+    async def scenario():
+        limiter = RouteLimiter(limit=1, max_queue=4, queue_timeout=0.05)
+        await limiter.acquire()
+        assert not await limiter.acquire()
+        assert limiter.waiting == 0
+
+    run(scenario())
+
+
+def test_retry_after_rounds_the_queue_timeout_up_to_whole_seconds():
+    async def scenario():
+        assert RouteLimiter(1, 1, 0.2).retry_after == 1
+        assert RouteLimiter(1, 1, 2.5).retry_after == 3
+
+    run(scenario())
+
+
+def test_limiters_are_created_once_per_route_with_overrides():
+    async def scenario():
+        control = AdmissionControl(limit=4, max_queue=8, queue_timeout=1.0,
+                                   overrides={"/upload": (1, 2), "/health": (0, 0)})
+        default = control.limiter("/weapons")
+        assert control.limiter("/weapons") is default
+        assert (default.limit, default.max_queue) == (4, 8)
+        upload = control.limiter("/upload")
+        assert (upload.limit, upload.max_queue, upload.queue_timeout) == (1, 2, 1.0)
+        assert control.limiter("/health") is None
+
+    run(scenario())
+
+
+@pytest.fixture
+def enforced_budgets(monkeypatch):
+    """Make the in-memory database fail like the driver once a pymongo.timeout
+    deadline has passed."""
+    def enforce(method):
+        def call(*args, **kwargs):
+            remaining = _csot.remaining()
+            if remaining is not None and remaining <= 0:
+                raise ExecutionTimeout("operation exceeded time limit")
+            return method(*args, **kwargs)
+        return call
+
+    for name in ("find", "find_one", "find_one_and_update", "insert_one", "update_one", "update_many"):
+        monkeypatch.setattr(mongomock.collection.Collection, name, enforce(getattr(mongomock.collection.Collection, name)))
+
+
+def upload(client):
+    return client.post("/api/assets", data={"name": "a", "category": "document"}, files={"file": ("a.txt", b"abc", "text/plain")})
+
+
+def test_slow_uploads_are_not_cut_off_by_the_query_budget(server, client, monkeypatch, enforced_budgets):
+    monkeypatch.setattr(server, "QUERY_BUDGET_SECONDS", 0.2)
+    hash_upload = server.hash_upload
+
+    async def slow_hash_upload(file):
+        await asyncio.sleep(0.3)
+        return await hash_upload(file)
+
+    monkeypatch.setattr(server, "hash_upload", slow_hash_upload)
+    response = upload(client)
+    assert response.status_code == 200
+    assert response.json()["size"] == 3
+
+
+def test_upload_queries_still_share_a_budget(server, client, monkeypatch, enforced_budgets):
+    monkeypatch.setattr(server, "QUERY_BUDGET_SECONDS", 0.2)
+    bump_stats = server.bump_stats
+
+    async def slow_bump_stats(*args):
+        await asyncio.sleep(0.3)
+        return await bump_stats(*args)
+
+    monkeypatch.setattr(server, "bump_stats", slow_bump_stats)
+    response = upload(client)
+    assert response.status_code == 504
+    assert response.json() == {"detail": "Query exceeded its time budget"}
+
+
+def test_other_routes_keep_the_request_budget(server, client, monkeypatch, enforced_budgets):
+    monkeypatch.setitem(server.ROUTE_QUERY_BUDGETS, "/api/assets", 0.0001)
+    assert client.get("/api/assets").status_code == 504
+    assert upload(client).status_code == 200
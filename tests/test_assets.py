@@ -0,0 +1,304 @@
+import asyncio
+import hashlib
+import io
+import os
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+
+def png(color="red", size=(600, 300)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def upload(client, content, name="asset", category="document", filename="file.bin", content_type="application/octet-stream"):
+    return client.post(
+        "/api/assets",
+        data={"name": name, "category": category, "tags": '["t"]'},
+        files={"file": (filename, content, content_type)},
+    )
+
+
+def multipart(content, boundary="boundary"):
+    parts = [
+        f'--{boundary}\r\nContent-Disposition: form-data; name="name"\r\n\r\nbig\r\n',
+        f'--{boundary}\r\nContent-Disposition: form-data; name="category"\r\n\r\ndocument\r\n',
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="big.bin"\r\n'
+        'Content-Type: application/octet-stream\r\n\r\n',
+    ]
+    return "".join(parts).encode() + content + f"\r\n--{boundary}--\r\n".encode()
+
+
+def test_upload_is_stored_with_size_and_sha256(server, client):
+    content = uuid.uuid4().bytes * 5000
+    response = upload(client, content, filename="Notes.TXT")
+    assert response.status_code == 200
+    asset = response.json()
+    assert asset["size"] == len(content)
+    assert asset["sha256"] == hashlib.sha256(content).hexdigest()
+    assert asset["tags"] == ["t"]
+    stored = Path(asset["file_path"])
+    assert stored.name == f"{asset['sha256']}.txt"
+    assert stored.read_bytes() == content
+    # No partial files are left next to the blob
+    assert list(stored.parent.iterdir()) == [stored]
+
+
+def test_files_over_the_limit_are_rejected(server, client, monkeypatch):
+    monkeypatch.setattr(server, "MAX_UPLOAD_BYTES", 1000)
+    assert upload(client, b"x" * 1001).status_code == 413
+    assert upload(client, b"x" * 1000).status_code == 200
+
+
+def test_oversized_content_length_is_rejected_before_reading(server, client, monkeypatch):
+    monkeypatch.setattr(server, "MAX_UPLOAD_BYTES", 1000)
+    body = multipart(b"x" * (server.UPLOAD_FORM_OVERHEAD + 2000))
+    response = client.post("/api/assets", content=body, headers={"content-type": "multipart/form-data; boundary=boundary"})
+    assert response.status_code == 413
+    assert response.json() == {"detail": "File too large"}
+
+
+def test_chunked_uploads_are_cut_off_once_past_the_limit(server, monkeypatch):
+    monkeypatch.setattr(server, "MAX_UPLOAD_BYTES", 1000)
+    body = multipart(b"x" * (server.UPLOAD_FORM_OVERHEAD + 200_000))
+    chunks = [body[start:start + 4096] for start in range(0, len(body), 4096)]
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST", "scheme": "http",
+        "path": "/api/assets", "raw_path": b"/api/assets", "query_string": b"", "root_path": "",
+        "headers": [(b"content-type", b"multipart/form-data; boundary=boundary"), (b"transfer-encoding", b"chunked")],
+        "client": ("test", 1), "server": ("testserver", 80),
+    }
+    read, sent, read_before_response = [], [], []
+
+    async def receive():
+        if len(read) == len(chunks):
+            await asyncio.sleep(5)
+            return {"type": "http.disconnect"}
+        read.append(chunks[len(read)])
+        return {"type": "http.request", "body": read[-1], "more_body": len(read) < len(chunks)}
+
+    async def send(message):
+        if not sent:
+            read_before_response.append(sum(map(len, read)))
+        sent.append(message)
+
+    asyncio.run(server.app(scope, receive, send))
+    assert sent[0]["status"] == 413
+    assert b"File too large" in sent[1]["body"]
+    assert read_before_response[0] <= server.MAX_UPLOAD_BYTES + server.UPLOAD_FORM_OVERHEAD + 4096
+    assert not list(Path("uploads").glob("blobs/*/*"))
+
+
+def blob(server, sha256):
+    return asyncio.run(server.db.blobs.find_one({"_id": sha256}))
+
+
+def test_identical_uploads_share_one_blob(server, client):
+    content = uuid.uuid4().bytes * 100
+    first = upload(client, content, name="first").json()
+    second = upload(client, content, name="second", filename="copy.bin").json()
+    assert first["id"] != second["id"]
+    assert first["file_path"] == second["file_path"]
+    assert blob(server, first["sha256"])["refcount"] == 2
+    assert len(list(Path("uploads/blobs").glob("*/*"))) == 1
+
+
+def test_deleting_assets_releases_their_blob(server, client):
+    content = uuid.uuid4().bytes * 100
+    first = upload(client, content).json()
+    second = upload(client, content).json()
+    assert client.delete(f"/api/assets/{first['id']}").json() == {"deleted": first["id"]}
+    assert blob(server, first["sha256"])["refcount"] == 1
+    client.delete(f"/api/assets/{second['id']}")
+    released = blob(server, first["sha256"])
+    assert released["refcount"] == 0
+    assert "released_at" in released
+    # Kept on disk until garbage collected
+    assert Path(first["file_path"]).exists()
+    assert client.delete(f"/api/assets/{first['id']}").status_code == 404
+
+
+def test_gc_keeps_released_blobs_within_the_grace_period(server, client):
+    asset = upload(client, uuid.uuid4().bytes).json()
+    client.delete(f"/api/assets/{asset['id']}")
+    assert client.post("/api/assets/gc").json() == {"reclaimed_blobs": 0, "reclaimed_bytes": 0, "orphans_removed": 0}
+    assert Path(asset["file_path"]).exists()
+
+
+def test_gc_collects_released_blobs_and_their_derivatives(server, client, monkeypatch):
+    monkeypatch.setattr(server, "BLOB_GC_GRACE_SECONDS", 0)
+    kept = upload(client, uuid.uuid4().bytes).json()
+    released = upload(client, b"r" * 300).json()
+    derived = server.DERIVED_DIR / released["sha256"]
+    derived.mkdir(parents=True)
+    (derived / "thumb_128.webp").write_bytes(b"thumb")
+    client.delete(f"/api/assets/{released['id']}")
+    assert client.post("/api/assets/gc").json() == {"reclaimed_blobs": 1, "reclaimed_bytes": 300, "orphans_removed": 0}
+    assert not Path(released["file_path"]).exists()
+    assert not derived.exists()
+    assert blob(server, released["sha256"]) is None
+    assert Path(kept["file_path"]).exists()
+
+
+def test_gc_skips_blobs_claimed_by_another_collector(server, client, monkeypatch):
+    monkeypatch.setattr(server, "BLOB_GC_GRACE_SECONDS", 0)
+    asset = upload(client, uuid.uuid4().bytes).json()
+    client.delete(f"/api/assets/{asset['id']}")
+    claim = {"$set": {"collecting": datetime.utcnow()}}
+    asyncio.run(server.db.blobs.update_one({"_id": asset["sha256"]}, claim))
+    assert client.post("/api/assets/gc").json()["reclaimed_blobs"] == 0
+    assert Path(asset["file_path"]).exists()
+    # A claim left by a collector that died is taken over
+    stale = datetime.utcnow() - timedelta(seconds=server.BLOB_GC_CLAIM_SECONDS + 1)
+    asyncio.run(server.db.blobs.update_one({"_id": asset["sha256"]}, {"$set": {"collecting": stale}}))
+    assert client.post("/api/assets/gc").json()["reclaimed_blobs"] == 1
+    assert not Path(asset["file_path"]).exists()
+
+
+def test_gc_removes_orphaned_blob_files(server, client, monkeypatch):
+    monkeypatch.setattr(server, "BLOB_GC_GRACE_SECONDS", 0)
+    asset = upload(client, uuid.uuid4().bytes).json()
+    orphan = server.BLOBS_DIR / "ab" / ("ab" + "0" * 62)
+    orphan.parent.mkdir(parents=True, exist_ok=True)
+    orphan.write_bytes(b"lost")
+    os.utime(orphan, (0, 0))
+    assert client.post("/api/assets/gc").json()["orphans_removed"] == 1
+    assert not orphan.exists()
+    assert Path(asset["file_path"]).exists()
+
+
+def test_reupload_revives_a_released_blob(server, client, monkeypatch):
+    content = uuid.uuid4().bytes
+    asset = upload(client, content).json()
+    client.delete(f"/api/assets/{asset['id']}")
+    upload(client, content)
+    assert blob(server, asset["sha256"])["refcount"] == 1
+    monkeypatch.setattr(server, "BLOB_GC_GRACE_SECONDS", 0)
+    assert client.post("/api/assets/gc").json()["reclaimed_blobs"] == 0
+    assert Path(asset["file_path"]).exists()
+
+
+def test_reupload_of_a_blob_being_collected_is_refused(server, client, monkeypatch):
+    monkeypatch.setattr(server, "BLOB_COLLECT_WAIT_SECONDS", 0.1)
+    content = uuid.uuid4().bytes
+    asset = upload(client, content).json()
+    client.delete(f"/api/assets/{asset['id']}")
+    asyncio.run(server.db.blobs.update_one({"_id": asset["sha256"]}, {"$set": {"collecting": datetime.utcnow()}}))
+    response = upload(client, content)
+    assert response.status_code == 503
+    assert blob(server, asset["sha256"])["refcount"] == 0
+    # Once the collector has dropped the record the content is stored afresh
+    asyncio.run(server.db.blobs.delete_one({"_id": asset["sha256"]}))
+    Path(asset["file_path"]).unlink()
+    assert upload(client, content).status_code == 200
+    assert blob(server, asset["sha256"])["refcount"] == 1
+    assert Path(asset["file_path"]).exists()
+
+
+def upload_image(client, content, name="image"):
+    return upload(client, content, name=name, category="image", filename="art.png", content_type="image/png").json()
+
+
+def run_derivative_worker(server):
+    # Each asyncio.run is a new loop; hand the queued jobs to a queue not yet bound to one
+    jobs = asyncio.Queue()
+    while not server.derivative_queue.empty():
+        jobs.put_nowait(server.derivative_queue.get_nowait())
+    server.derivative_queue = jobs
+
+    async def drain():
+        worker = asyncio.create_task(server.derivative_worker(pool))
+        await server.derivative_queue.join()
+        worker.cancel()
+
+    with ThreadPoolExecutor(1) as pool:
+        asyncio.run(drain())
+
+
+def test_identical_images_share_one_derivative_job(server, client):
+    content = png()
+    first = upload_image(client, content)
+    second = upload_image(client, content)
+    assert first["derivatives_status"] == second["derivatives_status"] == "pending"
+    assert server.derivative_queue.qsize() == 1
+
+    run_derivative_worker(server)
+    for asset in (first, second):
+        derived = client.get(f"/api/assets/{asset['id']}/derivatives").json()
+        assert derived["status"] == "ready"
+        assert sorted(derived["derivatives"]["thumbnails"]) == ["128", "512"]
+    with Image.open(derived["derivatives"]["thumbnails"]["128"]) as thumbnail:
+        assert thumbnail.size == (128, 64)
+
+    # Later copies reuse what was built without queuing anything
+    third = upload_image(client, content)
+    assert third["derivatives_status"] == "ready"
+    assert third["derivatives"] == derived["derivatives"]
+    assert server.derivative_queue.qsize() == 0
+
+
+def test_documents_get_no_derivatives(server, client):
+    asset = upload(client, b"plain text", content_type="text/plain").json()
+    assert asset["derivatives_status"] is None
+    assert server.derivative_queue.qsize() == 0
+    assert client.post(f"/api/assets/{asset['id']}/derivatives").status_code == 400
+    assert client.post("/api/assets/missing/derivatives").status_code == 404
+
+
+def test_failed_builds_are_recorded(server, client):
+    asset = upload_image(client, b"not really a png")
+    run_derivative_worker(server)
+    assert client.get(f"/api/assets/{asset['id']}/derivatives").json()["status"] == "failed"
+    assert blob(server, asset["sha256"])["derivatives_status"] == "failed"
+
+
+def test_stale_claims_are_taken_over(server, client, monkeypatch):
+    content = png("blue")
+    asset = upload_image(client, content)
+    # The worker restarted and the queued job was lost
+    monkeypatch.setattr(server, "derivative_queue", asyncio.Queue(maxsize=server.DERIVATIVE_QUEUE_SIZE))
+    upload_image(client, content)
+    assert server.derivative_queue.qsize() == 0
+
+    expired = datetime.utcnow() - timedelta(seconds=server.DERIVATIVE_CLAIM_SECONDS + 1)
+    asyncio.run(server.db.blobs.update_one({"_id": asset["sha256"]}, {"$set": {"derivatives_claimed_at": expired}}))
+    assert upload_image(client, content)["derivatives_status"] == "pending"
+    assert server.derivative_queue.qsize() == 1
+    run_derivative_worker(server)
+    assert client.get(f"/api/assets/{asset['id']}/derivatives").json()["status"] == "ready"
+
+
+def test_full_queue_marks_uploads_skipped(server, client, monkeypatch):
+    monkeypatch.setattr(server, "derivative_queue", asyncio.Queue(maxsize=1))
+    server.derivative_queue.put_nowait(("busy", "busy.png", "image"))
+    content = png("green")
+    asset = upload_image(client, content)
+    assert asset["derivatives_status"] == "skipped"
+    assert blob(server, asset["sha256"])["derivatives_status"] == "skipped"
+    assert client.post(f"/api/assets/{asset['id']}/derivatives").status_code == 503
+
+    # A skipped blob is claimed again by the next upload once there is room
+    server.derivative_queue.get_nowait()
+    assert upload_image(client, content)["derivatives_status"] == "pending"
+    assert server.derivative_queue.qsize() == 1
+
+
+def test_regenerating_rebuilds_once(server, client):
+    content = png("white")
+    first = upload_image(client, content)
+    second = upload_image(client, content)
+    run_derivative_worker(server)
+
+    response = client.post(f"/api/assets/{first['id']}/derivatives").json()
+    assert response == {"asset_id": first["id"], "status": "pending", "queue_depth": 1}
+    assert client.get(f"/api/assets/{second['id']}/derivatives").json()["status"] == "pending"
+    # Already queued: asking again does not queue a second job
+    assert client.post(f"/api/assets/{second['id']}/derivatives").json()["queue_depth"] == 1
+    run_derivative_worker(server)
+    assert client.get(f"/api/assets/{second['id']}/derivatives").json()["status"] == "ready"
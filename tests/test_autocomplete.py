@@ -0,0 +1,77 @@
+import autocomplete
+
+KINDS = ["weapon", "track", "lore"]
+
+
+def ids(results):
+    return [result["id"] for result in results]
+
+
+def test_entity_terms_cover_label_words_and_tags_once():
+    terms = autocomplete.entity_terms("Fire  Sword", ["fire", "Legendary Set", 3])
+    assert terms == ["fire sword", "fire", "sword", "legendary set"]
+
+
+def test_suggest_matches_any_term_prefix_ranked_by_kind_then_recency():
+    index = autocomplete.PrefixIndex(KINDS, max_terms=1000)
+    index.add("lore", "l1", "Storm Chronicle", updated=30)
+    index.add("track", "t1", "Storm Drums", updated=10)
+    index.add("track", "t2", "Stormy Night", updated=20)
+    index.add("weapon", "w1", "Thunder Axe", updated=1, tags=["storm"])
+
+    assert ids(index.suggest("  STOR ")) == ["w1", "t2", "t1", "l1"]
+    assert ids(index.suggest("storm", kinds=["track", "lore"])) == ["t2", "t1", "l1"]
+    assert ids(index.suggest("dru")) == ["t1"]
+    assert index.suggest("storm d") == [{"type": "track", "id": "t1", "label": "Storm Drums"}]
+    assert index.suggest("") == [] and index.suggest("zz") == []
+
+
+def test_entities_matching_through_several_terms_are_listed_once():
+    index = autocomplete.PrefixIndex(KINDS, max_terms=1000)
+    index.add("track", "t1", "Echo Echoes", updated=1, tags=["echo chamber"])
+    index.add("track", "t2", "Echo", updated=0)
+    assert ids(index.suggest("echo", limit=2)) == ["t1", "t2"]
+
+
+def test_re_adding_replaces_terms_and_remove_drops_them():
+    index = autocomplete.PrefixIndex(KINDS, max_terms=1000)
+    index.add("weapon", "w1", "Iron Mace", updated=1)
+    index.add("weapon", "w1", "Steel Mace", updated=2)
+    assert len(index) == 1
+    assert index.suggest("iron") == []
+    assert ids(index.suggest("steel")) == ["w1"]
+
+    index.remove(("weapon", "w1"))
+    index.remove(("weapon", "missing"))
+    assert len(index) == 0 and index.terms == []
+    assert index.suggest("mace") == []
+
+
+def test_load_matches_incremental_adds():
+    entries = [("track", f"t{i}", f"Song {i} of Ash", float(i), ["ash"]) for i in range(20)]
+    loaded = autocomplete.PrefixIndex(KINDS, max_terms=1000)
+    loaded.add("track", "t3", "Old Title", updated=-1)
+    loaded.load(entries)
+    added = autocomplete.PrefixIndex(KINDS, max_terms=1000)
+    for entry in entries:
+        added.add(*entry)
+
+    assert loaded.terms == added.terms
+    assert loaded.suggest("old") == []
+    assert ids(loaded.suggest("ash", limit=5)) == ids(added.suggest("ash", limit=5)) == ["t19", "t18", "t17", "t16", "t15"]
+
+
+def test_eviction_drops_the_least_recently_updated_entities():
+    index = autocomplete.PrefixIndex(KINDS, max_terms=20)
+    for i in range(10):
+        index.add("track", f"t{i}", f"Tune{i}", updated=float(i))  # one term each
+    index.load([("lore", f"l{i}", f"Page{i}", float(100 + i), []) for i in range(11)])
+
+    assert len(index.terms) <= 20
+    assert index.suggest("tune0") == []
+    assert ids(index.suggest("page10")) == ["l10"]
+    # Released slots are reused by later adds
+    slots = len(index.keys)
+    index.add("weapon", "w1", "Blade", updated=200)
+    assert len(index.keys) == slots
+    assert ids(index.suggest("bla")) == ["w1"]
@@ -0,0 +1,86 @@
+import pytest
+
+import balance
+
+
+def weapon(**overrides):
+    return {
+        "weapon_type": "sword",
+        "damage_profile": {"physical": 40, "fire": 10},
+        "combo_path": ["light", "light", "heavy"],
+        "upgrade_tree": {},
+        **overrides,
+    }
+
+
+def no_crits(tiers):
+    return [{**tier, "crit_chance": 0.0} for tier in tiers]
+
+
+def test_weapon_tiers_apply_upgrades_cumulatively_in_natural_order():
+    tiers = balance.weapon_tiers(weapon(upgrade_tree={
+        "tier10": {"damage_bonus": 5},
+        "tier2": {"damage_multiplier": 2, "attack_speed": 1.5},
+        "notes": "ignored",
+    }))
+    assert [tier["tier"] for tier in tiers] == ["base", "tier2", "tier10"]
+    assert tiers[1]["damage"] == {"physical": 80, "fire": 20}
+    assert tiers[2]["damage"] == {"physical": 85, "fire": 25}
+    assert tiers[2]["speed"] == pytest.approx(1.5)
+
+
+def test_every_weapon_type_has_a_speed():
+    from server import WeaponType
+    assert set(balance.WEAPON_SPEED) == {weapon_type.value for weapon_type in WeaponType}
+
+
+def test_expected_dps_of_a_single_move_combo():
+    tiers = no_crits(balance.weapon_tiers(weapon(damage_profile={"physical": 45}, combo_path=["light"])))
+    [row] = balance.expected(tiers)
+    assert row["dps"] == pytest.approx(100.0)
+    assert row["damage_types"] == {"physical": pytest.approx(100.0)}
+
+
+@pytest.mark.parametrize("fight_seconds", [1.0, 7.3, 30.0, 120.0])
+@pytest.mark.parametrize("attack_speed", [1.0, 1.5, 20.0])
+def test_monte_carlo_without_variance_or_crits_matches_expected(fight_seconds, attack_speed):
+    tiers = no_crits(balance.weapon_tiers(weapon(
+        weapon_type="chakram", upgrade_tree={"t1": {"attack_speed": attack_speed}}
+    )))
+    expected = balance.expected(tiers)
+    sampled = balance.monte_carlo(tiers, [1, 2], 200, fight_seconds, 0.0)
+    for row, result in zip(expected, sampled):
+        assert result["dps_mean"] == pytest.approx(row["dps"], abs=0.01)
+        assert result["dps_p5"] == result["dps_p95"]
+        assert result["burst_mean"] == pytest.approx(row["burst"], abs=0.01)
+
+
+def test_monte_carlo_mean_converges_on_expected_with_crits():
+    tiers = balance.weapon_tiers(weapon(upgrade_tree={"t1": {"attack_speed": 1.5, "crit_chance": 0.25}}))
+    expected = balance.expected(tiers)
+    sampled = balance.monte_carlo(tiers, [1, 2], 5000, 120.0, 0.0)
+    for row, result in zip(expected, sampled):
+        assert result["dps_mean"] == pytest.approx(row["dps"], rel=0.01)
+        assert result["crit_rate"] == pytest.approx(row["crit_chance"], abs=0.01)
+
+
+def test_monte_carlo_rows_do_not_depend_on_their_chunk():
+    tiers = balance.weapon_tiers(weapon(upgrade_tree={"t1": {"attack_speed": 3}}))
+    together = balance.monte_carlo(tiers, [7, 8], 500, 30.0, 0.2)
+    alone = balance.monte_carlo(tiers[1:], [8], 500, 30.0, 0.2)
+    assert together[1] == alone[0]
+
+
+def test_content_hash_ignores_non_balance_fields():
+    assert balance.content_hash({**weapon(), "name": "a"}) == balance.content_hash({**weapon(), "name": "b"})
+    assert balance.content_hash(weapon()) != balance.content_hash(weapon(weapon_type="bow"))
+
+
+def test_result_cache_evicts_least_recently_used():
+    cache = balance.ResultCache(2)
+    cache.put(("a", ()), [1])
+    cache.put(("b", ()), [2])
+    cache.get(("a", ()))
+    cache.put(("c", ()), [3])
+    assert cache.get(("b", ())) is None
+    assert cache.get(("a", ())) == [1]
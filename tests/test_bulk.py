@@ -0,0 +1,139 @@
+import asyncio
+import json
+
+import pytest
+
+CHARACTER = {"name": "Ember", "description": "A fire spirit", "realm": "forest", "character_type": "hero"}
+TRACK = {"name": "Canopy", "realm": "forest", "mood": "exploration", "key": "C Major"}
+
+
+class StreamedRequest:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    async def stream(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+def parse_array(server, body, chunk_size):
+    chunks = [body[start:start + chunk_size] for start in range(0, len(body), chunk_size)]
+
+    async def collect():
+        return [record async for record in server.iter_json_array(StreamedRequest(chunks))]
+
+    return asyncio.run(collect())
+
+
+def ndjson(*records):
+    return "\n".join(record if isinstance(record, str) else json.dumps(record) for record in records).encode()
+
+
+def post_ndjson(client, collection, body):
+    return client.post(f"/api/{collection}/bulk", content=body, headers={"content-type": "application/x-ndjson"}).json()
+
+
+def test_json_arrays_decode_the_same_at_any_chunk_boundary(server):
+    records = [{"name": "Ünïcode ✓", "n": 12345}, [1.5e3, None], 678, "s,]", {"nested": {"a": [True, False]}}]
+    body = json.dumps(records, ensure_ascii=False, indent=1).encode()
+    for chunk_size in (1, 2, 3, 7, len(body)):
+        assert parse_array(server, body, chunk_size) == records
+    assert parse_array(server, b" [ ] ", 1) == []
+
+
+@pytest.mark.parametrize("body, message", [
+    (b'[{"a": 1} {"b": 2}]', "Expected ',' or ']'"),
+    (b'[{"a": 1}, ', "Body ended before the array was closed"),
+    (b'[{"a": 1}, {"b": 2', "Expecting"),
+    (b'[{"a": 1}, {"b": tru}]', "Expecting value"),
+    (b'[{"a": 1}] {}', "Unexpected data after the array"),
+])
+def test_malformed_arrays_yield_the_error_after_the_good_records(server, body, message):
+    *records, error = parse_array(server, body, 4)
+    assert records == [{"a": 1}]
+    assert isinstance(error, ValueError) and message in str(error)
+
+
+def test_records_over_the_size_limit_end_the_import(server, monkeypatch):
+    monkeypatch.setattr(server, "BULK_MAX_RECORD_BYTES", 100)
+    body = json.dumps([{"a": 1}, {"big": "x" * 500}, {"b": 2}]).encode()
+    *records, error = parse_array(server, body, 16)
+    assert records == [{"a": 1}]
+    assert "exceeds 100 bytes" in str(error)
+
+
+def test_bodies_that_are_not_arrays_are_rejected(client):
+    for body in (b'{"name": "x"}', b"", b"\xff["):
+        response = client.post("/api/characters/bulk", content=body, headers={"content-type": "application/json"})
+        assert response.status_code == 400
+        assert response.json() == {"detail": "Body must be a JSON array or NDJSON"}
+
+
+def test_json_array_import(client):
+    records = [{**CHARACTER, "name": f"Spirit {i}"} for i in range(5)]
+    response = client.post("/api/characters/bulk", json=records).json()
+    assert response == {"received": 5, "inserted": 5, "failed": 0, "errors": []}
+    names = {character["name"] for character in client.get("/api/characters").json()}
+    assert names == {f"Spirit {i}" for i in range(5)}
+    assert client.get("/api/dashboard/stats").json()["characters"] == 5
+
+
+def test_ndjson_import_reports_each_bad_record_by_index(client):
+    body = ndjson(CHARACTER, "{not json", {"name": "No realm"}, "[1, 2]", {**CHARACTER, "name": "Frost"}, "")
+    response = post_ndjson(client, "characters", body)
+    assert (response["received"], response["inserted"], response["failed"]) == (5, 2, 3)
+    errors = {error["index"]: error["error"] for error in response["errors"]}
+    assert sorted(errors) == [1, 2, 3]
+    assert "Expecting property name" in errors[1]
+    assert {"loc": ["realm"], "msg": "Field required"} in errors[2]
+    assert errors[3] == "Record must be a JSON object"
+    assert len(client.get("/api/characters").json()) == 2
+
+
+def test_a_malformed_array_keeps_the_records_before_it(client):
+    body = b'[' + json.dumps(CHARACTER).encode() + b', {"name": ]'
+    response = client.post("/api/characters/bulk", content=body, headers={"content-type": "application/json"}).json()
+    assert (response["received"], response["inserted"], response["failed"]) == (2, 1, 1)
+    assert response["errors"][0]["index"] == 1
+
+
+def test_error_list_is_capped_but_counted(client, server, monkeypatch):
+    monkeypatch.setattr(server, "BULK_MAX_ERRORS", 3)
+    response = post_ndjson(client, "characters", ndjson(*["{bad"] * 10))
+    assert response["failed"] == 10
+    assert [error["index"] for error in response["errors"]] == [0, 1, 2]
+
+
+def test_duplicate_writes_are_reported_by_record_index(server):
+    asyncio.run(server.ensure_indexes())
+    doc = server.Character(**CHARACTER).dict()
+    batch = [(7, doc), (8, dict(doc)), (9, server.Character(**CHARACTER).dict())]
+    errors = server.BulkErrors()
+    inserted = asyncio.run(server.write_bulk_batch("characters", None, batch, errors))
+    assert inserted == 2
+    assert [error["index"] for error in errors.items] == [8]
+
+
+def test_bulk_tracks_default_their_tempo_to_the_analyzed_bpm(server, client):
+    assets = [
+        {"id": "analyzed", "derivatives": {"analysis": {"bpm": 127.6}}},
+        {"id": "unanalyzed", "derivatives": {}},
+    ]
+    asyncio.run(server.db.assets.insert_many(assets))
+    body = ndjson(
+        {**TRACK, "name": "From BPM", "asset_id": "analyzed"},
+        {**TRACK, "name": "Explicit", "asset_id": "analyzed", "tempo": 90},
+        {**TRACK, "name": "No BPM", "asset_id": "unanalyzed"},
+        {**TRACK, "name": "No asset"},
+        {**TRACK, "name": "Missing asset", "asset_id": "missing", "tempo": 100},
+        {**TRACK, "name": "Plain", "tempo": 60},
+    )
+    response = post_ndjson(client, "music", body)
+    assert (response["inserted"], response["failed"]) == (3, 3)
+    assert response["errors"] == [
+        {"index": 2, "error": "Tempo is required unless the asset has an analyzed BPM"},
+        {"index": 3, "error": "Tempo is required unless the asset has an analyzed BPM"},
+        {"index": 4, "error": "Asset not found"},
+    ]
+    tempos = {track["name"]: track["tempo"] for track in client.get("/api/music").json()}
+    assert tempos == {"From BPM": 128, "Explicit": 90, "Plain": 60}
@@ -0,0 +1,95 @@
+import copy
+import random
+
+import pytest
+
+from deltas import apply_delta, changed_fields, compute_delta
+
+
+def random_value(rng, depth=0):
+    kind = rng.randrange(7 if depth < 3 else 5)
+    if kind == 0:
+        return rng.randrange(5)
+    if kind == 1:
+        return float(rng.randrange(5))
+    if kind == 2:
+        return rng.choice([True, False, None])
+    if kind == 3:
+        return rng.choice(["a", "b", "c.d", ""])
+    if kind == 4:
+        return [rng.choice([0, 1, 1.0, True, "x"]) for _ in range(rng.randrange(3))]
+    return random_doc(rng, depth + 1)
+
+
+def random_doc(rng, depth=0):
+    return {rng.choice(["a", "b", "c", "d.e", "f"]): random_value(rng, depth) for _ in range(rng.randrange(5))}
+
+
+def mutate(rng, doc, depth=0):
+    doc = copy.deepcopy(doc)
+    for key in list(doc):
+        roll = rng.random()
+        if roll < 0.2:
+            del doc[key]
+        elif roll < 0.4 and isinstance(doc[key], dict):
+            doc[key] = mutate(rng, doc[key], depth + 1)
+        elif roll < 0.6:
+            doc[key] = random_value(rng, depth)
+    if rng.random() < 0.3:
+        doc[rng.choice(["g", "h.i"])] = random_value(rng, depth)
+    return doc
+
+
+def assert_identical(left, right):
+    assert type(left) is type(right)
+    if isinstance(left, dict):
+        assert left.keys() == right.keys()
+        for key in left:
+            assert_identical(left[key], right[key])
+    elif isinstance(left, list):
+        assert len(left) == len(right)
+        for a, b in zip(left, right):
+            assert_identical(a, b)
+    else:
+        assert left == right
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_apply_delta_round_trips(seed):
+    rng = random.Random(seed)
+    old = random_doc(rng)
+    new = mutate(rng, old)
+    before = copy.deepcopy(old)
+    assert_identical(apply_delta(old, compute_delta(old, new)), new)
+    assert old == before
+
+
+def test_unchanged_document_has_an_empty_delta():
+    doc = {"title": "x", "content": {"items": [1, {"a": 2}]}}
+    assert compute_delta(doc, copy.deepcopy(doc)) == {"set": [], "unset": []}
+
+
+def test_nested_dicts_are_diffed_by_leaf():
+    delta = compute_delta(
+        {"content": {"overview": "old", "lore": "kept", "gone": 1}},
+        {"content": {"overview": "new", "lore": "kept"}},
+    )
+    assert delta == {"set": [[["content", "overview"], "new"]], "unset": [["content", "gone"]]}
+    assert changed_fields(delta) == ["content"]
+
+
+def test_type_changes_inside_lists_are_kept():
+    delta = compute_delta({"tags": [1, True]}, {"tags": [1.0, 1]})
+    assert delta["set"] == [[["tags"], [1.0, 1]]]
+
+
+def test_keys_with_dots_survive():
+    old, new = {"a.b": {"c": 1}}, {"a.b": {"c": 2}}
+    assert apply_delta(old, compute_delta(old, new)) == new
+
+
+def test_applied_values_are_copies():
+    new = {"content": {"items": [1]}}
+    result = apply_delta({}, compute_delta({}, new))
+    result["content"]["items"].append(2)
+    assert new == {"content": {"items": [1]}}
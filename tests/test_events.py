@@ -0,0 +1,141 @@
+import asyncio
+
+import httpx
+import orjson
+import pytest
+
+
+async def read_events(server, query="", headers=(), count=1, during=None):
+    """Open /api/events through the full middleware stack and return the
+    first ``count`` frames after the retry hint, then disconnect.
+
+    The stream never ends on its own, so it is driven as a raw ASGI call;
+    ``during`` runs once the subscription is open, with an httpx client
+    bound to the same app for making writes.
+    """
+    frames = asyncio.Queue()
+    disconnected = asyncio.Event()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": "/api/events", "raw_path": b"/api/events", "query_string": query.encode(), "root_path": "",
+        "headers": [(b"host", b"test")] + [(name.encode(), value.encode()) for name, value in headers],
+        "client": ("127.0.0.1", 1), "server": ("test", 80),
+    }
+    start = {}
+
+    async def receive():
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            start.update(message)
+        elif message.get("body"):
+            for frame in message["body"].split(b"\n\n"):
+                if frame:
+                    frames.put_nowait(frame)
+
+    app = asyncio.create_task(server.app(scope, receive, send))
+    assert await asyncio.wait_for(frames.get(), 1) == b"retry: 3000"
+    assert start["status"] == 200
+    if during:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://test") as client:
+            await during(client)
+    events = [parse(await asyncio.wait_for(frames.get(), 1)) for _ in range(count)]
+    disconnected.set()
+    app.cancel()
+    await asyncio.gather(app, return_exceptions=True)
+    return events
+
+
+def parse(frame):
+    if frame.startswith(b":"):
+        return frame
+    fields = dict(line.split(": ", 1) for line in frame.decode().split("\n"))
+    return fields["id"], fields["event"], orjson.loads(fields["data"])
+
+
+def character(name="Spirit"):
+    return {"name": name, "description": "d", "realm": "forest", "character_type": "hero"}
+
+
+def test_unknown_collections_are_rejected(client):
+    response = client.get("/api/events", params={"collections": "characters,dragons"})
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Unknown collections: dragons"}
+
+
+def test_writes_reach_subscribers(server):
+    async def write(client):
+        await client.post("/api/characters", json=character())
+
+    [(event_id, event_type, event)] = asyncio.run(read_events(server, during=write))
+    assert event_type == "change"
+    assert event_id == f"{server.event_bus.epoch}-1"
+    assert event["collection"] == "characters"
+    assert event["action"] == "created"
+    assert event["doc"]["name"] == "Spirit"
+    assert event["doc"]["id"] == event["id"]
+
+
+def test_subscribers_only_receive_their_collections(server):
+    async def write(client):
+        await client.post("/api/weapons", json={"name": "Blade", "weapon_type": "sword", "lore": "l"})
+        await client.post("/api/characters", json=character())
+
+    [(_, _, event)] = asyncio.run(read_events(server, "collections=characters", during=write))
+    assert event["collection"] == "characters"
+    assert not server.event_bus.active
+
+
+def test_last_event_id_replays_missed_changes(server, client):
+    for name in ("One", "Two", "Three"):
+        client.post("/api/characters", json=character(name))
+    headers = [("last-event-id", f"{server.event_bus.epoch}-1")]
+    events = asyncio.run(read_events(server, headers=headers, count=2))
+    assert [event["doc"]["name"] for _, _, event in events] == ["Two", "Three"]
+    assert [event_id for event_id, _, _ in events] == [f"{server.event_bus.epoch}-2", f"{server.event_bus.epoch}-3"]
+
+
+def test_deletes_are_published_without_a_document(server, client):
+    created = client.post("/api/assets", data={"name": "a", "category": "document"}, files={"file": ("a.txt", b"abc", "text/plain")}).json()
+    client.delete(f"/api/assets/{created['id']}")
+    query = f"last_event_id={server.event_bus.epoch}-1"
+    [(_, _, event)] = asyncio.run(read_events(server, query))
+    assert (event["action"], event["id"], event.get("doc")) == ("deleted", created["id"], None)
+
+
+@pytest.mark.parametrize("last_event_id, reason", [
+    ("deadbeef-0", "unknown event id"),
+    ("{epoch}-5", "history exhausted"),
+])
+def test_unresumable_event_ids_get_a_reset(server, last_event_id, reason):
+    headers = [("last-event-id", last_event_id.format(epoch=server.event_bus.epoch))]
+    [(_, event_type, event)] = asyncio.run(read_events(server, headers=headers))
+    assert event_type == "reset"
+    assert event["reason"] == reason
+
+
+def test_subscribers_that_fall_behind_get_a_reset(server, monkeypatch):
+    monkeypatch.setattr(server.event_bus, "queue_size", 1)
+
+    async def burst(client):
+        # Published back to back, so One is still queued when Two arrives; the
+        # stream delivers One, then notices the overflow
+        for name in ("One", "Two", "Three"):
+            server.publish_change("characters", "created", server.Character(**character(name)).dict())
+        await client.post("/api/characters", json=character("Four"))
+
+    [first, reset, after] = asyncio.run(read_events(server, count=3, during=burst))
+    assert first[2]["doc"]["name"] == "One"
+    assert reset[1:] == ("reset", {"collection": "*", "action": "reset", "reason": "subscriber fell behind"})
+    assert after[2]["doc"]["name"] == "Four"
+
+
+def test_heartbeats_keep_idle_streams_open(server, monkeypatch):
+    monkeypatch.setattr(server.event_bus, "heartbeat_seconds", 0.01)
+
+    async def idle(client):
+        await asyncio.sleep(0.05)
+
+    assert asyncio.run(read_events(server, during=idle)) == [b": keepalive"]
@@ -0,0 +1,114 @@
+import asyncio
+
+import mongomock
+import pytest
+
+
+@pytest.fixture
+def finds(monkeypatch):
+    """Record (collection, filter) for every find the server makes."""
+    calls = []
+    find = mongomock.collection.Collection.find
+
+    def recording_find(self, filter=None, *args, **kwargs):
+        calls.append((self.name, filter))
+        return find(self, filter, *args, **kwargs)
+
+    monkeypatch.setattr(mongomock.collection.Collection, "find", recording_find)
+    return calls
+
+
+@pytest.fixture
+def world(server):
+    """Two characters, two assets and quests referencing them, including a
+    reference to a character that no longer exists."""
+    heroes = [server.Character(name=name, description="d", realm="forest", character_type="hero") for name in ("Ember", "Moss")]
+    assets = [server.Asset(name=name, file_path=f"uploads/{name}", file_type="image/png", category="image", size=1, sha256=name)
+              for name in ("map", "icon")]
+    quests = [
+        server.Quest(title="Find", description="d", realm="forest", quest_type="main",
+                     npcs_involved=[heroes[0].id, "gone", heroes[1].id], assets=[assets[0].id]),
+        server.Quest(title="Fight", description="d", realm="forest", quest_type="combat",
+                     npcs_involved=[heroes[0].id], assets=[assets[0].id, assets[1].id]),
+        server.Quest(title="Rest", description="d", realm="forest", quest_type="side"),
+    ]
+
+    async def insert():
+        await server.db.characters.insert_many([hero.dict() for hero in heroes])
+        await server.db.assets.insert_many([asset.dict() for asset in assets])
+        await server.db.quests.insert_many([quest.dict() for quest in quests])
+
+    asyncio.run(insert())
+    return {"heroes": heroes, "assets": assets, "quests": quests}
+
+
+def by_title(rows):
+    return {row["title"]: row for row in rows}
+
+
+def test_page_references_are_loaded_with_one_query_per_target(client, world, finds):
+    rows = by_title(client.get("/api/quests", params={"expand": "npcs_involved,assets"}).json())
+    ember, moss = world["heroes"]
+    map_, icon = world["assets"]
+    assert [npc["name"] for npc in rows["Find"]["expanded"]["npcs_involved"]] == ["Ember", "Moss"]
+    assert [npc["id"] for npc in rows["Fight"]["expanded"]["npcs_involved"]] == [ember.id]
+    assert [asset["name"] for asset in rows["Fight"]["expanded"]["assets"]] == ["map", "icon"]
+    assert rows["Rest"]["expanded"] == {"npcs_involved": [], "assets": []}
+    assert rows["Find"]["npcs_involved"] == [ember.id, "gone", moss.id]
+
+    lookups = [(name, query) for name, query in finds if name != "quests"]
+    assert sorted(name for name, _ in lookups) == ["assets", "characters"]
+    ids = {name: sorted(query["id"]["$in"]) for name, query in lookups}
+    assert ids == {"assets": sorted([map_.id, icon.id]), "characters": sorted([ember.id, moss.id, "gone"])}
+
+
+def test_expanded_references_are_summaries(client, world):
+    [row] = [row for row in client.get("/api/quests", params={"expand": "npcs_involved"}).json() if row["title"] == "Fight"]
+    ember = world["heroes"][0]
+    assert row["expanded"] == {"npcs_involved": [
+        {"id": ember.id, "name": "Ember", "realm": "forest", "character_type": "hero"}
+    ]}
+
+
+def test_expand_combines_with_fields(client, world):
+    rows = client.get("/api/quests", params={"expand": "assets", "fields": "title"}).json()
+    row = by_title(rows)["Find"]
+    assert set(row) == {"id", "created_at", "title", "assets", "expanded"}
+    assert [asset["name"] for asset in row["expanded"]["assets"]] == ["map"]
+
+
+def test_lists_without_expand_make_no_lookups(client, world, finds):
+    assert "expanded" not in client.get("/api/quests").json()[0]
+    assert [name for name, _ in finds] == ["quests"]
+
+
+def test_get_expands_a_single_document(client, world):
+    quest = world["quests"][1]
+    row = client.get(f"/api/quests/{quest.id}", params={"expand": "assets"}).json()
+    assert [asset["name"] for asset in row["expanded"]["assets"]] == ["map", "icon"]
+    assert client.get("/api/quests/missing", params={"expand": "assets"}).status_code == 404
+
+
+def test_single_references_expand_to_one_summary_or_null(server, client, world):
+    map_ = world["assets"][0]
+    tracks = [
+        server.MusicTrack(name="Canopy", realm="forest", mood="exploration", tempo=96, key="C", asset_id=map_.id),
+        server.MusicTrack(name="Lost", realm="forest", mood="exploration", tempo=96, key="C", asset_id="gone"),
+        server.MusicTrack(name="Silent", realm="forest", mood="exploration", tempo=96, key="C"),
+    ]
+    asyncio.run(server.db.music_tracks.insert_many([track.dict() for track in tracks]))
+    rows = {row["name"]: row["expanded"]["asset_id"] for row in client.get("/api/music", params={"expand": "asset_id"}).json()}
+    assert rows["Canopy"]["id"] == map_.id
+    assert rows["Lost"] is None
+    assert rows["Silent"] is None
+
+
+@pytest.mark.parametrize("path, expand, detail", [
+    ("/api/quests", "npcs_involved,rewards", "Cannot expand: rewards"),
+    ("/api/characters", "npcs_involved", "Cannot expand: npcs_involved"),
+    ("/api/music/x", "assets", "Cannot expand: assets"),
+])
+def test_unknown_expansions_are_rejected(client, world, path, expand, detail):
+    response = client.get(path, params={"expand": expand})
+    assert response.status_code == 400
+    assert response.json() == {"detail": detail}
@@ -0,0 +1,68 @@
+import pytest
+
+CREATE = {
+    "documents": {"title": "GDD", "document_type": "gdd", "content": {"overview": "o"}, "tags": ["t"]},
+    "characters": {"name": "Ember", "description": "A spirit", "realm": "forest", "character_type": "hero"},
+    "weapons": {"name": "Dawn", "weapon_type": "sword", "lore": "Old"},
+    "quests": {"title": "Find", "description": "d", "realm": "forest", "quest_type": "main"},
+    "music": {"name": "Canopy", "realm": "forest", "mood": "exploration", "tempo": 96, "key": "C Major"},
+}
+NAME_FIELD = {"documents": "title", "characters": "name", "weapons": "name", "quests": "title", "music": "name"}
+
+
+def test_parse_fields(server):
+    assert server.parse_fields(server.Character, None) is None
+    assert server.parse_fields(server.Character, " , ") is None
+    assert server.parse_fields(server.Character, "name, realm") == {
+        "_id": 0, "name": 1, "realm": 1, "id": 1, "created_at": 1
+    }
+    assert server.parse_fields(server.Quest, "title", expand=["npcs_involved"])["npcs_involved"] == 1
+
+
+@pytest.mark.parametrize("collection", sorted(CREATE))
+def test_lists_return_only_the_requested_fields(client, collection):
+    created = client.post(f"/api/{collection}", json=CREATE[collection]).json()
+    field = NAME_FIELD[collection]
+    stored = client.get(f"/api/{collection}").json()
+    assert [row["id"] for row in stored] == [created["id"]]
+    rows = client.get(f"/api/{collection}", params={"fields": field}).json()
+    assert rows == [{"id": created["id"], "created_at": stored[0]["created_at"], field: created[field]}]
+
+
+@pytest.mark.parametrize("collection", sorted(CREATE))
+def test_unknown_fields_are_rejected(client, collection):
+    response = client.get(f"/api/{collection}", params={"fields": "name,title,bogus,_id"})
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Unknown fields: ")
+    assert "_id" in response.json()["detail"] and "bogus" in response.json()["detail"]
+
+
+def test_assets_take_fields_too(client):
+    client.post(
+        "/api/assets",
+        data={"name": "Map", "category": "document"},
+        files={"file": ("map.txt", b"map", "text/plain")},
+    )
+    rows = client.get("/api/assets", params={"fields": "name,size"}).json()
+    assert [set(row) for row in rows] == [{"id", "created_at", "name", "size"}]
+    assert rows[0]["size"] == 3
+
+
+def test_projected_lists_still_page(client):
+    for index in range(5):
+        client.post("/api/characters", json={**CREATE["characters"], "name": f"Spirit {index}"})
+    seen, cursor = [], None
+    while True:
+        params = {"fields": "name", "limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/characters", params=params)
+        seen += [row["name"] for row in response.json()]
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            break
+    assert sorted(seen) == [f"Spirit {index}" for index in range(5)]
+
+
+def test_search_rejects_unknown_fields(client):
+    response = client.get("/api/search", params={"query": "ember", "fields": "name,bogus"})
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Unknown fields: bogus"}
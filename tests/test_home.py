@@ -0,0 +1,81 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+START = datetime(2024, 1, 1)
+
+
+def at(minutes):
+    return START + timedelta(minutes=minutes)
+
+
+@pytest.fixture
+def seeded(server):
+    """Three characters and weapons, two documents (one edited later) and a
+    quest, each created a minute apart in a known order."""
+    characters = [server.Character(
+        name=f"Spirit {i}", description="d", realm="forest", character_type="hero", created_at=at(i)
+    ).dict() for i in range(3)]
+    weapons = [server.Weapon(name=f"Blade {i}", weapon_type="sword", lore="l", created_at=at(10 + i)).dict() for i in range(3)]
+    documents = [
+        server.BaseDocument(title="Old GDD", document_type="gdd", content={"big": "x" * 100}, created_at=at(5), updated_at=at(30), version=3).dict(),
+        server.BaseDocument(title="New GDD", document_type="dialogue", created_at=at(20), updated_at=at(20)).dict(),
+    ]
+    quests = [server.Quest(title="Find", description="d", realm="forest", quest_type="main", created_at=at(25)).dict()]
+
+    async def insert():
+        await server.db.characters.insert_many(characters)
+        await server.db.weapons.insert_many(weapons)
+        await server.db.documents.insert_many(documents)
+        await server.db.quests.insert_many(quests)
+
+    asyncio.run(insert())
+
+
+def test_empty_project(client):
+    home = client.get("/api/home").json()
+    assert {key: home[key] for key in ("documents", "characters", "weapons", "quests", "recent_activity")} == {
+        "documents": [], "characters": [], "weapons": [], "quests": [], "recent_activity": []
+    }
+    assert home["stats"]["characters"] == 0
+    assert home["stats"]["reconciled_at"]
+
+
+def test_latest_entries_per_collection(client, seeded):
+    home = client.get("/api/home", params={"limit": 2}).json()
+    assert [c["name"] for c in home["characters"]] == ["Spirit 2", "Spirit 1"]
+    assert [w["name"] for w in home["weapons"]] == ["Blade 2", "Blade 1"]
+    assert [q["title"] for q in home["quests"]] == ["Find"]
+    assert home["characters"][0] == client.get(f"/api/characters/{home['characters'][0]['id']}").json()
+
+
+def test_documents_leave_their_content_out(client, seeded):
+    documents = client.get("/api/home").json()["documents"]
+    assert [d["title"] for d in documents] == ["New GDD", "Old GDD"]
+    assert set(documents[1]) == {"id", "title", "document_type", "tags", "version", "created_at", "updated_at"}
+
+
+def test_stats_match_the_dashboard(client, seeded):
+    home = client.get("/api/home").json()
+    dashboard = client.get("/api/dashboard/stats").json()
+    # The first read reconciles and returns microseconds; MongoDB stores milliseconds
+    assert home["stats"]["reconciled_at"][:23] == dashboard["reconciled_at"][:23]
+    assert {**home["stats"], "reconciled_at": None} == {**dashboard, "reconciled_at": None}
+    assert (home["stats"]["characters"], home["stats"]["weapons"], home["stats"]["documents"]) == (3, 3, 2)
+    assert home["stats"]["breakdowns"]["documents"]["document_type"] == {"gdd": 1, "dialogue": 1}
+
+
+def test_recent_activity_merges_every_source_newest_first(client, seeded):
+    feed = client.get("/api/home", params={"activity": 4}).json()["recent_activity"]
+    assert [(entry["type"], entry["action"]) for entry in feed] == [
+        ("document", "updated"), ("quest", "created"), ("document", "created"), ("weapon", "created"),
+    ]
+    assert feed[0]["item"]["title"] == "Old GDD"
+    assert feed[0]["time"].startswith("2024-01-01T00:30")
+    assert feed[3]["item"]["name"] == "Blade 2"
+
+
+@pytest.mark.parametrize("params", [{"limit": 0}, {"limit": 51}, {"activity": 0}, {"activity": 51}])
+def test_limits_are_validated(client, params):
+    assert client.get("/api/home", params=params).status_code == 422
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+
+def test_ensure_indexes_creates_every_declared_index(server):
+    asyncio.run(server.ensure_indexes())
+    for collection_name, indexes in server.COLLECTION_INDEXES.items():
+        existing = asyncio.run(server.db[collection_name].index_information())
+        assert {index.document["name"] for index in indexes} <= set(existing)
+    # Running again on an existing database is a no-op
+    asyncio.run(server.ensure_indexes())
+
+
+def test_entity_ids_are_unique(server):
+    asyncio.run(server.ensure_indexes())
+    asyncio.run(server.db.weapons.insert_one({"id": "w1"}))
+    with pytest.raises(DuplicateKeyError):
+        asyncio.run(server.db.weapons.insert_one({"id": "w1"}))
+
+
+def test_list_filters_have_a_page_index():
+    import server
+    for route, collection_name, filter_dict, sort in server.ROUTE_QUERIES:
+        if sort != server.PAGE_SORT or "$or" in filter_dict:
+            continue
+        name = "_".join(list(filter_dict) + ["page"])
+        assert name in {index.document["name"] for index in server.COLLECTION_INDEXES[collection_name]}, route
+
+
+def test_plan_stages_walks_nested_plans():
+    import server
+    plan = {"stage": "LIMIT", "inputStage": {"stage": "OR", "inputStages": [
+        {"stage": "IXSCAN"}, {"stage": "FETCH", "inputStage": {"stage": "COLLSCAN"}},
+    ]}}
+    assert list(server.plan_stages(plan)) == ["LIMIT", "OR", "IXSCAN", "FETCH", "COLLSCAN"]
+
+
+class ExplainedCursor:
+    def __init__(self, stage):
+        self.stage = stage
+
+    def limit(self, _):
+        return self
+
+    def sort(self, _):
+        return self
+
+    async def explain(self):
+        return {"queryPlanner": {"winningPlan": {"stage": "FETCH", "inputStage": {"stage": self.stage}}}}
+
+
+class ExplainedDatabase:
+    """Answers explain() with a COLLSCAN for the listed collections."""
+
+    def __init__(self, scanned):
+        self.scanned = scanned
+
+    def __getitem__(self, collection_name):
+        stage = "COLLSCAN" if collection_name in self.scanned else "IXSCAN"
+        return type("Collection", (), {"find": lambda _self, _filter: ExplainedCursor(stage)})()
+
+
+def test_verify_indexes_fails_startup_on_collection_scans(server, monkeypatch):
+    monkeypatch.setattr(server, "db", ExplainedDatabase(set()))
+    asyncio.run(server.verify_indexes())
+
+    monkeypatch.setattr(server, "db", ExplainedDatabase({"weapons"}))
+    with pytest.raises(RuntimeError) as failure:
+        asyncio.run(server.verify_indexes())
+    assert "GET /weapons?weapon_type" in str(failure.value)
+    assert "GET /quests" not in str(failure.value)
@@ -0,0 +1,194 @@
+import asyncio
+import copy
+
+import pytest
+
+from json_patch import PatchError, apply_steps, indexed_roots, parse_patch, to_update
+
+ROOTS = ("title", "content", "tags")
+
+
+def doc():
+    return {"title": "Forest", "tags": ["a", "b"], "content": {"overview": "old", "items": [1, 2, 3]}}
+
+
+def patched(patch, original=None):
+    original = original or doc()
+    steps, conditions = parse_patch(patch, ROOTS, original)
+    return apply_steps(copy.deepcopy(original), steps), to_update(steps), conditions
+
+
+def test_replace_and_remove_become_set_and_unset():
+    result, update, _ = patched([
+        {"op": "replace", "path": "/content/overview", "value": "new"},
+        {"op": "remove", "path": "/content/items"},
+    ])
+    assert update == {"$set": {"content.overview": "new"}, "$unset": {"content.items": ""}}
+    assert result["content"] == {"overview": "new"}
+
+
+def test_append_pushes_with_each():
+    result, update, conditions = patched([{"op": "add", "path": "/tags/-", "value": "c"}])
+    assert update == {"$push": {"tags": {"$each": ["c"]}}}
+    assert conditions == {}
+    assert result["tags"] == ["a", "b", "c"]
+
+
+def test_pushed_value_is_never_a_modifier():
+    _, update, _ = patched([{"op": "add", "path": "/content/items/-", "value": {"$each": [9]}}])
+    assert update == {"$push": {"content.items": {"$each": [{"$each": [9]}]}}}
+
+
+@pytest.mark.parametrize("index, expected", [(0, ["new", "a", "b"]), (1, ["a", "new", "b"]), (2, ["a", "b", "new"])])
+def test_add_at_index_inserts(index, expected):
+    result, update, conditions = patched([{"op": "add", "path": f"/tags/{index}", "value": "new"}])
+    assert update == {"$push": {"tags": {"$each": ["new"], "$position": index}}}
+    assert result["tags"] == expected
+    expected = {"tags": {"$type": "array"}}
+    if index:
+        expected[f"tags.{index - 1}"] = {"$exists": True}
+    assert conditions == expected
+
+
+def test_replace_at_index_sets_the_element():
+    result, update, conditions = patched([{"op": "replace", "path": "/tags/0", "value": "new"}])
+    assert update == {"$set": {"tags.0": "new"}}
+    assert conditions == {"tags": {"$type": "array"}}
+    assert result["tags"] == ["new", "b"]
+
+
+def test_dotted_form():
+    result, update, _ = patched({"set": {"content.overview": "new"}, "unset": ["content.items"]})
+    assert update == {"$set": {"content.overview": "new"}, "$unset": {"content.items": ""}}
+    assert result["content"] == {"overview": "new"}
+
+
+def test_set_creates_missing_parents():
+    result, _, _ = patched({"set": {"content.lore.origin": "sky"}})
+    assert result["content"]["lore"] == {"origin": "sky"}
+
+
+@pytest.mark.parametrize("value, condition", [
+    ("Forest", {"$eq": "Forest", "$not": {"$type": "array"}}),
+    (None, {"$type": "null"}),
+    (["a", "b"], ["a", "b"]),
+])
+def test_test_becomes_a_condition(value, condition):
+    _, _, conditions = patched([
+        {"op": "test", "path": "/title", "value": value},
+        {"op": "replace", "path": "/content/overview", "value": "new"},
+    ])
+    assert conditions == {"title": condition}
+
+
+@pytest.mark.parametrize("patch", [
+    [{"op": "test", "path": "/content", "value": {"overview": "old"}}, {"op": "replace", "path": "/title", "value": "x"}],
+    [{"op": "test", "path": "/tags", "value": [{"a": 1}]}, {"op": "replace", "path": "/title", "value": "x"}],
+    [{"op": "move", "from": "/title", "path": "/content/title"}],
+    [{"op": "remove", "path": "/tags/0"}],
+    [{"op": "remove", "path": "/title"}],
+    [{"op": "replace", "path": "/id", "value": "x"}],
+    [{"op": "replace", "path": "/content/$where", "value": "x"}],
+    [{"op": "replace", "path": "title", "value": "x"}],
+    [{"op": "add", "path": "/title"}],
+    [{"op": "replace", "path": "/content", "value": {}}, {"op": "replace", "path": "/content/overview", "value": "x"}],
+    [{"op": "add", "path": "/tags/-", "value": "x"}, {"op": "add", "path": "/tags/0", "value": "y"}],
+    [{"op": "test", "path": "/title", "value": "Forest"}],
+    {"set": {}},
+    "replace",
+])
+def test_rejected_patches(patch):
+    with pytest.raises(PatchError):
+        parse_patch(patch, ROOTS, doc())
+
+
+def test_apply_steps_rejects_push_to_non_array():
+    steps, _ = parse_patch([{"op": "add", "path": "/content/overview/-", "value": "x"}], ROOTS)
+    with pytest.raises(PatchError):
+        apply_steps(doc(), steps)
+
+
+def keyed():
+    return {**doc(), "content": {"levels": {"1": "intro", "2": "boss"}}}
+
+
+def test_numeric_keys_of_objects_are_set_not_pushed():
+    result, update, conditions = patched([{"op": "add", "path": "/content/levels/3", "value": "finale"}], keyed())
+    assert update == {"$set": {"content.levels.3": "finale"}}
+    assert conditions == {"content.levels": {"$not": {"$type": "array"}}}
+    assert result["content"]["levels"] == {"1": "intro", "2": "boss", "3": "finale"}
+
+
+def test_numeric_keys_of_objects_can_be_removed():
+    result, update, conditions = patched([{"op": "remove", "path": "/content/levels/1"}], keyed())
+    assert update == {"$unset": {"content.levels.1": ""}}
+    assert conditions == {"content.levels": {"$not": {"$type": "array"}}}
+    assert result["content"]["levels"] == {"2": "boss"}
+    result, update, _ = patched({"unset": ["content.levels.2"]}, keyed())
+    assert update == {"$unset": {"content.levels.2": ""}}
+    assert result["content"]["levels"] == {"1": "intro"}
+
+
+def test_numeric_tokens_under_a_missing_parent_are_keys():
+    result, update, conditions = patched([{"op": "add", "path": "/content/acts/1", "value": "dawn"}])
+    assert update == {"$set": {"content.acts.1": "dawn"}}
+    assert conditions == {"content.acts": {"$not": {"$type": "array"}}}
+    assert result["content"]["acts"] == {"1": "dawn"}
+
+
+def test_conditions_on_the_same_field_are_combined():
+    _, _, conditions = patched([
+        {"op": "test", "path": "/tags", "value": ["a", "b"]},
+        {"op": "add", "path": "/tags/1", "value": "x"},
+    ])
+    assert conditions == {"tags": ["a", "b"], "$and": [{"tags": {"$type": "array"}}], "tags.0": {"$exists": True}}
+
+
+def test_indexed_roots():
+    assert indexed_roots([
+        {"op": "add", "path": "/tags/0", "value": "x"},
+        {"op": "remove", "path": "/content/levels/1"},
+        {"op": "add", "path": "/content/items/-", "value": 1},
+        {"op": "replace", "path": "/title", "value": "t"},
+        "junk",
+        {"op": "add", "path": "bad/1"},
+    ]) == {"tags", "content"}
+    assert indexed_roots({"set": {"content.a.2": 1, "title": "t"}, "unset": ["tags.0"]}) == {"content", "tags"}
+    assert indexed_roots({"set": {"content.a": 1}}) == set()
+    assert indexed_roots("replace") == set()
+
+
+def create_document(client, content):
+    return client.post("/api/documents", json={"title": "GDD", "document_type": "gdd", "content": content, "tags": ["a", "b"]}).json()
+
+
+def test_patch_endpoint_tells_numeric_keys_from_indexes(client):
+    document = create_document(client, {"levels": {"1": "intro", "2": "boss"}, "items": [1, 2]})
+    response = client.patch(f"/api/documents/{document['id']}", json=[
+        {"op": "add", "path": "/content/levels/3", "value": "finale"},
+        {"op": "remove", "path": "/content/levels/1"},
+        {"op": "add", "path": "/content/items/1", "value": 9},
+        {"op": "add", "path": "/tags/0", "value": "first"},
+    ])
+    assert response.status_code == 200
+    expected = {"levels": {"2": "boss", "3": "finale"}, "items": [1, 9, 2]}
+    assert response.json()["content"] == expected
+    assert response.json()["tags"] == ["first", "a", "b"]
+    stored = client.get(f"/api/documents/{document['id']}").json()
+    assert (stored["content"], stored["tags"], stored["version"]) == (expected, ["first", "a", "b"], 2)
+
+
+def test_patch_endpoint_rejects_index_removal(client):
+    document = create_document(client, {"items": [1, 2]})
+    response = client.patch(f"/api/documents/{document['id']}", json=[{"op": "remove", "path": "/content/items/0"}])
+    assert response.status_code == 400
+    assert client.patch("/api/documents/missing", json=[{"op": "add", "path": "/tags/0", "value": "x"}]).status_code == 404
+
+
+def test_patch_fails_when_the_parent_changed_type(server, client):
+    document = create_document(client, {"levels": {"1": "intro"}})
+    _, conditions = parse_patch([{"op": "add", "path": "/content/levels/2", "value": "x"}], ROOTS, document)
+    # Another writer turned the object into an array after it was read
+    client.patch(f"/api/documents/{document['id']}", json={"set": {"content.levels": ["intro"]}})
+    query = {"id": document["id"], **conditions}
+    assert asyncio.run(server.db.documents.find_one(query)) is None
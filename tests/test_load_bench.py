@@ -0,0 +1,116 @@
+import asyncio
+import json
+import random
+
+import httpx
+import pytest
+import typer
+from typer.testing import CliRunner
+
+import load_bench
+
+CREATE_MODELS = {
+    "synthetic_document": "DocumentCreate",
+    "synthetic_character": "CharacterCreate",
+    "synthetic_weapon": "WeaponCreate",
+    "synthetic_quest": "QuestCreate",
+    "synthetic_music": "MusicTrackCreate",
+}
+
+
+def invoke(*args):
+    return CliRunner().invoke(load_bench.cli, [str(arg) for arg in args])
+
+
+@pytest.mark.parametrize("scale, total", [("1k", 1000), ("100K", 100_000), ("1.5m", 1_500_000), ("250", 250)])
+def test_parse_scale(scale, total):
+    assert load_bench.parse_scale(scale) == total
+
+
+@pytest.mark.parametrize("factory", sorted(CREATE_MODELS))
+def test_synthetic_payloads_are_valid_and_seeded(server, factory):
+    def generate(seed):
+        rng = random.Random(seed)
+        words = load_bench.vocabulary(rng)
+        return [getattr(load_bench, factory)(rng, words) for _ in range(20)]
+
+    payloads = generate(7)
+    assert payloads == generate(7)
+    assert payloads != generate(8)
+    for payload in payloads:
+        getattr(server, CREATE_MODELS[factory])(**payload)
+
+
+def test_seed_is_reproducible(server, monkeypatch):
+    # seed points DB_NAME at the benchmark database; restore it afterwards
+    monkeypatch.setenv("DB_NAME", "mythrealms_bench")
+
+    def seeded_names():
+        result = invoke("seed", "--scale", 200, "--seed", 3)
+        assert result.exit_code == 0, result.output
+        names = sorted(c["name"] for c in asyncio.run(server.db.characters.find({}).to_list(None)))
+        asyncio.run(server.db.characters.delete_many({}))
+        return json.loads(result.output), names
+
+    first, names = seeded_names()
+    assert first["counts"] == {name: int(200 * share) for name, share in load_bench.SEED_MIX.items()}
+    assert len(names) == 60
+    assert seeded_names()[1] == names
+
+
+def test_parse_weights():
+    weights = load_bench.parse_weights(["search=10", "snapshot.export=0.2"])
+    assert (weights["search"], weights["snapshot.export"], weights["home"]) == (10.0, 0.2, 3)
+    with pytest.raises(typer.BadParameter):
+        load_bench.parse_weights(["nope=1"])
+
+
+def test_recorder_summary():
+    recorder = load_bench.Recorder()
+    for i in range(100):
+        recorder.add("search", (i + 1) / 1000, 200, "HIT" if i % 4 == 0 else "MISS")
+    recorder.add("home", 0.5, 500, None)
+    recorder.add("home", 0.5, 0, None)
+    summary = recorder.summary(elapsed=2.0)
+    search = summary["routes"]["search"]
+    assert (search["requests"], search["errors"], search["cache_hit_ratio"], search["throughput_rps"]) == (100, 0, 0.25, 50.0)
+    assert search["latency_ms"]["p50"] == pytest.approx(50.5)
+    assert search["latency_ms"]["max"] == 100.0
+    assert summary["routes"]["home"]["errors"] == 2
+    assert summary["totals"]["requests"] == 102
+    assert summary["totals"]["statuses"] == {"200": 100, "500": 1, "0": 1}
+
+
+def test_drive_runs_the_weighted_mix_in_process(server):
+    asyncio.run(server.db.characters.insert_one(server.Character(name="Ember", description="d", realm="forest", character_type="hero").dict()))
+    weights = {name: 0 for name in load_bench.parse_weights([])}
+    weights.update({"characters.list": 1, "characters.get": 1, "dashboard.stats": 1})
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://bench") as client:
+            ctx = load_bench.LoadContext(client, load_bench.vocabulary(random.Random(1)))
+            await ctx.load_ids()
+            return await load_bench.drive(ctx, weights, concurrency=2, duration=0.3, warmup=0, seed_value=1)
+
+    summary = asyncio.run(run())
+    assert set(summary["routes"]) == {"characters.list", "characters.get", "dashboard.stats"}
+    assert summary["totals"]["errors"] == 0
+    assert summary["routes"]["dashboard.stats"]["cache_hit_ratio"] > 0
+
+
+def report(p95):
+    latency = {"p50": 10.0, "p95": p95, "p99": 30.0, "mean": 12.0, "max": 40.0}
+    return {"routes": {"search": {"throughput_rps": 100.0, "latency_ms": latency, "errors": 0}}}
+
+
+def test_compare_flags_p95_regressions(tmp_path):
+    baseline, candidate = tmp_path / "base.json", tmp_path / "new.json"
+    baseline.write_text(json.dumps(report(20.0)))
+    candidate.write_text(json.dumps(report(25.0)))
+    result = invoke("compare", baseline, candidate, "--json")
+    assert result.exit_code == 0
+    assert json.loads(result.output)["routes"]["search"]["p95_pct"] == 25.0
+    assert invoke("compare", baseline, candidate, "--fail-over", 30).exit_code == 0
+    failed = invoke("compare", baseline, candidate, "--fail-over", 10, "--json")
+    assert failed.exit_code == 1
+    assert json.loads(failed.output)["regressions"] == ["search"]
@@ -0,0 +1,83 @@
+import wave
+
+import numpy as np
+import pytest
+
+import media
+
+RATE = 44100
+
+
+def write_wav(path, signal, rate=RATE):
+    samples = (np.clip(signal, -1, 1) * 32767).astype("<i2")
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(samples.tobytes())
+    return str(path)
+
+
+def clicks(bpm, seconds=12.0):
+    signal = np.zeros(int(seconds * RATE))
+    burst = np.arange(int(0.03 * RATE))
+    click = np.exp(-burst / (0.005 * RATE)) * np.sin(2 * np.pi * 1000 * burst / RATE)
+    for beat in np.arange(0, seconds, 60 / bpm):
+        start = int(round(beat * RATE))
+        segment = signal[start:start + len(click)]
+        segment += click[:len(segment)]
+    return 0.5 * signal
+
+
+def tone(frequency, seconds=12.0, amplitude=0.3):
+    return amplitude * np.sin(2 * np.pi * frequency * np.arange(int(seconds * RATE)) / RATE)
+
+
+@pytest.mark.parametrize("bpm", [90, 120, 150])
+def test_click_track_tempo(tmp_path, bpm):
+    analysis = media.analyze_audio(write_wav(tmp_path / "clicks.wav", clicks(bpm)))
+    assert analysis["bpm"] == pytest.approx(bpm, rel=0.01)
+    assert analysis["bpm_confidence"] >= media.MIN_TEMPO_CONFIDENCE
+
+
+def test_fast_tempo_is_folded_into_preferred_range(tmp_path):
+    analysis = media.analyze_audio(write_wav(tmp_path / "clicks.wav", clicks(180)))
+    assert analysis["bpm"] == pytest.approx(90, rel=0.01)
+
+
+def test_click_track_tempo_survives_a_sustained_pad(tmp_path):
+    pad = tone(220, amplitude=0.1) + tone(330, amplitude=0.1)
+    analysis = media.analyze_audio(write_wav(tmp_path / "mix.wav", clicks(128) + pad))
+    assert analysis["bpm"] == pytest.approx(128, rel=0.01)
+
+
+@pytest.mark.parametrize("frequency", [100, 440, 997])
+def test_steady_tone_has_no_tempo(tmp_path, frequency):
+    assert media.analyze_audio(write_wav(tmp_path / "tone.wav", tone(frequency)))["bpm"] is None
+
+
+def test_noise_has_no_tempo(tmp_path):
+    noise = 0.2 * np.random.default_rng(0).standard_normal(int(12 * RATE))
+    assert media.analyze_audio(write_wav(tmp_path / "noise.wav", noise))["bpm"] is None
+
+
+def test_silence(tmp_path):
+    analysis = media.analyze_audio(write_wav(tmp_path / "silence.wav", np.zeros(int(5 * RATE))))
+    assert analysis["bpm"] is None
+    assert analysis["loudness_lufs"] is None
+    assert analysis["peak_dbfs"] is None
+
+
+def test_loudness_of_a_reference_tone(tmp_path):
+    # BS.1770: a 997 Hz sine at -20 dBFS on one channel reads -23 LUFS
+    analysis = media.analyze_audio(write_wav(tmp_path / "tone.wav", tone(997, seconds=5, amplitude=0.1)))
+    assert analysis["loudness_lufs"] == pytest.approx(-23.0, abs=0.1)
+    assert analysis["peak_dbfs"] == pytest.approx(-20.0, abs=0.1)
+    assert analysis["duration"] == pytest.approx(5.0)
+
+
+def test_wav_derivatives_include_analysis(tmp_path):
+    source = write_wav(tmp_path / "clicks.wav", clicks(120))
+    derivatives = media.build_derivatives(source, str(tmp_path / "derived"), "wav", [])
+    assert derivatives["analysis"]["bpm"] == pytest.approx(120, rel=0.01)
+    assert (tmp_path / "derived" / "waveform.json").exists()
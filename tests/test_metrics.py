@@ -0,0 +1,126 @@
+import logging
+import re
+from types import SimpleNamespace
+
+import pytest
+
+import metrics
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """An empty registry, so metrics made by a test are rendered alone."""
+    monkeypatch.setattr(metrics, "REGISTRY", [])
+    return metrics.REGISTRY
+
+
+def test_counters_and_gauges_render_with_escaped_labels(registry):
+    counter = metrics.Counter("jobs_total", "Jobs.", ("queue",))
+    counter.inc(('say "hi"\n',))
+    counter.inc(("a",), 2.5)
+    gauge = metrics.Gauge("depth", "Depth.")
+    gauge.inc()
+    gauge.dec(amount=3)
+    assert metrics.render().splitlines() == [
+        "# HELP jobs_total Jobs.", "# TYPE jobs_total counter",
+        'jobs_total{queue="a"} 2.5', 'jobs_total{queue="say \\"hi\\"\\n"} 1',
+        "# HELP depth Depth.", "# TYPE depth gauge", "depth -2",
+    ]
+
+
+def test_histograms_render_cumulative_buckets(registry):
+    histogram = metrics.Histogram("latency", "Latency.", ("route",), (0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(("/x",), value)
+    assert metrics.render().splitlines()[2:] == [
+        'latency_bucket{route="/x",le="0.1"} 2',
+        'latency_bucket{route="/x",le="1"} 3',
+        'latency_bucket{route="/x",le="+Inf"} 4',
+        'latency_sum{route="/x"} 3.65',
+        'latency_count{route="/x"} 4',
+    ]
+
+
+def test_server_timing_header_clamps_the_app_phase():
+    timing = metrics.RequestTiming()
+    timing.add("db", 0.004)
+    timing.add("db", 0.002)
+    timing.add("encode", 0.001)
+    assert timing.header(0.010) == 'db;dur=6.0;desc="2x", encode;dur=1.0;desc="1x", app;dur=3.0, total;dur=10.0'
+    # Concurrent commands can add up to more than the request took
+    assert "app;dur=0.0" in timing.header(0.005)
+
+
+def test_filter_shape_hides_literals():
+    query = {"realm": "forest", "tags": {"$in": ["a", "b"]}, "$or": [{"a": 1}, {"b": {"$gt": 2}}]}
+    assert metrics.filter_shape(query) == {"realm": "?", "tags": {"$in": ["?"]}, "$or": [{"a": "?"}, {"b": {"$gt": "?"}}]}
+
+
+@pytest.mark.parametrize("name, command, expected", [
+    ("find", {"find": "c", "filter": {"a": 1}}, {"a": 1}),
+    ("count", {"count": "c", "query": {"a": 1}}, {"a": 1}),
+    ("aggregate", {"aggregate": "c", "pipeline": [{"$match": {"a": 1}}, {"$group": {}}]}, {"a": 1}),
+    ("update", {"update": "c", "updates": [{"q": {"a": 1}, "u": {}}]}, {"a": 1}),
+    ("delete", {"delete": "c", "deletes": [{"q": {"a": 1}}]}, {"a": 1}),
+    ("insert", {"insert": "c", "documents": []}, None),
+])
+def test_command_filter(name, command, expected):
+    assert metrics.command_filter(name, command) == expected
+
+
+def command_events(name, command, micros, request_id=1):
+    started = SimpleNamespace(command_name=name, command=command, connection_id=("db", 27017), request_id=request_id)
+    finished = SimpleNamespace(command_name=name, connection_id=("db", 27017), request_id=request_id, duration_micros=micros)
+    return started, finished
+
+
+def test_slow_commands_are_counted_and_logged_by_shape(caplog):
+    timer = metrics.CommandTimer(slow_ms=50)
+    labels = ("characters", "find")
+    before = metrics.MONGO_SLOW.values.get(labels, 0)
+    timing = metrics.RequestTiming()
+    token = metrics.current_timing.set(timing)
+    try:
+        with caplog.at_level(logging.WARNING, logger="mythrealms.mongo"):
+            for request_id, micros in ((1, 1_000), (2, 80_000)):
+                started, finished = command_events("find", {"find": "characters", "filter": {"realm": "forest"}}, micros, request_id)
+                timer.started(started)
+                timer.succeeded(finished)
+    finally:
+        metrics.current_timing.reset(token)
+    assert metrics.MONGO_SLOW.values[labels] == before + 1
+    assert [record.getMessage() for record in caplog.records] == [
+        'Slow find on characters took 80.0 ms, filter {"realm": "?"}'
+    ]
+    assert timing.phases["db"] == [pytest.approx(0.081), 2]
+    assert timer.pending == {}
+
+
+def test_failed_commands_are_counted():
+    timer = metrics.CommandTimer(slow_ms=1000)
+    before = metrics.MONGO_FAILURES.values.get(("weapons", "getMore"), 0)
+    started, finished = command_events("getMore", {"getMore": 1, "collection": "weapons"}, 10)
+    timer.started(started)
+    timer.failed(finished)
+    assert metrics.MONGO_FAILURES.values[("weapons", "getMore")] == before + 1
+
+
+def request_count(client, route, status):
+    pattern = rf'^http_requests_total\{{method="GET",route="{re.escape(route)}",status="{status}"\}} (\S+)$'
+    match = re.search(pattern, client.get("/api/metrics").text, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+
+def test_requests_are_counted_by_route_template(client):
+    before = request_count(client, "/api/characters/{character_id}", 404)
+    client.get("/api/characters/one")
+    client.get("/api/characters/two")
+    assert request_count(client, "/api/characters/{character_id}", 404) == before + 2
+    client.get("/nowhere")
+    assert request_count(client, "unmatched", 404) >= 1
+    assert client.get("/api/metrics").headers["content-type"].startswith("text/plain; version=0.0.4")
+
+
+def test_responses_carry_server_timing(client):
+    header = client.get("/api/characters").headers["server-timing"]
+    assert re.fullmatch(r'encode;dur=[\d.]+;desc="1x", app;dur=[\d.]+, total;dur=[\d.]+', header)
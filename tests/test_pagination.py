@@ -0,0 +1,65 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+BASE = datetime(2024, 1, 1)
+
+
+def seed_characters(server, specs):
+    docs = [
+        server.Character(
+            id=entity_id, name=f"Character {entity_id}", description="", realm=realm,
+            character_type="npc", created_at=BASE + timedelta(minutes=minute)
+        ).dict()
+        for entity_id, minute, realm in specs
+    ]
+    asyncio.run(server.db.characters.insert_many(docs))
+
+
+def walk(client, path, **params):
+    pages, cursor = [], None
+    while True:
+        response = client.get(path, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        pages.append([row["id"] for row in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return pages
+
+
+def test_pages_follow_the_cursor_newest_first_with_id_tiebreak(server, client):
+    # b, c and d share a timestamp, so only the id orders them
+    seed_characters(server, [("a", 0, "forest"), ("b", 5, "forest"), ("c", 5, "galaxy"), ("d", 5, "forest"), ("e", 9, "forest")])
+
+    assert walk(client, "/api/characters", limit=2) == [["e", "d"], ["c", "b"], ["a"]]
+    assert walk(client, "/api/characters", limit=5) == [["e", "d", "c", "b", "a"]]
+    assert walk(client, "/api/characters", limit=2, realm="forest") == [["e", "d"], ["b", "a"]]
+
+
+def test_rows_written_between_pages_do_not_shift_later_pages(server, client):
+    seed_characters(server, [(f"{index:02d}", index, "forest") for index in range(6)])
+    first = client.get("/api/characters", params={"limit": 3})
+    seed_characters(server, [("new", 100, "forest")])
+
+    second = client.get("/api/characters", params={"limit": 3, "cursor": first.headers["X-Next-Cursor"]})
+    assert [row["id"] for row in first.json()] == ["05", "04", "03"]
+    assert [row["id"] for row in second.json()] == ["02", "01", "00"]
+    assert "X-Next-Cursor" not in second.headers
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "e30", "eyJ0IjogIm5vdCBhIGRhdGUiLCAiaWQiOiAiYSJ9"])
+def test_malformed_cursors_are_rejected(client, cursor):
+    response = client.get("/api/weapons", params={"cursor": cursor})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+@pytest.mark.parametrize("limit", [0, 501])
+def test_limit_is_bounded(client, limit):
+    assert client.get("/api/quests", params={"limit": limit}).status_code == 422
+
+
+def test_cursor_header_is_exposed_to_browsers(client):
+    response = client.get("/api/documents", headers={"Origin": "http://localhost:3000"})
+    assert "X-Next-Cursor" in response.headers["access-control-expose-headers"]
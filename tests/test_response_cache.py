@@ -0,0 +1,112 @@
+import response_cache
+from response_cache import ResponseCache
+
+HEADERS = [("content-type", "application/json")]
+
+
+def test_hit_returns_the_stored_entry_with_a_stable_etag():
+    cache = ResponseCache(max_bytes=1024, ttl_seconds=60)
+    token = cache.token(["weapons"])
+    stored = cache.put("/weapons?page=1", token, b'{"items": []}', HEADERS)
+    assert cache.get("/weapons?page=1", token) is stored
+    assert cache.get("/weapons?page=2", token) is None
+    assert stored.etag == cache.put("/other", token, b'{"items": []}', HEADERS).etag
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_invalidating_a_collection_misses_only_dependent_entries():
+    cache = ResponseCache(max_bytes=1024, ttl_seconds=60)
+    cache.put("/weapons", cache.token(["weapons"]), b"w", HEADERS)
+    cache.put("/lore", cache.token(["lore"]), b"l", HEADERS)
+    cache.put("/search", cache.token(["weapons", "lore"]), b"s", HEADERS)
+
+    cache.invalidate("weapons")
+    assert cache.get("/weapons", cache.token(["weapons"])) is None
+    assert cache.get("/search", cache.token(["weapons", "lore"])) is None
+    assert cache.get("/lore", cache.token(["lore"])) is not None
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(response_cache.time, "monotonic", lambda: now[0])
+    cache = ResponseCache(max_bytes=1024, ttl_seconds=5)
+    cache.put("/weapons", (), b"w", HEADERS)
+    now[0] += 5
+    assert cache.get("/weapons", ()) is not None
+    now[0] += 0.5
+    assert cache.get("/weapons", ()) is None
+
+
+def test_least_recently_used_entries_are_evicted_over_the_byte_budget():
+    cache = ResponseCache(max_bytes=100, ttl_seconds=60)
+    for key in "abcd":
+        cache.put(key, (), b"x" * 25, HEADERS)
+    cache.get("a", ())
+    cache.put("e", (), b"x" * 25, HEADERS)
+
+    assert list(cache.entries) == ["c", "d", "a", "e"]
+    assert cache.size == 100
+    cache.put("e", (), b"x" * 10, HEADERS)
+    assert cache.size == 85
+
+
+def test_bodies_over_a_quarter_of_the_budget_are_not_stored():
+    cache = ResponseCache(max_bytes=100, ttl_seconds=60)
+    entry = cache.put("big", (), b"x" * 26, HEADERS)
+    assert entry.body == b"x" * 26 and entry.etag
+    assert cache.get("big", ()) is None
+    assert cache.size == 0
+
+
+CHARACTER = {"name": "Ember", "description": "A fire spirit", "realm": "forest", "character_type": "hero"}
+
+
+def test_etag_matches_uses_the_weak_comparison(server):
+    assert server.etag_matches('"abc"', '"abc"')
+    assert server.etag_matches('W/"abc"', '"abc"')
+    assert server.etag_matches('"other", W/"abc"', '"abc"')
+    assert server.etag_matches('"abc"', 'W/"abc"')
+    assert server.etag_matches("*", '"abc"')
+    assert not server.etag_matches('"abcd"', '"abc"')
+    assert not server.etag_matches(None, '"abc"')
+
+
+def test_get_responses_are_cached_until_a_write(client):
+    client.post("/api/characters", json=CHARACTER)
+    first = client.get("/api/characters")
+    second = client.get("/api/characters")
+    assert (first.headers["x-cache"], second.headers["x-cache"]) == ("MISS", "HIT")
+    assert first.headers["etag"] == second.headers["etag"]
+    assert first.content == second.content
+    assert second.headers["content-type"] == "application/json"
+
+    client.post("/api/characters", json={**CHARACTER, "name": "Frost"})
+    third = client.get("/api/characters")
+    assert third.headers["x-cache"] == "MISS"
+    assert third.headers["etag"] != first.headers["etag"]
+    assert len(third.json()) == 2
+
+
+def test_if_none_match_answers_304_for_strong_and_weak_tags(client):
+    client.post("/api/characters", json=CHARACTER)
+    etag = client.get("/api/characters").headers["etag"]
+    for tag in (etag, f"W/{etag}", f'"stale", {etag}'):
+        response = client.get("/api/characters", headers={"If-None-Match": tag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+    assert client.get("/api/characters", headers={"If-None-Match": '"stale"'}).status_code == 200
+
+
+def test_query_parameters_are_part_of_the_key(client):
+    client.post("/api/characters", json=CHARACTER)
+    assert client.get("/api/characters", params={"realm": "forest"}).headers["x-cache"] == "MISS"
+    assert client.get("/api/characters", params={"realm": "galaxy"}).json() == []
+    assert client.get("/api/characters", params={"realm": "forest"}).headers["x-cache"] == "HIT"
+
+
+def test_errors_are_not_cached(client):
+    for _ in range(2):
+        response = client.get("/api/characters/missing")
+        assert response.status_code == 404
+        assert "x-cache" not in response.headers
@@ -0,0 +1,65 @@
+import pytest
+
+
+def hits(key, *scores):
+    return [(score, {"id": f"{key}-{position}"}) for position, score in enumerate(scores)]
+
+
+def test_scores_are_scaled_per_source_before_merging():
+    import server
+    # Raw text scores from a heavily weighted index dwarf a lightly weighted one
+    sources = [("documents", 2, hits("documents", 30.0, 15.0)), ("quests", 2, hits("quests", 1.2, 0.9)), ("music", 0, [])]
+    merged = server.merge_search_hits(sources, limit=10)
+    assert [(hit["item"]["id"], hit["score"]) for hit in merged] == [
+        ("documents-0", 1.0), ("quests-0", 1.0), ("quests-1", pytest.approx(0.75)), ("documents-1", 0.5),
+    ]
+    assert [hit["item"]["id"] for hit in server.merge_search_hits(sources, limit=3)] == ["documents-0", "quests-0", "quests-1"]
+
+
+@pytest.fixture
+def canned_search(server, monkeypatch):
+    """Text search is not available in mongomock; serve fixed hits per source."""
+    canned = {
+        "documents": (7, hits("documents", 12.0, 6.0, 3.0)),
+        "characters": (1, hits("characters", 1.1)),
+        "weapons": (0, []),
+        "quests": (2, hits("quests", 2.0, 1.0)),
+        "music": (0, []),
+    }
+    calls = []
+
+    async def search_source(key, collection, model, query, limit, fields):
+        calls.append((key, query, limit, fields))
+        total, found = canned[key]
+        return key, total, found[:limit]
+
+    monkeypatch.setattr(server, "search_source", search_source)
+    return calls
+
+
+def test_search_returns_one_ranked_list_with_facets(client, canned_search):
+    response = client.get("/api/search", params={"query": "forest", "limit": 4})
+    assert response.status_code == 200
+    body = response.json()
+    assert set(body) == {"query", "total", "facets", "results"}
+    assert body["facets"] == {"documents": 7, "characters": 1, "weapons": 0, "quests": 2, "music": 0}
+    assert [(hit["type"], hit["item"]["id"]) for hit in body["results"]] == [
+        ("documents", "documents-0"), ("characters", "characters-0"), ("quests", "quests-0"), ("documents", "documents-1"),
+    ]
+    assert body["total"] == len(body["results"]) == 4
+    assert {limit for _, _, limit, _ in canned_search} == {4}
+
+
+def test_blank_queries_skip_the_sources(client, canned_search):
+    body = client.get("/api/search", params={"query": "   "}).json()
+    assert body["total"] == 0 and body["results"] == []
+    assert canned_search == []
+
+
+def test_search_validates_fields_and_query(client, canned_search):
+    response = client.get("/api/search", params={"query": "forest", "fields": "name,bogus"})
+    assert response.status_code == 400
+    assert "bogus" in response.json()["detail"]
+    assert client.get("/api/search", params={"query": "x" * 201}).status_code == 422
+    assert client.get("/api/search", params={"query": "forest", "fields": "name,lore"}).status_code == 200
+    assert canned_search[-1][3] == {"name", "lore"}
@@ -0,0 +1,55 @@
+import asyncio
+import json
+from datetime import datetime
+from typing import List
+
+import pytest
+import typer
+from fastapi.utils import create_response_field
+from typer.testing import CliRunner
+
+import serialization_bench
+from serialization import trusted_row, trusted_rows
+
+
+def test_trusted_rows_keep_model_fields_only(server):
+    row = trusted_row(server.Weapon, {"_id": "x", "score": 1.5, "id": "w1", "name": "Dawn", "weapon_type": "sword", "lore": "l"})
+    assert list(row) == list(server.Weapon.model_fields)
+    assert (row["id"], row["name"], row["damage_profile"], row["combo_path"]) == ("w1", "Dawn", {}, [])
+
+
+def test_default_factories_are_called_per_row(server):
+    first, second = trusted_rows(server.Weapon, [{"name": "a"}, {"name": "b"}])
+    first["combo_path"].append("light")
+    assert second["combo_path"] == []
+    assert first["id"] != second["id"]
+
+
+@pytest.mark.parametrize("name", sorted(serialization_bench.MODELS))
+def test_trusted_bodies_match_validated_bodies(name):
+    model, factory = serialization_bench.MODELS[name]
+    docs = serialization_bench.stored_page(model, factory, 5)
+    field = create_response_field(name="Response", type_=List[model])
+    loop = asyncio.new_event_loop()
+    try:
+        expected = json.loads(serialization_bench.default_body(model, field, docs, loop))
+    finally:
+        loop.close()
+    assert json.loads(serialization_bench.trusted_body(model, docs)) == expected
+
+
+def test_benchmark_reports_every_model():
+    app = typer.Typer()
+    app.command()(serialization_bench.main)
+    result = CliRunner().invoke(app, ["--rows", "2", "--repeat", "1", "--json"])
+    assert result.exit_code == 0, result.output
+    assert sorted(json.loads(result.output)) == sorted(serialization_bench.MODELS)
+
+
+def test_stored_documents_written_before_new_fields_get_defaults(server, client):
+    legacy = {"id": "c1", "name": "Ember", "description": "d", "realm": "forest", "character_type": "hero", "created_at": datetime(2024, 1, 1)}
+    asyncio.run(server.db.characters.insert_one(dict(legacy)))
+    listed = client.get("/api/characters").json()
+    assert listed == [client.get("/api/characters/c1").json()]
+    assert "_id" not in listed[0]
+    assert (listed[0]["emotions"], listed[0]["dialogue_lines"], listed[0]["created_at"]) == ({}, [], "2024-01-01T00:00:00")
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+import similarity
+
+
+def test_tokenize_drops_stopwords_and_single_characters():
+    assert similarity.tokenize("The Fire-Sword of a King, x2 v") == ["fire", "sword", "king", "x2"]
+
+
+def test_growable_array_keeps_values_across_growth():
+    values = similarity.GrowableArray(np.int32, capacity=2)
+    values.extend([1, 2])
+    values.extend(range(3, 8))
+    assert values.view.tolist() == [1, 2, 3, 4, 5, 6, 7]
+
+
+def corpus():
+    index = similarity.SimilarityIndex()
+    index.add("lore", "fire", "Fire", "dragon fire flame ember dragon")
+    index.add("lore", "ice", "Ice", "frost glacier snow dragon")
+    index.add("weapon", "blade", "Blade", "flame ember blade")
+    index.add("weapon", "bow", "Bow", "wood string arrow")
+    return index
+
+
+def test_related_ranks_by_cosine_similarity():
+    index = corpus()
+    related = index.related("lore", "fire")
+    assert [item["id"] for item in related] == ["blade", "ice"]
+    assert related[0]["score"] > related[1]["score"] > 0
+    assert related[0] == {"type": "weapon", "id": "blade", "label": "Blade", "score": pytest.approx(related[0]["score"])}
+    assert [item["id"] for item in index.related("lore", "fire", kinds=["lore"])] == ["ice"]
+    assert index.related("lore", "fire", k=1)[0]["id"] == "blade"
+    assert index.related("weapon", "bow") == []
+
+
+def test_related_unknown_entity_raises_key_error():
+    with pytest.raises(KeyError):
+        corpus().related("lore", "missing")
+
+
+def test_updates_and_removals_only_affect_that_entity():
+    index = corpus()
+    index.add("weapon", "bow", "Bow", "dragon fire arrow")
+    index.remove(("lore", "ice"))
+    index.remove(("lore", "missing"))
+
+    assert len(index) == 3
+    assert {item["id"] for item in index.related("lore", "fire")} == {"blade", "bow"}
+    # Tombstoned rows no longer count towards document frequencies
+    assert index.df.view[index.vocab["frost"]] == 0
+    assert index.df.view[index.vocab["dragon"]] == 2
+
+
+def test_compact_preserves_scores():
+    index = corpus()
+    for text in ("wood arrow", "wood string", "arrow string wood wood"):
+        index.add("weapon", "bow", "Bow", text)
+    index.add("lore", "tree", "Tree", "wood bark leaf")
+    before = index.related("weapon", "bow")
+
+    index.compact()
+    assert len(index.keys) == len(index) == 5
+    after = index.related("weapon", "bow")
+    assert [item["id"] for item in after] == [item["id"] for item in before]
+    assert [item["score"] for item in after] == pytest.approx([item["score"] for item in before], rel=1e-5)
@@ -0,0 +1,104 @@
+import asyncio
+import gzip
+
+import pytest
+
+import snapshot
+
+CHARACTER = {"description": "A spirit", "realm": "forest", "character_type": "hero"}
+
+
+@pytest.fixture
+def exported(server, client, monkeypatch):
+    """Two characters and a weapon, exported as NDJSON."""
+
+    async def standalone(db):
+        return False
+
+    monkeypatch.setattr(snapshot, "is_replica_set", standalone)
+    for name in ("Ember", "Frost"):
+        client.post("/api/characters", json={**CHARACTER, "name": name})
+    client.post("/api/weapons", json={"name": "Dawn", "weapon_type": "sword", "lore": "Old"})
+    return client.get("/api/snapshot").content
+
+
+def restore(client, body, replace=False):
+    return client.post("/api/snapshot/restore", params={"replace": replace}, content=body)
+
+
+def character_names(client):
+    return sorted(character["name"] for character in client.get("/api/characters").json())
+
+
+def collection_names(server):
+    return asyncio.run(server.db.list_collection_names())
+
+
+def test_replace_restores_the_project_as_exported(server, client, exported):
+    client.post("/api/characters", json={**CHARACTER, "name": "Later"})
+    response = restore(client, exported, replace=True)
+    assert response.status_code == 200
+    assert response.json()["restored"] == {"characters": 2, "weapons": 1, "files": 0}
+    assert character_names(client) == ["Ember", "Frost"]
+    assert client.get("/api/dashboard/stats").json()["characters"] == 2
+    assert not [name for name in collection_names(server) if name.endswith(snapshot.STAGING_SUFFIX)]
+
+
+def test_replace_empties_collections_the_snapshot_has_no_documents_for(client, exported):
+    client.post("/api/quests", json={"title": "Later", "description": "d", "realm": "forest", "quest_type": "main"})
+    assert restore(client, exported, replace=True).status_code == 200
+    assert client.get("/api/quests").json() == []
+
+
+def test_merge_keeps_documents_created_after_the_snapshot(client, exported):
+    client.post("/api/characters", json={**CHARACTER, "name": "Later"})
+    ember = next(c for c in client.get("/api/characters").json() if c["name"] == "Ember")
+    client.delete(f"/api/characters/{ember['id']}")
+    assert restore(client, gzip.compress(exported)).status_code == 200
+    assert character_names(client) == ["Ember", "Frost", "Later"]
+
+
+def test_gzip_export_restores(client, exported):
+    compressed = client.get("/api/snapshot", params={"gzip": True}).content
+    assert gzip.decompress(compressed).count(b"\n") == exported.count(b"\n")
+    assert restore(client, compressed, replace=True).status_code == 200
+
+
+@pytest.mark.parametrize("corrupt, message", [
+    (lambda body: body[:body.rindex(b'{"end"')], "Snapshot ended before its end line"),
+    (lambda body: body[:len(body) // 2], "Invalid snapshot line"),
+    (lambda body: body.replace(b'"collection": "weapons"', b'"collection": "spells"'), "Unknown collection in snapshot: spells"),
+    (lambda body: body + body.splitlines(keepends=True)[1], "Data after the end line"),
+    (lambda body: gzip.compress(body)[:-30], "Gzip data is truncated"),
+    (lambda body: gzip.compress(body)[:10] + b"\xff" * 40, "Corrupt gzip data"),
+])
+def test_a_bad_snapshot_replaces_nothing(server, client, exported, corrupt, message):
+    client.post("/api/characters", json={**CHARACTER, "name": "Later"})
+    response = restore(client, corrupt(exported), replace=True)
+    assert response.status_code == 400
+    assert message in response.json()["detail"]["message"]
+    assert response.json()["detail"]["restored"] == {}
+    assert character_names(client) == ["Ember", "Frost", "Later"]
+    assert len(client.get("/api/weapons").json()) == 1
+    assert not [name for name in collection_names(server) if name.endswith(snapshot.STAGING_SUFFIX)]
+
+
+def test_a_failed_merge_reports_what_was_written(client, exported, monkeypatch):
+    monkeypatch.setattr(snapshot, "RESTORE_BATCH_SIZE", 1)
+    client.delete(f"/api/weapons/{client.get('/api/weapons').json()[0]['id']}")
+    truncated = exported[:exported.rindex(b'{"end"')]
+    response = restore(client, truncated)
+    assert response.status_code == 400
+    assert response.json()["detail"]["restored"] == {"characters": 2, "weapons": 1}
+    assert len(client.get("/api/weapons").json()) == 1
+
+
+def test_corrupt_gzip_is_a_value_error():
+    async def lines(body):
+        async def chunks():
+            yield body
+        return [line async for line in snapshot.iter_snapshot_lines(chunks())]
+
+    assert asyncio.run(lines(gzip.compress(b"a\nb\n"))) == [b"a", b"b"]
+    with pytest.raises(ValueError, match="Corrupt gzip data"):
+        asyncio.run(lines(gzip.compress(b"a\n")[:10] + b"\xff" * 40))
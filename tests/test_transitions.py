@@ -0,0 +1,105 @@
+import math
+
+import numpy as np
+import pytest
+
+import transitions
+
+
+def track(track_id, tempo=120, key="C major", mood="exploration"):
+    return {"id": track_id, "tempo": tempo, "key": key, "mood": mood}
+
+
+def realm(n):
+    keys = ["C major", "A minor", "G", "e", "F# minor", "Bb major", "junk"]
+    moods = ["exploration", "combat", "meditation", "unknown"]
+    return [track(f"t{i}", 60 + 7 * i, keys[i % len(keys)], moods[i % len(moods)]) for i in range(n)]
+
+
+@pytest.mark.parametrize("key, expected", [
+    ("C major", (0.0, 0.0)),
+    ("A minor", (0.0, 1.0)),
+    ("am", (0.0, 1.0)),
+    ("G", (1.0, 0.0)),
+    ("F#", (6.0, 0.0)),
+    ("Bb maj", (10.0, 0.0)),
+])
+def test_parse_key_places_relative_keys_together_on_the_circle_of_fifths(key, expected):
+    assert transitions.parse_key(key) == expected
+
+
+@pytest.mark.parametrize("key", ["", "H major", "C dorian", None])
+def test_unparseable_keys_score_as_unknown(key):
+    assert all(math.isnan(value) for value in transitions.parse_key(key))
+    columns = transitions.Tracks([track("a", key=key), track("b")])
+    scores = transitions.component_scores(columns, [0], columns, [1])
+    assert scores["key"][0, 0] == pytest.approx(transitions.UNKNOWN_KEY)
+
+
+def test_component_scores():
+    columns = transitions.Tracks([
+        track("a", 120, "C major", "exploration"),
+        track("b", 120, "A minor", "combat"),
+        track("c", 60, "F# major", "meditation"),
+        track("d", 150, "C major", "bogus"),
+    ])
+    scores = transitions.component_scores(columns, [0, 1], columns, [1, 2, 3])
+    # Same tempo, half time, then a quarter tempo up (the tolerance)
+    assert scores["tempo"][0] == pytest.approx([1.0, transitions.HALF_TIME_FACTOR, 0.0])
+    # Relative minor costs only the mode change; the tritone is the far side
+    assert scores["key"][0] == pytest.approx([1.0 - transitions.MODE_CHANGE_PENALTY / 6.0, 0.0, 1.0])
+    assert scores["mood"][0] == pytest.approx([0.9, 0.8, transitions.UNKNOWN_MOOD])
+    assert scores["mood"][1, 1] == pytest.approx(0.3)
+
+
+def fresh_matrix(tracks):
+    return transitions.RealmMatrix(tracks, max_tracks=1000).matrix
+
+
+def test_upserts_keep_the_matrix_equal_to_a_full_rebuild():
+    tracks = realm(10)
+    matrix = transitions.RealmMatrix(tracks, max_tracks=1000)
+    for extra in realm(40)[10:]:
+        matrix.upsert(extra)
+        tracks.append(extra)
+    changed = track("t3", 133, "D minor", "combat")
+    matrix.upsert(changed)
+    tracks[3] = changed
+
+    assert len(matrix) == 40
+    assert np.isnan(np.diag(matrix.matrix)).all()
+    np.testing.assert_allclose(matrix.matrix, fresh_matrix(tracks), rtol=1e-6)
+
+
+def test_rows_are_computed_on_demand_past_max_tracks():
+    tracks = realm(12)
+    matrix = transitions.RealmMatrix(tracks[:8], max_tracks=10)
+    assert matrix.materialized
+    for extra in tracks[8:]:
+        matrix.upsert(extra)
+    assert not matrix.materialized
+
+    expected = fresh_matrix(tracks)
+    for row, item in enumerate(tracks):
+        np.testing.assert_allclose(matrix.row(item["id"]), expected[row], rtol=1e-6)
+    assert matrix.row("missing") is None
+
+
+def test_candidates_are_ranked_filtered_and_limited():
+    matrix = transitions.RealmMatrix(realm(30), max_tracks=1000)
+    row = matrix.row("t0")
+
+    best = matrix.candidates("t0", limit=5)
+    assert len(best) == 5
+    scores = [score for _, score, _ in best]
+    assert scores == sorted(scores, reverse=True)
+    assert scores[0] == pytest.approx(np.nanmax(row), abs=1e-3)
+    assert all(column != 0 for column, _, _ in best)
+
+    combat = matrix.candidates("t0", limit=100, mood="combat", min_score=0.5)
+    assert combat
+    assert all(matrix.tracks[column]["mood"] == "combat" and score >= 0.5 for column, score, _ in combat)
+
+    column, score, parts = best[0]
+    assert set(parts) == set(transitions.WEIGHTS)
+    assert score == pytest.approx(sum(transitions.WEIGHTS[name] * parts[name] for name in parts), abs=2e-3)